@@ -1,11 +1,35 @@
+import json
+import os
+import threading
+import time
+
 import customtkinter
-from tkinter import ttk
-from crud_operations import fetch_all_data, insert_data, update_data, delete_data
-from ui_components import create_table_display
+from tkinter import filedialog, messagebox, ttk
+from crud_operations import (fetch_all_data, fetch_page, fetch_rows, insert_data, update_data, delete_data,
+                             update_by_keys, delete_many, search_data, SEARCH_LIMIT, get_mirror, sync_mirror,
+                             use_mirror, explain_filters, cache_stats, coalescing_stats)
+from ui_components import (attach_autocomplete, create_paged_table_display, create_progress_window,
+                           create_table_display, remove_table_row, upsert_table_row)
+from query_executor import QueryExecutor
+from change_watcher import ChangeWatcher
+from circulation import snapshot as circulation_snapshot
+from columnar import memory_by_table
+from instrumentation import dump_metrics, get_metrics, is_enabled as metrics_enabled, record, span
+from bulk_import import import_csv
+from table_export import ExportCancelled, export_table
+from schema_catalog import get_table_schema
+from reference_data import REFERENCE_TABLES, describe, preload as preload_reference_data, suggest, validate_foreign_keys
+from search_index import (IndexBudgetExceeded, build_index, drop_index, get_index, index_row, install_index,
+                          mark_too_large, should_index, table_version, unindex_row)
 import sys
 
 class LibraryApp(customtkinter.CTk):
-    def __init__(self):
+    def __init__(self, started=None, exit_after_first_data=False):
+        """`started` is the perf_counter() value startup timings count from (process start in main.py).
+
+        With exit_after_first_data, the app prints its startup timings as JSON
+        once the first table is shown and then closes.
+        """
         super().__init__()
         self.title("Library Management System")
         self.geometry("1400x800")
@@ -14,17 +38,76 @@ class LibraryApp(customtkinter.CTk):
         self.BUTTON_NORMAL_COLOR = "#2980b9"    # Normal blue color
         self.BUTTON_SELECTED_COLOR = "#1abc9c"   # Highlighted teal color
 
+        # Rows fetched per page when browsing a table
+        self.PAGE_SIZE = 200
+        # Pause after the last keystroke before search-as-you-type runs
+        self.SEARCH_DEBOUNCE_MS = 300
+        # How often the local mirror pulls changes from MySQL
+        self.MIRROR_SYNC_INTERVAL_MS = 30000
+        # How often mirrored tables are checked against MySQL, by range checksums, for edits and deletions
+        self.MIRROR_RECONCILE_INTERVAL_S = 600
+        # How often the open table is checked for changes made at other desks
+        self.CHANGE_POLL_MS = 5000
+
         # Configure grid weights
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(1, weight=1)
 
+        # Database work runs on background threads so the window never freezes
+        self.executor = QueryExecutor(self)
+        self.watcher = ChangeWatcher(self, self.executor, self._apply_remote_changes, self.CHANGE_POLL_MS)
+        self._index_builds = set()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # LIBMAN_MIRROR=1 reads from a local SQLite mirror; =offline never contacts MySQL
+        self._mirror_syncs = set()
+        self._mirror_reconciled_at = time.monotonic()
+        mirror_mode = os.environ.get('LIBMAN_MIRROR', '')
+        if mirror_mode not in ('', '0'):
+            use_mirror(offline=mirror_mode == 'offline')
+            self.after(self.MIRROR_SYNC_INTERVAL_MS, self._sync_mirror)
+
         # Initialize UI Components
         self._init_sidebar()
         self._init_main_frame()
         
+        # Startup timings, in ms since `started`
+        self._started = started if started is not None else time.perf_counter()
+        self._startup_timings = {}
+        self._exit_after_first_data = exit_after_first_data
+        self.bind("<Map>", self._on_map, add="+")
+
         # Initialize current table and load default
         self.current_table = None
-        self.switch_table("Books")
+        self.table_frame = None
+        self._switch_started = None
+        # Let the window shell paint first; the driver, the first connection, the
+        # schema catalog and the first page are then all loaded on a worker thread
+        self.after_idle(self.switch_table, "Books")
+
+    def _on_map(self, event):
+        if event.widget is self and "first_paint_ms" not in self._startup_timings:
+            # Idle callbacks queued before this one draw the widgets that were just mapped
+            self.after_idle(self._mark_startup, "first_paint")
+
+    def _mark_startup(self, milestone, rows=None, error=None):
+        """Records the first time a startup milestone is reached."""
+        key = f"{milestone}_ms"
+        if key in self._startup_timings:
+            return
+        elapsed_ms = (time.perf_counter() - self._started) * 1000
+        self._startup_timings[key] = round(elapsed_ms, 1)
+        if metrics_enabled():
+            record(f"startup.{milestone}", elapsed_ms, rows=rows)
+        if milestone == "first_data":
+            # Warm the lookup tables behind the form pickers while the user looks around
+            self.executor.submit(preload_reference_data,
+                                 on_error=lambda e: print(f"Failed to load reference data: {e}"))
+        if milestone == "first_data" and self._exit_after_first_data:
+            if error is not None:
+                self._startup_timings["error"] = error
+            print(json.dumps(self._startup_timings))
+            self.after_idle(self.on_close)
 
     #region SIDEBAR INITIALIZATION
     def _init_sidebar(self):
@@ -103,6 +186,20 @@ class LibraryApp(customtkinter.CTk):
                 self.table_buttons[table] = btn
                 current_row += 1
 
+        # Aggregates over Loans and Fines, shown in place of a table
+        self.dashboard_button = customtkinter.CTkButton(
+            self.sidebar_content,
+            text="Circulation",
+            height=32,
+            width=160,
+            corner_radius=5,
+            command=self.show_dashboard,
+            fg_color="#2980b9",
+            hover_color="#3498db",
+            anchor="center"
+        )
+        self.dashboard_button.grid(row=current_row, column=0, padx=20, pady=3)
+
     def _create_crud_buttons(self):
         """Create the CRUD operation buttons"""
         # Separator
@@ -128,6 +225,39 @@ class LibraryApp(customtkinter.CTk):
                 hover_color=hover_color
             )
             btn.grid(row=99+i, column=0, padx=20, pady=5)
+
+        # Data transfer buttons
+        transfer_buttons = [
+            ("Import CSV", self.import_records),
+            ("Export", self.export_records)
+        ]
+
+        for i, (text, command) in enumerate(transfer_buttons):
+            btn = customtkinter.CTkButton(
+                self.sidebar_content,
+                text=text,
+                command=command,
+                height=35,
+                width=160,
+                corner_radius=5,
+                fg_color="#8e44ad",
+                hover_color="#9b59b6"
+            )
+            btn.grid(row=99+len(crud_buttons)+i, column=0, padx=20, pady=5)
+
+        # Timing stats are only offered when instrumentation is switched on
+        if metrics_enabled():
+            stats_btn = customtkinter.CTkButton(
+                self.sidebar_content,
+                text="Stats",
+                command=self.show_stats_panel,
+                height=35,
+                width=160,
+                corner_radius=5,
+                fg_color="#7f8c8d",
+                hover_color="#95a5a6"
+            )
+            stats_btn.grid(row=99+len(crud_buttons)+len(transfer_buttons), column=0, padx=20, pady=5)
     #endregion
 
     #region MAIN FRAME AND TABLE MANAGEMENT
@@ -141,42 +271,222 @@ class LibraryApp(customtkinter.CTk):
         # Reset all buttons to normal color
         for btn in self.table_buttons.values():
             btn.configure(fg_color=self.BUTTON_NORMAL_COLOR)
+        self.dashboard_button.configure(fg_color=self.BUTTON_NORMAL_COLOR)
         
         # Highlight the selected button
         self.table_buttons[table_name].configure(fg_color=self.BUTTON_SELECTED_COLOR)
         
         self.current_table = table_name
-        columns, data = fetch_all_data(table_name)
+        self._switch_started = time.perf_counter()
+
+        # A new table starts in key order with no filters
+        self.view_sort = None       # (column, descending), or None for ascending key order
+        self.view_filters = []      # [(column, operator, value)] as accepted by fetch_page
 
         # Clear previous widgets
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
+        self._clear_main_frame()
 
-        # Create search bar
+        # Create search and filter bars, with the table shown in its own area below them
         self.create_search_bar()
+        self.create_filter_bar()
+        self.table_area = customtkinter.CTkFrame(self.main_frame, fg_color="transparent")
+        self.table_area.pack(fill="both", expand=True)
+
+        self.load_table(table_name)
+
+    def load_table(self, table_name):
+        """Loads the first page of a table into the table area in the background."""
+        self.show_loading(f"Loading {table_name}...")
+
+        # Any page still loading for the previous table is no longer wanted
+        self.executor.cancel("page")
+        self.executor.submit(
+            self._load_first_page,
+            table_name,
+            self.view_sort,
+            list(self.view_filters),
+            channel="table",
+            on_success=lambda result: self.display_table(*result),
+            on_error=lambda e: self.show_load_error(f"Failed to load {table_name}: {e}")
+        )
+
+        if should_index(table_name):
+            self._build_search_index(table_name)
+
+        mirror = get_mirror()
+        if mirror is not None and not mirror.offline and not mirror.has_table(table_name):
+            # Browse from MySQL for now; once copied, reads of this table stay local
+            self._sync_mirror(table_name)
+
+    def _sync_mirror(self, table_name=None):
+        """Pulls changes into the local mirror in the background; without a table, repeats periodically."""
+        reconcile = False
+        if table_name is None:
+            self.after(self.MIRROR_SYNC_INTERVAL_MS, self._sync_mirror)
+            reconcile = time.monotonic() - self._mirror_reconciled_at >= self.MIRROR_RECONCILE_INTERVAL_S
+        if table_name in self._mirror_syncs:
+            return
+        self._mirror_syncs.add(table_name)
+        if reconcile:
+            self._mirror_reconciled_at = time.monotonic()
+
+        def on_done(_result):
+            self._mirror_syncs.discard(table_name)
+
+        def on_error(e):
+            self._mirror_syncs.discard(table_name)
+            print(f"Failed to sync the local mirror: {e}")
+
+        self.executor.submit(sync_mirror, table_name, reconcile=reconcile, on_success=on_done, on_error=on_error)
+
+    def _build_search_index(self, table_name):
+        """Loads a small table into an in-memory search index in the background."""
+        if table_name in self._index_builds:
+            return
+        self._index_builds.add(table_name)
+        version = table_version(table_name)
+
+        def build():
+            key_column = get_table_schema(table_name).key_column
+            columns, rows = fetch_all_data(table_name)
+            return build_index(columns, rows, key_index=columns.index(key_column))
+
+        def on_success(index):
+            self._index_builds.discard(table_name)
+            install_index(table_name, index, version)
+
+        def on_error(e):
+            self._index_builds.discard(table_name)
+            if isinstance(e, IndexBudgetExceeded):
+                # Too big to hold in memory; searches stay on the SQL path
+                mark_too_large(table_name)
+            else:
+                print(f"Failed to build search index for {table_name}: {e}")
+
+        self.executor.submit(build, on_success=on_success, on_error=on_error)
+
+    def _load_first_page(self, table_name, sort=None, filters=()):
+        """Reads the key column and first page of a table view. Runs on a worker thread."""
+        # Only the first page is read up front; the rest streams in as the user scrolls
+        key_column = get_table_schema(table_name).key_column
+        columns, first_page = fetch_page(table_name, key_column, limit=self.PAGE_SIZE,
+                                         **self._view_options(sort, filters))
+        return table_name, key_column, columns, first_page, sort, filters
+
+    @staticmethod
+    def _view_options(sort, filters):
+        """fetch_page arguments for a view's sort and filters."""
+        order_by, descending = sort if sort is not None else (None, False)
+        return {'order_by': order_by, 'descending': descending, 'filters': list(filters)}
+
+    def display_table(self, table_name, key_column, columns, first_page, sort=None, filters=()):
+        """Shows the first page of a table and wires up on-demand loading of the rest."""
+        with span("ui.display_table", rows=len(first_page), table=table_name):
+            self._display_table(table_name, key_column, columns, first_page, sort, filters)
+
+        self._mark_startup("first_data", rows=len(first_page))
+        if self._switch_started is not None and metrics_enabled():
+            # Click-to-data latency as the user experiences it, queueing included
+            record("ui.switch_table", (time.perf_counter() - self._switch_started) * 1000,
+                   rows=len(first_page), table=table_name)
+        self._switch_started = None
+
+    def _display_table(self, table_name, key_column, columns, first_page, sort=None, filters=()):
+        self._clear_table_area()
+        self._set_filter_columns(columns)
+        options = self._view_options(sort, filters)
+        # Sorted and filtered views are neither in key order nor contiguous in it
+        key_ordered = sort is None and not filters
 
         # Display table
-        if data:
-            table_frame = create_table_display(self.main_frame, data, columns)
-            table_frame.pack(fill="both", expand=True)
+        if first_page:
+            self.table_frame = create_paged_table_display(
+                self.table_area,
+                columns,
+                lambda **keys: fetch_page(table_name, key_column, limit=self.PAGE_SIZE, **options, **keys)[1],
+                first_page,
+                key_index=columns.index(key_column),
+                page_size=self.PAGE_SIZE,
+                run_async=self._run_page_query,
+                sort=sort,
+                on_heading_click=self.sort_by_column,
+                insert_new=key_ordered
+            )
+            self.table_frame.pack(fill="both", expand=True)
+            paged = self.table_frame.paged_table
+            if key_ordered:
+                self.watcher.watch(table_name, key_column, columns.index(key_column),
+                                   window=lambda: (paged.keys, paged.at_end))
+        elif key_ordered:
+            # Still watch an empty table, so the first row added elsewhere shows up
+            self.watcher.watch(table_name, key_column, columns.index(key_column))
+        else:
+            message = customtkinter.CTkLabel(self.table_area, text="No rows match the filters.",
+                                             text_color="#7f8c8d")
+            message.pack(pady=40)
+
+    def _run_page_query(self, func, on_success, on_error):
+        """Runs a page load for the paged table on the background executor."""
+        self.executor.submit(func, channel="page", on_success=on_success, on_error=on_error)
+
+    def _clear_main_frame(self):
+        """Destroys every widget in the main frame."""
+        for widget in self.main_frame.winfo_children():
+            widget.destroy()
+
+    def _clear_table_area(self):
+        """Destroys the table (or message) shown below the search bar."""
+        self.watcher.stop()
+        self.table_frame = None
+        for widget in self.table_area.winfo_children():
+            widget.destroy()
+
+    def show_loading(self, message):
+        """Replaces the table area with a loading indicator."""
+        self._clear_table_area()
+        loading_label = customtkinter.CTkLabel(
+            self.table_area,
+            text=message,
+            font=customtkinter.CTkFont(size=14),
+            text_color="#7f8c8d"
+        )
+        loading_label.pack(pady=40)
+
+    def show_load_error(self, message):
+        """Replaces the table area with an error message."""
+        self._mark_startup("first_data", error=message)
+        self._clear_table_area()
+        error_label = customtkinter.CTkLabel(
+            self.table_area,
+            text=message,
+            text_color="red",
+            wraplength=600
+        )
+        error_label.pack(pady=40)
 
     def create_search_bar(self):
         """Creates the search bar at the top of the main frame"""
         search_frame = customtkinter.CTkFrame(self.main_frame)
         search_frame.pack(fill="x", padx=10, pady=5)
         
-        search_entry = customtkinter.CTkEntry(
+        self.search_entry = customtkinter.CTkEntry(
             search_frame, 
             placeholder_text="Search...",
             width=300
         )
-        search_entry.pack(side="left", padx=5)
+        self.search_entry.pack(side="left", padx=5)
+
+        # Search as you type, once the user pauses; Enter searches immediately
+        self._search_after_id = None
+        self._last_search_term = ""
+        self.search_entry.bind("<KeyRelease>", self._on_search_key)
+        self.search_entry.bind("<Return>", lambda e: self.search_records(self.search_entry.get()))
         
         search_button = customtkinter.CTkButton(
             search_frame,
             text="Search",
             width=100,
-            command=lambda: self.search_records(search_entry.get())
+            command=lambda: self.search_records(self.search_entry.get())
         )
         search_button.pack(side="left", padx=5)
         
@@ -184,29 +494,283 @@ class LibraryApp(customtkinter.CTk):
             search_frame,
             text="Clear",
             width=100,
-            command=lambda: self.switch_table(self.current_table)
+            command=self.clear_search
         )
         clear_button.pack(side="left", padx=5)
-    #endregion
 
-    #region CRUD OPERATIONS
-    def create_record(self):
-        """Opens a new form window for creating a record for the current table."""
-        if not self.current_table:
+        self.search_status = customtkinter.CTkLabel(search_frame, text="", text_color="#7f8c8d")
+        self.search_status.pack(side="left", padx=10)
+
+    def _on_search_key(self, event):
+        """Debounces typing so a search only runs once the user stops for a moment."""
+        if event.keysym == "Return":
             return
+        self._cancel_pending_search()
+        self._search_after_id = self.after(
+            self.SEARCH_DEBOUNCE_MS,
+            lambda: self.search_records(self.search_entry.get(), incremental=True)
+        )
+
+    def _cancel_pending_search(self):
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+            self._search_after_id = None
 
-        form_window = customtkinter.CTkToplevel(self)
-        form_window.title(f"Insert New {self.current_table}")
-        form_window.geometry("500x600")
+    def clear_search(self):
+        """Empties the search box and shows the whole table again."""
+        self._cancel_pending_search()
+        self._last_search_term = ""
+        self.search_entry.delete(0, "end")
+        self.search_status.configure(text="")
+        self.load_table(self.current_table)
+
+    # Filter operators offered in the filter bar, by label
+    FILTER_CHOICES = {
+        "equals": '=',
+        "starts with": 'prefix',
+        "at least": '>=',
+        "at most": '<=',
+        "between": 'between',
+    }
+
+    def create_filter_bar(self):
+        """Creates the per-column filter bar below the search bar."""
+        filter_frame = customtkinter.CTkFrame(self.main_frame)
+        filter_frame.pack(fill="x", padx=10, pady=(0, 5))
+
+        # Columns are filled in once the table's first page shows which there are
+        self.filter_column = customtkinter.CTkOptionMenu(
+            filter_frame, values=[""], width=150, command=lambda _: self._update_filter_inputs()
+        )
+        self.filter_column.pack(side="left", padx=5)
+
+        self.filter_operator = customtkinter.CTkOptionMenu(
+            filter_frame, values=list(self.FILTER_CHOICES), width=120,
+            command=lambda _: self._update_filter_inputs()
+        )
+        self.filter_operator.pack(side="left", padx=5)
+
+        self.filter_value = customtkinter.CTkEntry(filter_frame, width=140)
+        self.filter_value.pack(side="left", padx=5)
+        self.filter_value.bind("<Return>", lambda e: self.add_filter())
+        self.filter_high = customtkinter.CTkEntry(filter_frame, width=140)
+        self.filter_high.bind("<Return>", lambda e: self.add_filter())
+
+        self.filter_apply_button = customtkinter.CTkButton(filter_frame, text="Filter", width=80,
+                                                           command=self.add_filter)
+        self.filter_apply_button.pack(side="left", padx=5)
+
+        clear_button = customtkinter.CTkButton(filter_frame, text="Clear filters", width=100,
+                                               command=self.clear_filters)
+        clear_button.pack(side="left", padx=5)
+
+        check_button = customtkinter.CTkButton(filter_frame, text="Check indexes", width=110,
+                                               command=self.check_filter_indexes)
+        check_button.pack(side="left", padx=5)
+
+        self.filter_status = customtkinter.CTkLabel(filter_frame, text="", text_color="#7f8c8d")
+        self.filter_status.pack(side="left", padx=10)
+
+    def _set_filter_columns(self, columns):
+        """Offers the shown table's columns in the filter bar, keeping the current choice if it still exists."""
+        columns = list(columns)
+        if list(self.filter_column.cget("values")) != columns:
+            self.filter_column.configure(values=columns)
+            if self.filter_column.get() not in columns:
+                self.filter_column.set(columns[0])
+        self._update_filter_inputs()
+        self._show_view_status()
+
+    def _filter_column_type(self):
+        try:
+            return get_table_schema(self.current_table).types.get(self.filter_column.get())
+        except KeyError:
+            return None
+
+    def _update_filter_inputs(self):
+        """Shows the second value box for ranges, with date hints on date columns."""
+        is_date = self._filter_column_type() in ('date', 'datetime', 'timestamp')
+        placeholder = "YYYY-MM-DD" if is_date else ""
+        between = self.filter_operator.get() == "between"
+        self.filter_value.configure(placeholder_text=("from " if between else "") + placeholder)
+        self.filter_high.configure(placeholder_text="to " + placeholder)
+        if between:
+            self.filter_high.pack(side="left", padx=5, before=self.filter_apply_button)
+        else:
+            self.filter_high.pack_forget()
+
+    def add_filter(self):
+        """Adds the filter bar's condition to the view and reloads it."""
+        column = self.filter_column.get()
+        if not column:
+            return
+        operator = self.FILTER_CHOICES[self.filter_operator.get()]
+        value = self.filter_value.get().strip()
+        if operator == 'between':
+            high = self.filter_high.get().strip()
+            if not value or not high:
+                messagebox.showwarning("Filter", "Enter both ends of the range.")
+                return
+            value = (value, high)
+        elif not value:
+            messagebox.showwarning("Filter", "Enter a value to filter by.")
+            return
+
+        self.view_filters.append((column, operator, value))
+        self.filter_value.delete(0, "end")
+        self.filter_high.delete(0, "end")
+        self.load_table(self.current_table)
+
+    def clear_filters(self):
+        """Removes every filter and the sort order, and shows the table in key order again."""
+        self.view_filters = []
+        self.view_sort = None
+        self.load_table(self.current_table)
+
+    def sort_by_column(self, column):
+        """Sorts the view by a column, reversing the order when it is already sorted by it."""
+        if self.view_sort is not None and self.view_sort[0] == column:
+            self.view_sort = (column, not self.view_sort[1])
+        else:
+            self.view_sort = (column, False)
+        self.load_table(self.current_table)
+
+    def _show_view_status(self):
+        """Summarises the active filters and sort order next to the filter bar."""
+        labels = {operator: label for label, operator in self.FILTER_CHOICES.items()}
+        parts = []
+        for column, operator, value in self.view_filters:
+            shown = f"{value[0]} and {value[1]}" if operator == 'between' else value
+            parts.append(f"{column} {labels[operator]} {shown}")
+        if self.view_sort is not None:
+            parts.append(f"sorted by {self.view_sort[0]}{' descending' if self.view_sort[1] else ''}")
+        self.filter_status.configure(text="; ".join(parts))
+
+    def check_filter_indexes(self):
+        """Reports whether the database has indexes for the current filters and sort order."""
+        table_name = self.current_table
+        filters = list(self.view_filters)
+        order_by = self.view_sort[0] if self.view_sort is not None else None
+        if not filters and order_by is None:
+            messagebox.showinfo("Check indexes", "Add a filter or sort by a column first.")
+            return
+
+        def on_success(report):
+            lines = []
+            if report['unindexed']:
+                lines.append("No index leads with: " + ", ".join(report['unindexed']) + ".")
+                lines.append("Filtering or sorting on these columns reads the whole table.")
+            else:
+                lines.append("Every filtered and sorted column leads an index.")
+            if report['full_scan']:
+                lines.append("MySQL's plan scans the whole table for this view.")
+            for step in report['plan']:
+                lines.append(f"{step.get('table')}: access {step.get('type')}, key {step.get('key')}, "
+                             f"~{step.get('rows')} rows")
+            messagebox.showinfo("Check indexes", "\n".join(lines))
+
+        self.executor.submit(
+            explain_filters, table_name, filters, order_by,
+            on_success=on_success,
+            on_error=lambda e: messagebox.showerror("Check indexes", f"Could not check indexes: {e}")
+        )
+    #endregion
+
+    #region CIRCULATION DASHBOARD
+    def show_dashboard(self, refresh=False):
+        """Shows circulation aggregates (loans, overdue loans, unpaid fines, popular books) in place of a table."""
+        for btn in self.table_buttons.values():
+            btn.configure(fg_color=self.BUTTON_NORMAL_COLOR)
+        self.dashboard_button.configure(fg_color=self.BUTTON_SELECTED_COLOR)
+
+        # No table is open, so the CRUD and search actions have nothing to act on
+        self.current_table = None
+        self._switch_started = None
+        self.watcher.stop()
+        self._clear_main_frame()
+
+        header = customtkinter.CTkFrame(self.main_frame)
+        header.pack(fill="x", padx=10, pady=5)
+        title = customtkinter.CTkLabel(header, text="Circulation", font=customtkinter.CTkFont(size=18, weight="bold"))
+        title.pack(side="left", padx=10)
+        refresh_button = customtkinter.CTkButton(header, text="Refresh", width=100,
+                                                 command=lambda: self.show_dashboard(refresh=True))
+        refresh_button.pack(side="left", padx=5)
+        self.dashboard_status = customtkinter.CTkLabel(header, text="", text_color="#7f8c8d")
+        self.dashboard_status.pack(side="left", padx=10)
+
+        self.table_area = customtkinter.CTkFrame(self.main_frame, fg_color="transparent")
+        self.table_area.pack(fill="both", expand=True)
+        self.show_loading("Loading circulation summary...")
+
+        self.executor.cancel("page")
+        self.executor.submit(
+            circulation_snapshot,
+            refresh,
+            channel="table",
+            on_success=self._display_dashboard,
+            on_error=lambda e: self.show_load_error(f"Failed to load the circulation summary: {e}")
+        )
+
+    def _display_dashboard(self, summary):
+        self._clear_table_area()
+        self.dashboard_status.configure(text=f"As of {summary['as_of']:%H:%M:%S}")
+
+        # Headline figures
+        figures = customtkinter.CTkFrame(self.table_area, fg_color="transparent")
+        figures.pack(fill="x", padx=10, pady=10)
+        headline = [
+            ("Active loans", f"{summary['active_loans']}"),
+            ("Overdue loans", f"{summary['overdue_loans']}"),
+            ("Fines outstanding", f"{summary['fines_outstanding']:.2f}"),
+            ("Members owing", f"{summary['members_owing']}"),
+        ]
+        for i, (label, value) in enumerate(headline):
+            card = customtkinter.CTkFrame(figures)
+            card.grid(row=0, column=i, padx=5, sticky="ew")
+            figures.grid_columnconfigure(i, weight=1)
+            customtkinter.CTkLabel(card, text=value, font=customtkinter.CTkFont(size=24, weight="bold")).pack(
+                padx=10, pady=(10, 0))
+            customtkinter.CTkLabel(card, text=label, text_color="#7f8c8d").pack(padx=10, pady=(0, 10))
+
+        if summary['fines_problem']:
+            problem_label = customtkinter.CTkLabel(self.table_area, text=summary['fines_problem'], text_color="#e67e22")
+            problem_label.pack(pady=(0, 5))
+
+        # Top-N lists side by side, labelled from the cached reference data when it is loaded
+        lists = customtkinter.CTkFrame(self.table_area, fg_color="transparent")
+        lists.pack(fill="both", expand=True, padx=10, pady=5)
+        debtors = [(member, describe("Members", member) or "", f"{amount:.2f}")
+                   for member, amount in summary['top_debtors']]
+        books = [(book, describe("Books", book) or "", loans) for book, loans in summary['top_books']]
+        for i, (title, columns, rows) in enumerate([
+            ("Most fines outstanding", ["MemberID", "Member", "Outstanding"], debtors),
+            ("Most borrowed books", ["BookID", "Title", "Loans"], books),
+        ]):
+            column = customtkinter.CTkFrame(lists, fg_color="transparent")
+            column.grid(row=0, column=i, padx=5, sticky="nsew")
+            lists.grid_columnconfigure(i, weight=1)
+            lists.grid_rowconfigure(0, weight=1)
+            customtkinter.CTkLabel(column, text=title, font=customtkinter.CTkFont(size=14, weight="bold")).pack(
+                anchor="w", pady=(0, 5))
+            create_table_display(column, rows, columns)
+    #endregion
+
+    #region CRUD OPERATIONS
+    def _create_form_window(self, title):
+        """Opens a form window with a title and a scrollable area for fields."""
+        window = customtkinter.CTkToplevel(self)
+        window.title(title)
+        window.geometry("500x600")
 
         # Create main container frame with padding
-        main_frame = customtkinter.CTkFrame(form_window)
+        main_frame = customtkinter.CTkFrame(window)
         main_frame.pack(fill="both", expand=True, padx=20, pady=20)
 
         # Title
         title_label = customtkinter.CTkLabel(
             main_frame,
-            text=f"Insert New {self.current_table}",
+            text=title,
             font=customtkinter.CTkFont(size=20, weight="bold")
         )
         title_label.pack(pady=(0, 20))
@@ -220,33 +784,51 @@ class LibraryApp(customtkinter.CTk):
             scroll_frame.bind('<MouseWheel>', lambda e: scroll_frame._parent_canvas.yview_scroll(-int(e.delta), "units"))
         else:  # Windows and Linux
             scroll_frame.bind_all("<MouseWheel>", lambda e: scroll_frame._parent_canvas.yview_scroll(-int(e.delta/120), "units"))
-            form_window.bind("<Destroy>", lambda e: scroll_frame.unbind_all("<MouseWheel>"))
+            window.bind("<Destroy>", lambda e: scroll_frame.unbind_all("<MouseWheel>"))
+
+        return window, main_frame, scroll_frame
+
+    def create_record(self):
+        """Opens a new form window for creating a record for the current table."""
+        if not self.current_table:
+            return
+
+        self.executor.submit(
+            get_table_schema,
+            self.current_table,
+            on_success=self._open_create_form,
+            on_error=lambda e: print(f"Failed to load table schema: {e}")
+        )
+
+    def _open_create_form(self, schema):
+        """Builds the insert form from the table's schema."""
+        form_window, main_frame, scroll_frame = self._create_form_window(f"Insert New {schema.name}")
 
-        columns, _ = fetch_all_data(self.current_table)
         entry_widgets = {}
 
         # Create form fields
-        for column in columns:
+        for column in schema.columns:
             # Container for each field
             field_frame = customtkinter.CTkFrame(scroll_frame, fg_color="transparent")
             field_frame.pack(fill="x", pady=5)
 
             label = customtkinter.CTkLabel(
                 field_frame,
-                text=column,
+                text=self._field_label(schema, column),
                 font=customtkinter.CTkFont(size=12)
             )
             label.pack(side="top", anchor="w", padx=5)
 
             entry = customtkinter.CTkEntry(field_frame, width=400)
             entry.pack(side="top", fill="x", padx=5)
+            self._add_reference_picker(entry, schema, column)
             entry_widgets[column] = entry
 
         # Submit button
         submit_btn = customtkinter.CTkButton(
             main_frame,
             text="Insert Record",
-            command=lambda: self.submit_create_form(entry_widgets, form_window),
+            command=lambda: self.submit_create_form(entry_widgets, form_window, schema),
             fg_color="#27ae60",
             hover_color="#2ecc71",
             height=40
@@ -258,49 +840,50 @@ class LibraryApp(customtkinter.CTk):
         if not self.current_table:
             return
 
-        selected_record = self.get_selected_record()
-        if not selected_record:
+        selected_records = self.get_selected_records()
+        if not selected_records:
+            print("Please select a record first.")
             return
 
-        update_window = customtkinter.CTkToplevel(self)
-        update_window.title(f"Update {self.current_table}")
-        update_window.geometry("500x600")
-
-        # Create main container frame with padding
-        main_frame = customtkinter.CTkFrame(update_window)
-        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        if len(selected_records) > 1:
+            open_form = lambda schema: self._open_bulk_update_form(schema, selected_records)
+        else:
+            open_form = lambda schema: self._open_update_form(schema, selected_records[0])
 
-        # Title
-        title_label = customtkinter.CTkLabel(
-            main_frame,
-            text=f"Update {self.current_table}",
-            font=customtkinter.CTkFont(size=20, weight="bold")
+        self.executor.submit(
+            get_table_schema,
+            self.current_table,
+            on_success=open_form,
+            on_error=lambda e: print(f"Failed to load table schema: {e}")
         )
-        title_label.pack(pady=(0, 20))
 
-        # Create scrollable frame
-        scroll_frame = customtkinter.CTkScrollableFrame(main_frame)
-        scroll_frame.pack(fill="both", expand=True)
+    def _add_reference_picker(self, entry, schema, column):
+        """Gives a foreign key field an autocomplete list of the rows it can reference."""
+        ref_table = schema.foreign_keys.get(column, (None,))[0]
+        if ref_table not in REFERENCE_TABLES:
+            return
+        hint = attach_autocomplete(entry, lambda text: suggest(ref_table, text), run_async=self._run_picker_query)
+        hint.configure(text=describe(ref_table, schema.typed_value(column, entry.get())) or "")
 
-        # Bind mouse wheel event for scrolling (platform-specific)
-        if sys.platform.startswith('darwin'):  # macOS
-            scroll_frame.bind('<MouseWheel>', lambda e: scroll_frame._parent_canvas.yview_scroll(-int(e.delta), "units"))
-        else:  # Windows and Linux
-            scroll_frame.bind_all("<MouseWheel>", lambda e: scroll_frame._parent_canvas.yview_scroll(-int(e.delta/120), "units"))
-            update_window.bind("<Destroy>", lambda e: scroll_frame.unbind_all("<MouseWheel>"))
+    def _run_picker_query(self, func, on_success, on_error):
+        """Runs a picker lookup in the background; a newer keystroke's lookup replaces it."""
+        self.executor.submit(func, channel="picker", on_success=on_success, on_error=on_error)
+
+    def _open_update_form(self, schema, selected_record):
+        """Builds the update form from the table's schema, prefilled with the selected row."""
+        update_window, main_frame, scroll_frame = self._create_form_window(f"Update {schema.name}")
 
-        columns, _ = fetch_all_data(self.current_table)
         form_entries = {}
 
         # Create form fields
-        for i, column in enumerate(columns):
+        for i, column in enumerate(schema.columns):
             # Container for each field
             field_frame = customtkinter.CTkFrame(scroll_frame, fg_color="transparent")
             field_frame.pack(fill="x", pady=5)
 
             label = customtkinter.CTkLabel(
                 field_frame,
-                text=column,
+                text=self._field_label(schema, column),
                 font=customtkinter.CTkFont(size=12)
             )
             label.pack(side="top", anchor="w", padx=5)
@@ -308,13 +891,63 @@ class LibraryApp(customtkinter.CTk):
             entry = customtkinter.CTkEntry(field_frame, width=400)
             entry.insert(0, selected_record[i])
             entry.pack(side="top", fill="x", padx=5)
+            self._add_reference_picker(entry, schema, column)
             form_entries[column] = entry
 
         # Submit button
         submit_btn = customtkinter.CTkButton(
             main_frame,
             text="Update Record",
-            command=lambda: self.submit_update_form(form_entries, update_window),
+            command=lambda: self.submit_update_form(form_entries, update_window, schema, selected_record),
+            fg_color="#f39c12",
+            hover_color="#f1c40f",
+            height=40
+        )
+        submit_btn.pack(pady=20)
+
+    def _open_bulk_update_form(self, schema, selected_records):
+        """Builds a form that sets the same values on every selected row."""
+        if len(schema.key_columns) > 1:
+            # Bulk updates match rows on a single key column, which would catch other rows here
+            messagebox.showwarning(
+                "Update Records", f"{schema.name} has a composite key; update its records one at a time.")
+            return
+        title = f"Update {len(selected_records)} {schema.name} Records"
+        update_window, main_frame, scroll_frame = self._create_form_window(title)
+
+        hint_label = customtkinter.CTkLabel(
+            scroll_frame,
+            text="Only fields you fill in are changed; empty fields are left as they are.",
+            text_color="#7f8c8d",
+            wraplength=400
+        )
+        hint_label.pack(anchor="w", padx=5, pady=(0, 10))
+
+        form_entries = {}
+
+        # Create form fields for every column except the key
+        for column in schema.columns:
+            if column in schema.key_columns:
+                continue
+            field_frame = customtkinter.CTkFrame(scroll_frame, fg_color="transparent")
+            field_frame.pack(fill="x", pady=5)
+
+            label = customtkinter.CTkLabel(
+                field_frame,
+                text=self._field_label(schema, column),
+                font=customtkinter.CTkFont(size=12)
+            )
+            label.pack(side="top", anchor="w", padx=5)
+
+            entry = customtkinter.CTkEntry(field_frame, width=400, placeholder_text="(unchanged)")
+            entry.pack(side="top", fill="x", padx=5)
+            self._add_reference_picker(entry, schema, column)
+            form_entries[column] = entry
+
+        submit_btn = customtkinter.CTkButton(
+            main_frame,
+            text=f"Update {len(selected_records)} Records",
+            command=lambda: self.submit_bulk_update_form(form_entries, update_window, schema, selected_records),
             fg_color="#f39c12",
             hover_color="#f1c40f",
             height=40
@@ -327,40 +960,73 @@ class LibraryApp(customtkinter.CTk):
             print("No table selected.")
             return
 
-        selected_record = self.get_selected_record()
-        if not selected_record:
+        selected_records = self.get_selected_records()
+        if not selected_records:
             print("No record selected for deletion.")
             return
 
-        try:
-            # Get the columns for the current table
-            columns, _ = fetch_all_data(self.current_table)
-            # Use the first column as the primary key
-            primary_key_column = columns[0]
-            primary_key_value = selected_record[0]
-            
-            # Create the WHERE clause using the actual column name
-            condition = f"{primary_key_column} = {primary_key_value}"
-            
-            # Perform the deletion
-            delete_data(self.current_table, condition)
-            self.switch_table(self.current_table)
-            print("Record deleted successfully!")
-            
-        except Exception as e:
-            print(f"Failed to delete record: {e}")
-
-    def submit_create_form(self, entry_widgets, form_window):
+        table_name = self.current_table
+        if len(selected_records) > 1 and not messagebox.askyesno(
+                "Delete Records", f"Delete {len(selected_records)} records from {table_name}?"):
+            return
+
+        def delete():
+            # Match rows on their real primary key, with the key values bound
+            schema = get_table_schema(table_name)
+            if len(selected_records) == 1:
+                key_values = schema.key_values(selected_records[0])
+                delete_data(table_name, schema.key_predicate(selected_records[0]))
+                return key_values[:1]
+
+            if len(schema.key_columns) > 1:
+                # Chunked IN (...) matches one key column; on a composite key that would hit other rows too
+                raise ValueError(f"{table_name} has a composite key; delete its records one at a time.")
+            # Many rows go out as a few chunked DELETE ... IN (...) statements in one transaction
+            keys = [schema.key_values(record)[0] for record in selected_records]
+            delete_many(table_name, schema.key_column, keys)
+            return keys
+
+        def on_success(keys):
+            for key in keys:
+                unindex_row(table_name, key)
+            print(f"{len(keys)} record(s) deleted successfully!")
+            self.refresh_rows(table_name, keys, deleted=True)
+
+        self.executor.submit(
+            delete,
+            on_success=on_success,
+            on_error=lambda e: print(f"Failed to delete record: {e}")
+        )
+
+    def submit_create_form(self, entry_widgets, form_window, schema):
         """Handles form submission and data insertion."""
-        try:
-            values = [entry.get().strip() for entry in entry_widgets.values()]
+        table_name = schema.name
+        values = [entry.get().strip() for entry in entry_widgets.values()]
+
+        if any(value == "" for value in values):
+            self._show_create_error(form_window, ValueError("All fields must be filled."))
+            return
 
-            if any(value == "" for value in values):
-                raise ValueError("All fields must be filled.")
+        # Form text becomes typed values once, here, for the insert, the search index and the view
+        values = schema.typed_row(values)
+        key_value = values[schema.columns.index(schema.key_column)]
 
-            # Insert the data
-            insert_data(self.current_table, values)
-            
+        def insert():
+            # Unknown foreign keys are caught locally instead of by a failed INSERT
+            validate_foreign_keys(schema, dict(zip(entry_widgets, values)))
+            insert_data(table_name, values)
+
+        # Insert the data in the background
+        self.executor.submit(
+            insert,
+            on_success=lambda _: self._on_record_created(table_name, form_window, values, key_value),
+            on_error=lambda e: self._show_create_error(form_window, e)
+        )
+
+    def _on_record_created(self, table_name, form_window, values, key_value):
+        """Confirms a successful insert and refreshes the table."""
+        index_row(table_name, values)
+        if form_window.winfo_exists():
             # Show success message
             success_frame = customtkinter.CTkFrame(form_window)
             success_frame.pack(fill="x", padx=10, pady=5)
@@ -371,48 +1037,97 @@ class LibraryApp(customtkinter.CTk):
             )
             success_label.pack()
             form_window.after(1500, form_window.destroy)
-            self.switch_table(self.current_table)
-
-        except Exception as e:
-            # Show error in a contained frame
-            error_msg = str(e)
-            if "foreign key constraint fails" in error_msg.lower():
-                if "authorid" in error_msg.lower():
-                    error_msg = "Error: The specified AuthorID does not exist in the Authors table."
-                elif "genreid" in error_msg.lower():
-                    error_msg = "Error: The specified GenreID does not exist in the Genres table."
-                elif "publisherid" in error_msg.lower():
-                    error_msg = "Error: The specified PublisherID does not exist in the Publishers table."
-            
-            # Show error in a contained frame
-            error_frame = customtkinter.CTkFrame(form_window)
-            error_frame.pack(fill="x", padx=10, pady=5)
-            error_label = customtkinter.CTkLabel(
-                error_frame,
-                text=error_msg,
-                text_color="red",
-                wraplength=350
-            )
-            error_label.pack(pady=5)
+        self.refresh_row(table_name, key_value)
 
-    def submit_update_form(self, form_entries, window):
+    def _show_create_error(self, form_window, e):
+        """Shows why an insert failed inside the create form."""
+        if not form_window.winfo_exists():
+            return
+
+        error_msg = str(e)
+        if "foreign key constraint fails" in error_msg.lower():
+            if "authorid" in error_msg.lower():
+                error_msg = "Error: The specified AuthorID does not exist in the Authors table."
+            elif "genreid" in error_msg.lower():
+                error_msg = "Error: The specified GenreID does not exist in the Genres table."
+            elif "publisherid" in error_msg.lower():
+                error_msg = "Error: The specified PublisherID does not exist in the Publishers table."
+
+        # Show error in a contained frame
+        error_frame = customtkinter.CTkFrame(form_window)
+        error_frame.pack(fill="x", padx=10, pady=5)
+        error_label = customtkinter.CTkLabel(
+            error_frame,
+            text=error_msg,
+            text_color="red",
+            wraplength=350
+        )
+        error_label.pack(pady=5)
+
+    def submit_update_form(self, form_entries, window, schema, original_record):
         """Submits the updated data to the database."""
-        try:
-            values = [entry.get() for entry in form_entries.values()]
-            
-            # Get the first column name (assuming it's the primary key)
-            primary_key_column = list(form_entries.keys())[0]
-            primary_key_value = values[0]
-            
-            # Create the WHERE clause using the actual column name
-            condition = f"{primary_key_column} = {primary_key_value}"
-            
-            # Remove the primary key from the columns to update
-            columns = list(form_entries.keys())[1:]
-            
-            # Update with all values except the primary key
-            update_data(self.current_table, columns, values[1:], condition)
-            
+        table_name = schema.name
+
+        # Match the row on the key it had when the form was opened
+        where = schema.key_predicate(original_record)
+
+        # Update every column except the primary key
+        columns = [column for column in form_entries if column not in schema.key_columns]
+        values = [schema.typed_value(column, form_entries[column].get()) for column in columns]
+        updated_record = schema.typed_row([
+            original_record[i] if column in schema.key_columns else form_entries[column].get()
+            for i, column in enumerate(schema.columns)
+        ])
+
+        def update():
+            validate_foreign_keys(schema, dict(zip(columns, values)))
+            update_data(table_name, columns, values, where)
+
+        self.executor.submit(
+            update,
+            on_success=lambda _: self._on_record_updated(
+                table_name, window, updated_record, schema.columns.index(schema.key_column)
+            ),
+            on_error=lambda e: self._show_update_error(window, e)
+        )
+
+    def submit_bulk_update_form(self, form_entries, window, schema, selected_records):
+        """Applies the filled-in values to every selected row in one transaction."""
+        table_name = schema.name
+        changes = {column: schema.typed_value(column, entry.get())
+                   for column, entry in form_entries.items() if entry.get().strip() != ""}
+        if not changes:
+            self.show_error_message(window, "Enter at least one value to change.")
+            return
+
+        keys = [schema.key_values(record)[0] for record in selected_records]
+
+        def update():
+            validate_foreign_keys(schema, changes)
+            update_by_keys(table_name, list(changes), list(changes.values()), schema.key_column, keys)
+            # Read the rows back so the view and search index show exactly what was stored
+            return fetch_rows(table_name, schema.key_column, keys)
+
+        def on_success(rows):
+            key_index = schema.columns.index(schema.key_column)
+            for row in rows:
+                index_row(table_name, row)
+            if window.winfo_exists():
+                success_label = customtkinter.CTkLabel(
+                    window,
+                    text=f"{len(rows)} records updated successfully!",
+                    text_color="green"
+                )
+                success_label.pack(pady=5)
+                window.after(1500, window.destroy)
+            self.refresh_rows(table_name, keys, rows=rows, key_index=key_index)
+
+        self.executor.submit(update, on_success=on_success, on_error=lambda e: self._show_update_error(window, e))
+
+    def _on_record_updated(self, table_name, window, updated_record, schema_key_index):
+        """Confirms a successful update and refreshes the table."""
+        index_row(table_name, updated_record)
+        if window.winfo_exists():
             # Show success message
             success_frame = customtkinter.CTkFrame(window)
             success_frame.pack(fill="x", padx=20, pady=5)
@@ -422,11 +1137,13 @@ class LibraryApp(customtkinter.CTk):
                 text_color="green"
             )
             success_label.pack(pady=5)
-            
+
             window.after(1500, window.destroy)
-            self.switch_table(self.current_table)
-            
-        except Exception as e:
+        self.refresh_row(table_name, updated_record[schema_key_index])
+
+    def _show_update_error(self, window, e):
+        """Shows why an update failed inside the update form."""
+        if window.winfo_exists():
             # Show error message
             error_frame = customtkinter.CTkFrame(window)
             error_frame.pack(fill="x", padx=20, pady=5)
@@ -439,46 +1156,333 @@ class LibraryApp(customtkinter.CTk):
             error_label.pack(pady=5)
     #endregion
 
+    #region IMPORT / EXPORT
+    def import_records(self):
+        """Imports a CSV file into the current table in the background, showing progress."""
+        if not self.current_table:
+            return
+
+        path = filedialog.askopenfilename(
+            title=f"Import CSV into {self.current_table}",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+
+        table_name = self.current_table
+        progress_window, status_label, error_box = create_progress_window(self, f"Importing into {table_name}")
+
+        # The import thread only writes this; the Tk thread polls it
+        latest = {"text": "Starting import...", "done": False}
+
+        def on_progress(report):
+            latest["text"] = (f"{report.rows_read} rows read, {report.rows_inserted} imported, "
+                              f"{len(report.errors)} errors ({report.rows_per_second:.0f} rows/s)")
+
+        def refresh_progress():
+            if progress_window.winfo_exists() and not latest["done"]:
+                status_label.configure(text=latest["text"])
+                progress_window.after(200, refresh_progress)
+
+        def on_success(report):
+            latest["done"] = True
+            drop_index(table_name)
+            if progress_window.winfo_exists():
+                progress_window.progress_bar.set(1)
+                status_label.configure(text=report.summary(), text_color="green" if not report.errors else "orange")
+                for line_number, message in report.errors[:200]:
+                    error_box.insert("end", f"Line {line_number}: {message}\n")
+                if len(report.errors) > 200:
+                    error_box.insert("end", f"... and {len(report.errors) - 200} more\n")
+            if self.current_table == table_name:
+                self.load_table(table_name)
+
+        def on_error(e):
+            latest["done"] = True
+            if progress_window.winfo_exists():
+                status_label.configure(text=f"Import failed: {e}", text_color="red")
+
+        self.executor.submit(import_csv, table_name, path, progress=on_progress,
+                             on_success=on_success, on_error=on_error)
+        refresh_progress()
+
+    def export_records(self):
+        """Exports the current table to CSV or JSON Lines in the background, showing progress."""
+        if not self.current_table:
+            return
+
+        table_name = self.current_table
+        path = filedialog.asksaveasfilename(
+            title=f"Export {table_name}",
+            initialfile=f"{table_name}.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines", "*.jsonl")]
+        )
+        if not path:
+            return
+
+        progress_window, status_label, details_box = create_progress_window(self, f"Exporting {table_name}")
+        cancel_event = threading.Event()
+        cancel_btn = customtkinter.CTkButton(progress_window, text="Cancel", command=cancel_event.set)
+        cancel_btn.pack(pady=(0, 15))
+        # Closing the window also stops the export
+        progress_window.bind("<Destroy>", lambda e: cancel_event.set() if e.widget is progress_window else None)
+
+        # The export thread only writes this; the Tk thread polls it
+        latest = {"text": "Starting export...", "fraction": None, "done": False}
+
+        def on_progress(report):
+            latest["text"] = f"{report.rows_written} rows written ({report.elapsed:.1f}s)"
+            latest["fraction"] = report.fraction_done
+
+        def refresh_progress():
+            if progress_window.winfo_exists() and not latest["done"]:
+                status_label.configure(text=latest["text"])
+                if latest["fraction"] is not None:
+                    progress_window.progress_bar.set(latest["fraction"])
+                progress_window.after(200, refresh_progress)
+
+        def on_success(report):
+            latest["done"] = True
+            if progress_window.winfo_exists():
+                progress_window.progress_bar.set(1)
+                status_label.configure(text=report.summary(), text_color="green")
+                cancel_btn.configure(text="Close", command=progress_window.destroy)
+
+        def on_error(e):
+            latest["done"] = True
+            if progress_window.winfo_exists():
+                text = "Export cancelled." if isinstance(e, ExportCancelled) else f"Export failed: {e}"
+                status_label.configure(text=text, text_color="red")
+                cancel_btn.configure(text="Close", command=progress_window.destroy)
+
+        self.executor.submit(export_table, table_name, path, progress=on_progress, cancel_event=cancel_event,
+                             on_success=on_success, on_error=on_error)
+        refresh_progress()
+    #endregion
+
+    #region STATS
+    def show_stats_panel(self):
+        """Opens a window listing timing stats per operation and memory per table, refreshed every second."""
+        stats_window = customtkinter.CTkToplevel(self)
+        stats_window.title("Performance Stats")
+        stats_window.geometry("900x500")
+
+        stats_box = customtkinter.CTkTextbox(stats_window, font=customtkinter.CTkFont(family="Courier", size=12))
+        stats_box.pack(fill="both", expand=True, padx=10, pady=10)
+
+        def dump():
+            path = filedialog.asksaveasfilename(
+                title="Save Metrics",
+                initialfile="libman_metrics.json",
+                defaultextension=".json",
+                filetypes=[("JSON files", "*.json")]
+            )
+            if path:
+                dump_metrics(path)
+
+        dump_btn = customtkinter.CTkButton(stats_window, text="Save as JSON", command=dump)
+        dump_btn.pack(pady=(0, 10))
+
+        def refresh():
+            if not stats_window.winfo_exists():
+                return
+            lines = [f"{'operation':<32}{'count':>7}{'avg ms':>10}{'p50':>8}{'p95':>8}{'max ms':>10}"
+                     f"{'slow':>6}{'rows':>10}{'bytes':>12}"]
+            for name, stats in get_metrics().items():
+                lines.append(f"{name:<32}{stats['count']:>7}{stats['avg_ms']:>10.2f}{stats['p50_ms']:>8g}"
+                             f"{stats['p95_ms']:>8g}{stats['max_ms']:>10.2f}{stats['slow']:>6}"
+                             f"{stats['rows']:>10}{stats['bytes']:>12}")
+
+            # Reads answered without a query of their own
+            cache, flights = cache_stats(), coalescing_stats()
+            lines += ["", f"result cache: {cache['hits']} hits, {cache['misses']} misses, "
+                          f"{cache['entries']} entries, {cache['bytes']} bytes",
+                      f"shared reads: {flights['shared']} queries saved, {flights['executed']} run, "
+                      f"{flights['in_flight']} in flight"]
+
+            # Whole tables held in memory (cache, search indexes) in columnar form
+            memory = memory_by_table()
+            if memory:
+                lines += ["", f"{'table in memory':<32}{'results':>9}{'rows':>10}{'bytes':>14}"]
+                for table, (results, rows, size) in memory.items():
+                    lines.append(f"{table:<32}{results:>9}{rows:>10}{size:>14}")
+            stats_box.delete("1.0", "end")
+            stats_box.insert("end", "\n".join(lines))
+            stats_window.after(1000, refresh)
+
+        refresh()
+    #endregion
+
     #region UTILITY METHODS
     def get_selected_record(self):
         """Retrieves the currently selected record from the Treeview table."""
-        for widget in self.main_frame.winfo_children():
-            if isinstance(widget, customtkinter.CTkFrame):
-                for child in widget.winfo_children():
-                    if isinstance(child, ttk.Treeview):
-                        selected_items = child.selection()
-                        if selected_items:
-                            return child.item(selected_items[0], "values")
+        selected_records = self.get_selected_records()
+        if selected_records:
+            return selected_records[0]
         
         # If we get here, either no selection was made or no table exists
         print("Please select a record first.")
         return None
 
-    def search_records(self, search_term):
-        """Filter table data based on search term"""
-        if not self.current_table or not search_term:
+    def get_selected_records(self):
+        """Retrieves every selected record from the Treeview table, in display order."""
+        tree = self._find_treeview(self.main_frame)
+        if tree is None:
+            return []
+        return [tree.item(item, "values") for item in tree.selection()]
+
+    def _find_treeview(self, widget):
+        """Finds the Treeview nested anywhere inside a widget."""
+        for child in widget.winfo_children():
+            if isinstance(child, ttk.Treeview):
+                return child
+            tree = self._find_treeview(child)
+            if tree is not None:
+                return tree
+        return None
+
+    def search_records(self, search_term, incremental=False):
+        """Searches the current table on the server and shows the matching rows."""
+        if not self.current_table:
             return
-        
-        columns, all_data = fetch_all_data(self.current_table)
-        
-        # Filter data based on search term (case-insensitive)
-        filtered_data = []
-        search_term = search_term.lower()
-        for record in all_data:
-            if any(str(value).lower().find(search_term) != -1 for value in record):
-                filtered_data.append(record)
-        
-        # Clear previous widgets
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
-        
-        # Create search bar
-        self.create_search_bar()
-        
+
+        self._cancel_pending_search()
+        search_term = search_term.strip()
+        if incremental and search_term == self._last_search_term:
+            return  # e.g. an arrow key was released; nothing to re-run
+        self._last_search_term = search_term
+
+        if not search_term:
+            self.search_status.configure(text="")
+            self.load_table(self.current_table)
+            return
+
+        table_name = self.current_table
+        self.executor.cancel("page")
+
+        # Small tables are answered from their in-memory index without a query
+        index = get_index(table_name)
+        if index is not None:
+            self.executor.cancel("table")
+            self.display_search_results(
+                index.columns, index.search(search_term, limit=SEARCH_LIMIT), index.key_index
+            )
+            return
+
+        if should_index(table_name):
+            # Expired; this search goes to SQL while a fresh index is built
+            self._build_search_index(table_name)
+
+        if not incremental:
+            self.show_loading(f"Searching {table_name}...")
+        self.search_status.configure(text="Searching...")
+
+        def search():
+            columns, rows = search_data(table_name, search_term)
+            return columns, rows, columns.index(get_table_schema(table_name).key_column)
+
+        # A newer search or table load on the same channel drops this one's result
+        self.executor.submit(
+            search,
+            channel="table",
+            on_success=lambda result: self.display_search_results(*result),
+            on_error=self._on_search_failed
+        )
+
+    def _on_search_failed(self, e):
+        self.search_status.configure(text="")
+        self.show_load_error(f"Search failed: {e}")
+
+    def display_search_results(self, columns, filtered_data, key_index=None):
+        """Shows the rows matched by a search."""
+        with span("ui.display_search_results", rows=len(filtered_data)):
+            self._display_search_results(columns, filtered_data, key_index)
+
+    def _display_search_results(self, columns, filtered_data, key_index):
+        self._clear_table_area()
+
+        if len(filtered_data) >= SEARCH_LIMIT:
+            self.search_status.configure(text=f"Showing the first {SEARCH_LIMIT} matches")
+        else:
+            self.search_status.configure(text=f"{len(filtered_data)} matches")
+
         # Display filtered results
         if filtered_data:
-            table_frame = create_table_display(self.main_frame, filtered_data, columns)
-            table_frame.pack(fill="both", expand=True)
+            self.table_frame = create_table_display(self.table_area, filtered_data, columns, key_index)
+            self.table_frame.pack(fill="both", expand=True)
+
+    def _apply_remote_changes(self, table_name, keys, rows, key_index):
+        """Patches rows the change watcher found were changed, added or deleted at another desk."""
+        if self.current_table != table_name:
+            return
+        found = set()
+        for row in rows:
+            index_row(table_name, row)
+            found.add(row[key_index])
+        for key in keys:
+            if key not in found:
+                unindex_row(table_name, key)
+        self.refresh_rows(table_name, keys, rows=rows, key_index=key_index)
+
+    def refresh_row(self, table_name, key, deleted=False):
+        """Patches just the written row in the visible table instead of reloading it all."""
+        self.refresh_rows(table_name, [key], deleted=deleted)
+
+    def refresh_rows(self, table_name, keys, deleted=False, rows=None, key_index=None):
+        """Patches just the written rows in the visible table instead of reloading it all.
+
+        Rows already read back by the caller can be passed in with their key
+        index; otherwise they are fetched by key in the background.
+        """
+        if self.current_table != table_name:
+            return
+        if self.table_frame is None:
+            # Nothing displayed yet (e.g. the table was empty), so a full load is cheap
+            self.load_table(table_name)
+            return
+
+        table_frame = self.table_frame
+        if deleted:
+            for key in keys:
+                remove_table_row(table_frame, key)
+            return
+
+        def patch(key_index, rows):
+            if self.table_frame is not table_frame:
+                return  # The view was replaced while the rows were loading
+            with span("ui.patch_rows", rows=len(rows)):
+                found = set()
+                for row in rows:
+                    upsert_table_row(table_frame, row, key_index)
+                    found.add(str(row[key_index]))
+                for key in keys:
+                    if str(key) not in found:
+                        remove_table_row(table_frame, key)
+
+        if rows is not None:
+            patch(key_index, rows)
+            return
+
+        def fetch():
+            schema = get_table_schema(table_name)
+            return schema.columns.index(schema.key_column), fetch_rows(table_name, schema.key_column, keys)
+
+        self.executor.submit(
+            fetch,
+            on_success=lambda result: patch(*result),
+            on_error=lambda e: print(f"Failed to refresh rows: {e}")
+        )
+
+    @staticmethod
+    def _field_label(schema, column):
+        """Form label for a column, noting keys and referenced tables."""
+        if column in schema.primary_key:
+            return f"{column} (primary key)"
+        if column in schema.foreign_keys:
+            ref_table, ref_column = schema.foreign_keys[column]
+            return f"{column} (references {ref_table}.{ref_column})"
+        return column
 
     def show_error_message(self, window, message):
         """Displays an error message in the form window"""
@@ -495,4 +1499,10 @@ class LibraryApp(customtkinter.CTk):
         
         # Auto-dismiss after 3 seconds
         window.after(3000, error_frame.destroy)
+
+    def on_close(self):
+        """Stops background work and closes the window."""
+        self.watcher.stop()
+        self.executor.shutdown()
+        self.destroy()
     #endregion
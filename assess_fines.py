@@ -0,0 +1,202 @@
+"""Assesses fines for overdue loans in bulk, without starting the GUI.
+
+Run from the repository root:
+
+    python assess_fines.py                      # fines as of today
+    python assess_fines.py --as-of 2024-06-30 --chunk-size 20000
+
+Every loan that is still out past its due date (plus GRACE_DAYS) gets one
+fine of FINE_PER_DAY per overdue day, capped at MAX_FINE. Loans are handled
+in LoanID ranges, each with one INSERT ... SELECT for loans that have no fine
+yet and one UPDATE that raises the unpaid fines of loans still out to the
+amount as of the run date, committed as its own transaction.
+
+Running the job again for the same date changes nothing, so an interrupted
+run can simply be started again; --start-after skips the LoanID ranges an
+earlier run reported as committed. Needs MySQL (DATEDIFF, multi-table UPDATE).
+"""
+import argparse
+import datetime
+import decimal
+import sys
+import time
+
+from circulation import (FINE_AMOUNT_COLUMN, FINE_DATE_COLUMN, FINE_KEY_COLUMN, FINE_LOAN_COLUMN,
+                         FINE_MEMBER_COLUMN, FINE_PAID_COLUMN, FINES_TABLE, LOAN_DUE_COLUMN, LOAN_KEY_COLUMN,
+                         LOAN_MEMBER_COLUMN, LOAN_RETURN_COLUMN, LOANS_TABLE)
+from db_connection import DB_CONFIG, driver, pooled_connection
+from schema_catalog import get_table_schema
+
+# Fine rules
+FINE_PER_DAY = decimal.Decimal('0.25')
+MAX_FINE = decimal.Decimal('20.00')
+GRACE_DAYS = 0
+
+# LoanID values covered per transaction
+DEFAULT_CHUNK_SIZE = 50000
+
+_AMOUNT = f"LEAST(%s, (DATEDIFF(%s, l.{LOAN_DUE_COLUMN}) - %s) * %s)"
+
+_OVERDUE = (f"l.{LOAN_KEY_COLUMN} BETWEEN %s AND %s "
+            f"AND l.{LOAN_RETURN_COLUMN} IS NULL AND l.{LOAN_DUE_COLUMN} < %s")
+
+_INSERT_FINES = f"""
+    INSERT INTO {FINES_TABLE} ({FINE_LOAN_COLUMN}, {FINE_MEMBER_COLUMN}, {FINE_AMOUNT_COLUMN}, {FINE_DATE_COLUMN})
+    SELECT l.{LOAN_KEY_COLUMN}, l.{LOAN_MEMBER_COLUMN}, {_AMOUNT}, %s
+    FROM {LOANS_TABLE} l
+    WHERE {_OVERDUE}
+      AND NOT EXISTS (SELECT 1 FROM {FINES_TABLE} f WHERE f.{FINE_LOAN_COLUMN} = l.{LOAN_KEY_COLUMN})
+"""
+
+_UPDATE_FINES = f"""
+    UPDATE {FINES_TABLE} f JOIN {LOANS_TABLE} l ON l.{LOAN_KEY_COLUMN} = f.{FINE_LOAN_COLUMN}
+    SET f.{FINE_AMOUNT_COLUMN} = {_AMOUNT}
+    WHERE {_OVERDUE}
+      AND f.{FINE_PAID_COLUMN} IS NULL
+      AND f.{FINE_AMOUNT_COLUMN} <> {_AMOUNT}
+"""
+
+_OVERDUE_RANGE = f"""
+    SELECT MIN({LOAN_KEY_COLUMN}), MAX({LOAN_KEY_COLUMN}), COUNT(*)
+    FROM {LOANS_TABLE}
+    WHERE {LOAN_RETURN_COLUMN} IS NULL AND {LOAN_DUE_COLUMN} < %s AND {LOAN_KEY_COLUMN} > %s
+"""
+
+
+class AssessmentReport:
+    """Running totals for one assessment, passed to the progress callback after every chunk."""
+
+    def __init__(self, as_of):
+        self.as_of = as_of
+        self.overdue_loans = 0      # Overdue loans in the ranges this run covers
+        self.fines_created = 0
+        self.fines_updated = 0
+        self.last_key = None        # Highest LoanID whose range is committed
+        self.high_key = None        # Highest LoanID this run will reach
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_written(self):
+        return self.fines_created + self.fines_updated
+
+    @property
+    def rows_per_second(self):
+        """Overdue loans assessed per second, counting loans that needed no change."""
+        return self.overdue_loans / self.elapsed if self.finished and self.elapsed else 0.0
+
+    def summary(self):
+        return (f"Fines as of {self.as_of}: {self.overdue_loans} overdue loans, {self.fines_created} fines created, "
+                f"{self.fines_updated} raised in {self.elapsed:.1f}s ({self.rows_per_second:.0f} loans/s)")
+
+
+def _check_schema():
+    """Raises ValueError if Loans or Fines do not have the columns the job writes."""
+    loans = get_table_schema(LOANS_TABLE)
+    fines = get_table_schema(FINES_TABLE)
+    missing = [f"{LOANS_TABLE}.{column}" for column in
+               (LOAN_KEY_COLUMN, LOAN_MEMBER_COLUMN, LOAN_DUE_COLUMN, LOAN_RETURN_COLUMN)
+               if column not in loans.columns]
+    missing += [f"{FINES_TABLE}.{column}" for column in
+                (FINE_LOAN_COLUMN, FINE_MEMBER_COLUMN, FINE_AMOUNT_COLUMN, FINE_DATE_COLUMN, FINE_PAID_COLUMN)
+                if column not in fines.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}; set the names in circulation.py.")
+    if not loans.is_integer(LOAN_KEY_COLUMN):
+        raise ValueError(f"{LOANS_TABLE}.{LOAN_KEY_COLUMN} must be an integer to be processed in ranges.")
+    if FINE_KEY_COLUMN in fines.columns and FINE_KEY_COLUMN not in fines.auto_increment:
+        raise ValueError(f"{FINES_TABLE}.{FINE_KEY_COLUMN} must be AUTO_INCREMENT for fines to be inserted in bulk.")
+    if FINE_LOAN_COLUMN not in fines.indexed_columns:
+        # Without it every NOT EXISTS probe scans Fines
+        print(f"Warning: no index on {FINES_TABLE}.{FINE_LOAN_COLUMN}; the job will be slow.", file=sys.stderr)
+
+def assess_fines(as_of=None, chunk_size=DEFAULT_CHUNK_SIZE, start_after=None, progress=None):
+    """Creates or raises the fines of every overdue loan and returns an AssessmentReport.
+
+    `progress(report)` is called after every committed chunk.
+    """
+    as_of = as_of or datetime.date.today()
+    cutoff = as_of - datetime.timedelta(days=GRACE_DAYS)
+    report = AssessmentReport(as_of)
+    _check_schema()
+
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        # Served by an index on (ReturnDate, DueDate) where there is one
+        cursor.execute(_OVERDUE_RANGE, (cutoff, start_after if start_after is not None else -1))
+        low, high, report.overdue_loans = cursor.fetchone()
+        report.high_key = high
+        amount = (MAX_FINE, as_of, GRACE_DAYS, FINE_PER_DAY)
+
+        try:
+            while low is not None and low <= high:
+                chunk_high = min(low + chunk_size - 1, high)
+                overdue = (low, chunk_high, cutoff)
+                cursor.execute(_INSERT_FINES, amount + (as_of,) + overdue)
+                created = cursor.rowcount
+                cursor.execute(_UPDATE_FINES, amount + overdue + amount)
+                updated = cursor.rowcount
+                conn.commit()
+
+                report.fines_created += created
+                report.fines_updated += updated
+                report.last_key = chunk_high
+                if progress is not None:
+                    progress(report)
+                low = chunk_high + 1
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    report.finished = time.perf_counter()
+    if progress is not None:
+        progress(report)
+    return report
+
+def _print_progress(report):
+    if report.finished is None:
+        print(f"  committed through {LOAN_KEY_COLUMN} {report.last_key} of {report.high_key}: "
+              f"{report.fines_created} created, {report.fines_updated} raised", flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--as-of', type=datetime.date.fromisoformat, help="Assessment date, YYYY-MM-DD; default today")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"{LOAN_KEY_COLUMN} values per transaction")
+    parser.add_argument('--start-after', type=int, metavar=LOAN_KEY_COLUMN.upper(),
+                        help="Skip loans up to this key, e.g. the last one an interrupted run committed")
+    parser.add_argument('--database')
+    parser.add_argument('--host')
+    parser.add_argument('--user')
+    parser.add_argument('--password')
+    parser.add_argument('--quiet', action='store_true', help="Only print the summary")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    for option in ('database', 'host', 'user', 'password'):
+        if getattr(args, option) is not None:
+            DB_CONFIG[option] = getattr(args, option)
+
+    try:
+        report = assess_fines(args.as_of, args.chunk_size, args.start_after,
+                              progress=None if args.quiet else _print_progress)
+    except (KeyError, ValueError) as e:
+        print(f"Cannot assess fines: {e}", file=sys.stderr)
+        return 1
+    except driver().errors.Error as e:
+        # Chunks committed before the failure stay; re-running picks up the rest
+        print(f"Fine assessment stopped: {e}", file=sys.stderr)
+        return 1
+    print(report.summary())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
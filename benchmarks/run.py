@@ -0,0 +1,317 @@
+"""Benchmarks the data layer and table rendering against a seeded scratch database.
+
+Run from the repository root:
+
+    python -m benchmarks.run --scale 10k --scale 100k
+    python -m benchmarks.run --compare bench_results/old.json bench_results/new.json
+
+Results are written as JSON (one file per run) so runs from different commits
+can be compared. The scratch database lives on the server in DB_CONFIG, or the
+one given with --host/--user/--password; it is never the real LibraryDB.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from assess_fines import assess_fines
+from benchmarks.seed import SCALES, seed, use_database
+from crud_operations import (
+    coalescing_stats, delete_data, delete_many, fetch_all_data, fetch_page, insert_data, insert_many,
+    invalidate_cache, search_data, update_by_keys, update_data,
+)
+from db_connection import pooled_connection
+from search_index import build_index
+
+DEFAULT_DATABASE = 'LibraryDB_bench'
+DEFAULT_REPEAT = 5
+RESULTS_DIR = 'bench_results'
+
+# Rows written per write benchmark; single-row operations use fewer so a run stays short
+SINGLE_WRITES = 200
+BATCH_WRITES = 5000
+
+# Simultaneous identical reads in the coalescing benchmark
+CONCURRENT_READS = 8
+
+# Rows handed to create_table_display; a full 1M-row render would take minutes per run
+RENDER_ROWS = 10000
+
+SEARCH_TERMS = {
+    'Books': ['river', 'Garden of Light', '9780000012'],
+    'Members': ['Chen', 'member42'],
+    'Authors': ['Nakamura'],
+}
+
+
+def _measure(func, repeat, rows=None, setup=None):
+    """Runs func `repeat` times and summarizes the wall-clock timings."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    if rows is None and isinstance(result, tuple) and len(result) == 2 and hasattr(result[1], '__len__'):
+        rows = len(result[1])
+    median = statistics.median(timings)
+    entry = {
+        'runs': repeat,
+        'median_ms': round(median, 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3),
+    }
+    if rows is not None:
+        entry['rows'] = rows
+        entry['rows_per_s'] = round(rows / (median / 1000), 1) if median else None
+    return entry
+
+def bench_reads(results, scale, repeat):
+    for table in ('Books', 'Authors', 'Members', 'Loans'):
+        results[f'fetch_all_data.{table}.cold'] = _measure(
+            lambda: fetch_all_data(table), repeat, setup=invalidate_cache
+        )
+    results['fetch_all_data.Books.cached'] = _measure(lambda: fetch_all_data('Books'), repeat)
+    for table in ('Books', 'Loans'):
+        rows = fetch_all_data(table)[1]
+        results[f'fetch_all_data.{table}.memory'] = {'rows': len(rows), 'bytes': rows.nbytes()}
+
+    # Identical reads fired together, as rapid clicks do, should share one query
+    def concurrent_reads():
+        threads = [threading.Thread(target=fetch_all_data, args=('Books',)) for _ in range(CONCURRENT_READS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    shared_before = coalescing_stats()['shared']
+    results['fetch_all_data.Books.concurrent'] = _measure(concurrent_reads, repeat, setup=invalidate_cache)
+    results['fetch_all_data.Books.concurrent']['queries_saved'] = coalescing_stats()['shared'] - shared_before
+
+    last_loan = SCALES[scale]['Loans']
+    results['fetch_page.Loans.first'] = _measure(
+        lambda: fetch_page('Loans', 'LoanID'), repeat, setup=invalidate_cache
+    )
+    results['fetch_page.Loans.deep'] = _measure(
+        lambda: fetch_page('Loans', 'LoanID', after_key=last_loan - 500), repeat, setup=invalidate_cache
+    )
+
+def bench_search(results, repeat):
+    for table, terms in SEARCH_TERMS.items():
+        for term in terms:
+            results[f'search_data.{table}.{term}'] = _measure(
+                lambda: search_data(table, term), repeat, setup=invalidate_cache
+            )
+
+    # Small tables are searched through an in-memory index in the app instead
+    columns, rows = fetch_all_data('Authors')
+    results['search_index.Authors.build'] = _measure(lambda: build_index(columns, rows), repeat, rows=len(rows))
+    index = build_index(columns, rows)
+    results['search_index.Authors.query'] = _measure(lambda: index.search('Nakamura', limit=200), repeat)
+
+def bench_writes(results, scale, repeat):
+    """Times inserts, updates and deletes of scratch Members above the seeded ID range."""
+    columns = ['MemberID', 'FirstName', 'LastName', 'Email', 'Phone', 'MembershipDate']
+    first_id = SCALES[scale]['Members'] + 1
+    today = datetime.date.today()
+
+    def member(member_id):
+        return (member_id, 'Bench', 'Member', f"bench{member_id}@example.org", '555-0000000', today)
+
+    single_ids = list(range(first_id, first_id + SINGLE_WRITES))
+    batch_ids = list(range(first_id, first_id + BATCH_WRITES))
+
+    def cleanup():
+        delete_many('Members', 'MemberID', batch_ids)
+
+    def insert_singles():
+        for member_id in single_ids:
+            insert_data('Members', member(member_id))
+
+    def update_singles():
+        for member_id in single_ids:
+            update_data('Members', ['LastName'], ['Updated'], {'MemberID': member_id})
+
+    def delete_singles():
+        for member_id in single_ids:
+            delete_data('Members', {'MemberID': member_id})
+
+    def prepare_singles():
+        cleanup()
+        insert_many('Members', columns, [member(member_id) for member_id in single_ids])
+
+    def prepare_batch():
+        cleanup()
+        insert_many('Members', columns, [member(member_id) for member_id in batch_ids])
+
+    cleanup()
+    try:
+        results['insert_data.Members'] = _measure(insert_singles, repeat, rows=SINGLE_WRITES, setup=cleanup)
+        results['update_data.Members'] = _measure(update_singles, repeat, rows=SINGLE_WRITES, setup=prepare_singles)
+        results['delete_data.Members'] = _measure(delete_singles, repeat, rows=SINGLE_WRITES, setup=prepare_singles)
+        results['insert_many.Members'] = _measure(
+            lambda: insert_many('Members', columns, [member(member_id) for member_id in batch_ids]),
+            repeat, rows=BATCH_WRITES, setup=cleanup,
+        )
+        results['update_by_keys.Members'] = _measure(
+            lambda: update_by_keys('Members', ['LastName'], ['Updated'], 'MemberID', batch_ids),
+            repeat, rows=BATCH_WRITES, setup=prepare_batch,
+        )
+        results['delete_many.Members'] = _measure(
+            lambda: delete_many('Members', 'MemberID', batch_ids), repeat, rows=BATCH_WRITES, setup=prepare_batch,
+        )
+    finally:
+        cleanup()
+
+def bench_fines(results, repeat):
+    """Times fine assessment over every overdue loan from scratch, then an idempotent re-run."""
+    def clear_fines():
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM Fines")
+            conn.commit()
+            cursor.close()
+
+    overdue = assess_fines().overdue_loans
+    results['assess_fines.fresh'] = _measure(assess_fines, repeat, rows=overdue, setup=clear_fines)
+    results['assess_fines.rerun'] = _measure(assess_fines, repeat, rows=overdue)
+    clear_fines()
+
+def bench_render(results, repeat):
+    """Times building the Treeview in a withdrawn Tk root; needs an X server such as Xvfb."""
+    import tkinter as tk
+    from ui_components import create_paged_table_display, create_table_display
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        reason = f"no display available ({e}); run under xvfb-run to include render timings"
+        results['create_table_display.Books'] = {'skipped': reason}
+        return
+    root.withdraw()
+
+    try:
+        columns, rows = fetch_all_data('Books')
+        rows = rows[:RENDER_ROWS]
+
+        def render_full():
+            frame = create_table_display(root, rows, columns, key_index=0)
+            root.update_idletasks()
+            frame.destroy()
+
+        def render_paged():
+            first_page = rows[:200]
+            frame = create_paged_table_display(root, columns, lambda **keys: [], first_page, page_size=200)
+            root.update_idletasks()
+            frame.destroy()
+
+        results['create_table_display.Books'] = _measure(render_full, repeat, rows=len(rows))
+        results['create_paged_table_display.Books'] = _measure(render_paged, repeat, rows=min(len(rows), 200))
+    finally:
+        root.destroy()
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(scales, repeat, database, reseed=False, include_ui=True, **server):
+    use_database(database, **server)
+    report = {
+        'commit': _git_commit(),
+        'started': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'scales': {},
+    }
+    for scale in scales:
+        seed(scale, reseed=reseed)
+        results = {}
+        print(f"[{scale}] reads...")
+        bench_reads(results, scale, repeat)
+        print(f"[{scale}] search...")
+        bench_search(results, repeat)
+        print(f"[{scale}] writes...")
+        bench_writes(results, scale, repeat)
+        print(f"[{scale}] fines...")
+        bench_fines(results, repeat)
+        if include_ui:
+            print(f"[{scale}] render...")
+            bench_render(results, repeat)
+        report['scales'][scale] = results
+    return report
+
+def compare(old_path, new_path, threshold):
+    """Prints median changes between two result files; returns True if any regressed past threshold (%)."""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+
+    regressed = False
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    for scale, new_results in new['scales'].items():
+        old_results = old['scales'].get(scale, {})
+        for name, entry in new_results.items():
+            before = old_results.get(name, {}).get('median_ms')
+            after = entry.get('median_ms')
+            if before is None or after is None:
+                continue
+            change = (after - before) / before * 100 if before else 0.0
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                regressed = True
+            print(f"{scale:>5} {name:<45} {before:>10.2f} -> {after:>10.2f} ms  {change:+6.1f}%{flag}")
+    return regressed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', action='append', choices=sorted(SCALES), help="Repeatable; default 10k")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--database', default=os.environ.get('LIBMAN_BENCH_DB', DEFAULT_DATABASE))
+    parser.add_argument('--host')
+    parser.add_argument('--user')
+    parser.add_argument('--password')
+    parser.add_argument('--reseed', action='store_true', help="Regenerate the data even if it is already there")
+    parser.add_argument('--no-ui', action='store_true', help="Skip the Treeview render timings")
+    parser.add_argument('--output', help=f"Result file; default {RESULTS_DIR}/<timestamp>-<commit>.json")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="Compare two result files and exit")
+    parser.add_argument('--threshold', type=float, default=10.0, help="Regression threshold in percent for --compare")
+    args = parser.parse_args(argv)
+
+    if args.database == 'LibraryDB':
+        parser.error("refusing to benchmark against the live LibraryDB; pick a scratch database")
+
+    if args.compare:
+        return 1 if compare(*args.compare, args.threshold) else 0
+
+    report = run(
+        args.scale or ['10k'], args.repeat, args.database, reseed=args.reseed, include_ui=not args.no_ui,
+        host=args.host, user=args.user, password=args.password,
+    )
+    path = args.output
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(RESULTS_DIR, f"{stamp}-{report['commit'] or 'nogit'}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
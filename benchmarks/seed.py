@@ -0,0 +1,206 @@
+"""Creates and fills a scratch LibraryDB with synthetic data for benchmarking."""
+import datetime
+import random
+
+import mysql.connector
+
+from crud_operations import insert_many, invalidate_cache
+from db_connection import DB_CONFIG, close_pool, pooled_connection
+import schema_catalog
+
+# Rows per table at each scale; the scale name is the size of the Loans table
+SCALES = {
+    '10k': {'Authors': 1000, 'Genres': 40, 'Publishers': 200, 'Books': 5000, 'Members': 2000, 'Loans': 10000},
+    '100k': {'Authors': 10000, 'Genres': 40, 'Publishers': 1000, 'Books': 50000, 'Members': 20000, 'Loans': 100000},
+    '1m': {'Authors': 50000, 'Genres': 40, 'Publishers': 5000, 'Books': 500000, 'Members': 100000, 'Loans': 1000000},
+}
+
+SEED_BATCH_SIZE = 5000
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS Authors (
+        AuthorID INT PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        Nationality VARCHAR(50),
+        FULLTEXT INDEX ft_authors_name (Name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS Genres (
+        GenreID INT PRIMARY KEY,
+        Name VARCHAR(50) NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS Publishers (
+        PublisherID INT PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        Address VARCHAR(200)
+    )""",
+    """CREATE TABLE IF NOT EXISTS Books (
+        BookID INT PRIMARY KEY,
+        Title VARCHAR(200) NOT NULL,
+        AuthorID INT NOT NULL,
+        GenreID INT NOT NULL,
+        PublisherID INT NOT NULL,
+        ISBN VARCHAR(20),
+        PublishedYear INT,
+        CopiesAvailable INT NOT NULL DEFAULT 1,
+        FULLTEXT INDEX ft_books_title (Title),
+        INDEX idx_books_isbn (ISBN),
+        FOREIGN KEY (AuthorID) REFERENCES Authors(AuthorID),
+        FOREIGN KEY (GenreID) REFERENCES Genres(GenreID),
+        FOREIGN KEY (PublisherID) REFERENCES Publishers(PublisherID)
+    )""",
+    """CREATE TABLE IF NOT EXISTS Members (
+        MemberID INT PRIMARY KEY,
+        FirstName VARCHAR(50) NOT NULL,
+        LastName VARCHAR(50) NOT NULL,
+        Email VARCHAR(100),
+        Phone VARCHAR(20),
+        MembershipDate DATE,
+        INDEX idx_members_last_name (LastName),
+        INDEX idx_members_email (Email)
+    )""",
+    """CREATE TABLE IF NOT EXISTS Loans (
+        LoanID INT PRIMARY KEY,
+        BookID INT NOT NULL,
+        MemberID INT NOT NULL,
+        LoanDate DATE NOT NULL,
+        DueDate DATE NOT NULL,
+        ReturnDate DATE NULL,
+        INDEX idx_loans_due (DueDate),
+        INDEX idx_loans_active (ReturnDate, DueDate),
+        FOREIGN KEY (BookID) REFERENCES Books(BookID),
+        FOREIGN KEY (MemberID) REFERENCES Members(MemberID)
+    )""",
+    # Left empty by seed(); filled by assess_fines
+    """CREATE TABLE IF NOT EXISTS Fines (
+        FineID INT AUTO_INCREMENT PRIMARY KEY,
+        LoanID INT NOT NULL,
+        MemberID INT NOT NULL,
+        Amount DECIMAL(8, 2) NOT NULL,
+        FineDate DATE NOT NULL,
+        PaidDate DATE NULL,
+        UNIQUE INDEX uq_fines_loan (LoanID),
+        INDEX idx_fines_unpaid (PaidDate, MemberID),
+        FOREIGN KEY (LoanID) REFERENCES Loans(LoanID),
+        FOREIGN KEY (MemberID) REFERENCES Members(MemberID)
+    )""",
+]
+
+# Referencing tables first, so they can be emptied without violating foreign keys
+_DROP_ORDER = ['Fines', 'Loans', 'Books', 'Members', 'Publishers', 'Genres', 'Authors']
+
+_FIRST_NAMES = ['Ada', 'Ben', 'Chloe', 'Dmitri', 'Elena', 'Farah', 'George', 'Hana', 'Ivan', 'Jia',
+                'Kofi', 'Lena', 'Mateo', 'Nora', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sven', 'Tariq']
+_LAST_NAMES = ['Anders', 'Baker', 'Chen', 'Dubois', 'Evans', 'Fischer', 'Garcia', 'Haddad', 'Ito', 'Jones',
+               'Kumar', 'Larsen', 'Moreau', 'Nakamura', 'Okafor', 'Petrov', 'Rossi', 'Silva', 'Tanaka', 'Weber']
+_WORDS = ['river', 'shadow', 'garden', 'winter', 'empire', 'silent', 'glass', 'forgotten', 'city', 'ocean',
+          'letters', 'night', 'stone', 'fire', 'house', 'journey', 'secret', 'light', 'crown', 'harbor']
+_GENRES = ['Fiction', 'Mystery', 'Science Fiction', 'Fantasy', 'Biography', 'History', 'Poetry', 'Romance']
+_NATIONALITIES = ['British', 'American', 'French', 'German', 'Japanese', 'Nigerian', 'Indian', 'Brazilian']
+
+
+def use_database(name, host=None, user=None, password=None):
+    """Points the shared pool at the benchmark database, creating it if needed."""
+    for option, value in (('host', host), ('user', user), ('password', password)):
+        if value is not None:
+            DB_CONFIG[option] = value
+    server_config = {k: v for k, v in DB_CONFIG.items() if k != 'database'}
+    conn = mysql.connector.connect(**server_config)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {name}")
+    cursor.close()
+    conn.close()
+
+    DB_CONFIG['database'] = name
+    close_pool()
+    schema_catalog.invalidate()
+    invalidate_cache()
+
+def _row_generators(counts, rng):
+    """Yields (table, columns, row iterator) in foreign-key order."""
+    yield 'Authors', ['AuthorID', 'Name', 'Nationality'], (
+        (i, f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}", rng.choice(_NATIONALITIES))
+        for i in range(1, counts['Authors'] + 1)
+    )
+    yield 'Genres', ['GenreID', 'Name'], (
+        (i, f"{_GENRES[(i - 1) % len(_GENRES)]} {(i - 1) // len(_GENRES) + 1}")
+        for i in range(1, counts['Genres'] + 1)
+    )
+    yield 'Publishers', ['PublisherID', 'Name', 'Address'], (
+        (i, f"{rng.choice(_WORDS).title()} {rng.choice(['Press', 'Books', 'House'])} {i}", f"{i} {rng.choice(_WORDS).title()} St")
+        for i in range(1, counts['Publishers'] + 1)
+    )
+    yield 'Books', ['BookID', 'Title', 'AuthorID', 'GenreID', 'PublisherID', 'ISBN', 'PublishedYear', 'CopiesAvailable'], (
+        (i, f"The {rng.choice(_WORDS).title()} of {rng.choice(_WORDS).title()} {i}",
+         rng.randint(1, counts['Authors']), rng.randint(1, counts['Genres']), rng.randint(1, counts['Publishers']),
+         f"978{i:010d}", rng.randint(1900, 2025), rng.randint(0, 5))
+        for i in range(1, counts['Books'] + 1)
+    )
+    base_date = datetime.date(2015, 1, 1)
+    yield 'Members', ['MemberID', 'FirstName', 'LastName', 'Email', 'Phone', 'MembershipDate'], (
+        (i, rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES), f"member{i}@example.org",
+         f"555-{i:07d}", base_date + datetime.timedelta(days=rng.randint(0, 3650)))
+        for i in range(1, counts['Members'] + 1)
+    )
+    today = datetime.date.today()
+
+    def loan(i):
+        loan_date = today - datetime.timedelta(days=rng.randint(0, 720))
+        due_date = loan_date + datetime.timedelta(days=21)
+        # Most loans have come back; the rest are active, some of them overdue
+        returned = rng.random() < 0.85
+        return_date = loan_date + datetime.timedelta(days=rng.randint(1, 30)) if returned else None
+        if return_date is not None and return_date > today:
+            return_date = None
+        return (i, rng.randint(1, counts['Books']), rng.randint(1, counts['Members']), loan_date, due_date, return_date)
+
+    yield 'Loans', ['LoanID', 'BookID', 'MemberID', 'LoanDate', 'DueDate', 'ReturnDate'], (
+        loan(i) for i in range(1, counts['Loans'] + 1)
+    )
+
+def _current_counts():
+    counts = {}
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        for table in _DROP_ORDER:
+            try:
+                cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                counts[table] = cursor.fetchone()[0]
+            except mysql.connector.errors.ProgrammingError:
+                counts[table] = None
+        cursor.close()
+    return counts
+
+def seed(scale, reseed=False, random_seed=42, log=print):
+    """Creates the schema and fills it to the given scale, unless it is already there."""
+    counts = SCALES[scale]
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        for statement in SCHEMA:
+            cursor.execute(statement)
+        cursor.close()
+
+    if not reseed and all(_current_counts().get(table) == count for table, count in counts.items()):
+        log(f"Database already seeded at scale {scale}")
+        return
+
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        for table in _DROP_ORDER:
+            cursor.execute(f"DELETE FROM {table}")
+        conn.commit()
+        cursor.close()
+
+    rng = random.Random(random_seed)
+    for table, columns, rows in _row_generators(counts, rng):
+        log(f"Seeding {counts[table]} rows into {table}...")
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= SEED_BATCH_SIZE:
+                insert_many(table, columns, batch)
+                batch = []
+        if batch:
+            insert_many(table, columns, batch)
+
+    schema_catalog.invalidate()
+    invalidate_cache()
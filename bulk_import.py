@@ -0,0 +1,184 @@
+import csv
+import datetime
+import decimal
+import os
+import tempfile
+import time
+
+from crud_operations import insert_many, note_write
+from db_connection import DB_CONFIG, driver
+from schema_catalog import INTEGER_TYPES, get_table_schema
+
+DEFAULT_BATCH_SIZE = 1000
+
+_DECIMAL_TYPES = ('decimal', 'numeric')
+_FLOAT_TYPES = ('float', 'double', 'real')
+
+
+class ImportReport:
+    """Running totals for one import, passed to the progress callback after every batch."""
+
+    def __init__(self, table_name, path):
+        self.table_name = table_name
+        self.path = path
+        self.rows_read = 0
+        self.rows_inserted = 0
+        self.errors = []            # (CSV line number, message)
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows_inserted / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (f"{self.table_name}: {self.rows_inserted} of {self.rows_read} rows imported "
+                f"in {self.elapsed:.1f}s, {len(self.errors)} errors")
+
+
+def _convert(value, data_type):
+    """Converts one CSV cell to the Python type the column expects."""
+    if data_type in INTEGER_TYPES or data_type == 'year':
+        return int(value)
+    if data_type in _DECIMAL_TYPES:
+        try:
+            return decimal.Decimal(value)
+        except decimal.InvalidOperation:
+            raise ValueError(f"'{value}' is not a number")
+    if data_type in _FLOAT_TYPES:
+        return float(value)
+    if data_type == 'date':
+        return datetime.date.fromisoformat(value)
+    if data_type in ('datetime', 'timestamp'):
+        return datetime.datetime.fromisoformat(value)
+    return value
+
+def _validate_header(schema, header):
+    """Checks the CSV header against the table and returns the columns to load."""
+    if not header:
+        raise ValueError("The CSV file is empty.")
+    columns = [name.strip() for name in header]
+    unknown = [col for col in columns if col not in schema.columns]
+    if unknown:
+        raise ValueError(f"Unknown columns for {schema.name}: {', '.join(unknown)}")
+    missing = [
+        col for col in schema.columns
+        if col not in columns and not schema.nullable[col] and col not in schema.auto_increment
+    ]
+    if missing:
+        raise ValueError(f"Required columns missing from the CSV: {', '.join(missing)}")
+    return columns
+
+def _validate_row(schema, columns, cells):
+    """Turns a CSV record into a typed row, raising ValueError if it does not fit the schema."""
+    if len(cells) != len(columns):
+        raise ValueError(f"expected {len(columns)} fields, found {len(cells)}")
+    row = []
+    for column, cell in zip(columns, cells):
+        cell = cell.strip()
+        if cell == "":
+            if not schema.nullable[column] and column not in schema.auto_increment:
+                raise ValueError(f"{column} is required")
+            row.append(None)
+            continue
+        try:
+            row.append(_convert(cell, schema.types[column]))
+        except ValueError as e:
+            raise ValueError(f"{column}: {e}")
+    return row
+
+def _read_batches(schema, reader, columns, batch_size, report):
+    """Yields (line numbers, rows) batches of valid rows, recording invalid ones in the report."""
+    line_numbers, rows = [], []
+    for cells in reader:
+        if not any(cell.strip() for cell in cells):
+            continue  # Skip blank lines
+        report.rows_read += 1
+        try:
+            rows.append(_validate_row(schema, columns, cells))
+            line_numbers.append(reader.line_num)
+        except ValueError as e:
+            report.errors.append((reader.line_num, str(e)))
+        if len(rows) >= batch_size:
+            yield line_numbers, rows
+            line_numbers, rows = [], []
+    if rows:
+        yield line_numbers, rows
+
+def _load_data_infile(cursor, table_name, columns, rows):
+    """Loads a batch with LOAD DATA LOCAL INFILE and returns the number of rows the server accepted."""
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', encoding='utf-8', delete=False) as f:
+        writer = csv.writer(f, lineterminator='\n')
+        for row in rows:
+            writer.writerow(
+                r'\N' if value is None else str(value).replace('\\', '\\\\')
+                for value in row
+            )
+        path = f.name
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE {table_name} "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            f"LINES TERMINATED BY '\\n' ({', '.join(columns)})",
+            (path,)
+        )
+        return cursor.rowcount
+    finally:
+        os.remove(path)
+
+def import_csv(table_name, path, batch_size=DEFAULT_BATCH_SIZE, use_load_data=False, progress=None):
+    """Streams a CSV file with a header row into a table and returns an ImportReport.
+
+    Rows are validated against the table schema and inserted in batches, each
+    in its own transaction, so memory use does not grow with the file. Invalid
+    or rejected rows are recorded in the report instead of aborting the load.
+    With use_load_data, batches are sent with LOAD DATA LOCAL INFILE, which is
+    faster but only reports how many rows the server skipped, not which ones.
+    `progress(report)` is called after every batch, from the importing thread.
+    """
+    schema = get_table_schema(table_name)
+    report = ImportReport(table_name, path)
+
+    local_conn = None
+    if use_load_data:
+        # Pooled connections do not allow local infile, so this needs its own
+        local_conn = driver().connect(**DB_CONFIG, allow_local_infile=True)
+
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            columns = _validate_header(schema, next(reader, None))
+
+            for line_numbers, rows in _read_batches(schema, reader, columns, batch_size, report):
+                if local_conn is not None:
+                    cursor = local_conn.cursor()
+                    accepted = _load_data_infile(cursor, table_name, columns, rows)
+                    local_conn.commit()
+                    cursor.close()
+                    report.rows_inserted += accepted
+                    if accepted < len(rows):
+                        report.errors.append(
+                            (line_numbers[0], f"{len(rows) - accepted} rows between lines {line_numbers[0]} "
+                                              f"and {line_numbers[-1]} were rejected by the server")
+                        )
+                else:
+                    failed = insert_many(table_name, columns, rows)
+                    report.rows_inserted += len(rows) - len(failed)
+                    report.errors.extend((line_numbers[position], message) for position, message in failed)
+
+                if progress is not None:
+                    progress(report)
+    finally:
+        if local_conn is not None:
+            local_conn.close()
+            note_write(table_name)
+
+    report.finished = time.perf_counter()
+    if progress is not None:
+        progress(report)
+    return report
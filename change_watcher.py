@@ -0,0 +1,115 @@
+from crud_operations import fetch_checksums, fetch_max_key, fetch_page, fetch_rows, invalidate_cache
+
+# Pause between polls of the open table
+POLL_INTERVAL_MS = 5000
+
+# Most rows picked up past the end of the window in one poll
+TAIL_LIMIT = 200
+
+
+class ChangeWatcher:
+    """Polls the open table for rows other clients changed and reports them for patching.
+
+    Each poll checksums only the rows between the first and last key currently
+    loaded in the view and reads the table's highest key, both through the
+    primary key index, so its cost depends on the window size and not on the
+    size of the table. Only rows whose checksum changed, rows that vanished
+    and rows added past the end of the window are read back, and
+    `on_change(table_name, keys, rows, key_index)` is called on the Tk thread with them.
+    """
+
+    def __init__(self, root, executor, on_change, interval_ms=POLL_INTERVAL_MS):
+        self.root = root
+        self.executor = executor
+        self.on_change = on_change
+        self.interval_ms = interval_ms
+        self._target = None       # (table_name, key_column, key_index, window)
+        self._checksums = {}      # Key -> checksum as of the last poll
+        self._max_key = None
+        self._baseline = False    # True once a poll has recorded the state to compare against
+        self._after_id = None
+
+    def watch(self, table_name, key_column, key_index, window=None):
+        """Starts watching a table, replacing whatever was watched before.
+
+        `window()` returns (keys loaded in the view in ascending order, whether
+        the view reaches the end of the table); without one, only rows added to
+        a table shown as empty are noticed.
+        """
+        self.stop()
+        self._target = (table_name, key_column, key_index, window)
+        self._checksums = {}
+        self._max_key = None
+        self._baseline = False
+        # The first poll only records the current state; it has nothing to compare against
+        self._after_id = self.root.after(0, self._poll)
+
+    def stop(self):
+        """Stops polling until the next watch()."""
+        self._target = None
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.executor.cancel("watch")
+
+    def _poll(self):
+        self._after_id = None
+        target = self._target
+        if target is None:
+            return
+        table_name, key_column, key_index, window = target
+        keys, at_end = window() if window is not None else ([], True)
+        keys = list(keys)
+        baseline = self._baseline
+
+        def on_success(result):
+            if self._target is not target:
+                return  # A different view was opened while this poll ran
+            checksums, max_key, changed_keys, rows = result
+            self._checksums = checksums
+            self._max_key = max_key
+            self._baseline = True
+            if changed_keys and baseline:
+                invalidate_cache(table_name)
+                self.on_change(table_name, changed_keys, rows, key_index)
+            self._schedule()
+
+        def on_error(e):
+            print(f"Change polling failed for {table_name}: {e}")
+            if self._target is target:
+                self._schedule()
+
+        self.executor.submit(
+            self._check, table_name, key_column, key_index, keys, at_end, baseline, dict(self._checksums),
+            self._max_key,
+            channel="watch", on_success=on_success, on_error=on_error,
+        )
+
+    def _schedule(self):
+        if self._target is not None:
+            self._after_id = self.root.after(self.interval_ms, self._poll)
+
+    @staticmethod
+    def _check(table_name, key_column, key_index, keys, at_end, baseline, previous, previous_max):
+        """Compares the window with the last poll and reads back what changed. Runs on a worker thread."""
+        checksums = fetch_checksums(table_name, key_column, keys[0], keys[-1]) if keys else {}
+        max_key = fetch_max_key(table_name, key_column)
+
+        displayed = set(keys)
+        changed = [key for key, checksum in checksums.items()
+                   if (key in previous and previous[key] != checksum) or (key not in previous and key not in displayed)]
+        gone = [key for key in previous if keys and keys[0] <= key <= keys[-1] and key not in checksums]
+
+        if not baseline:
+            return checksums, max_key, [], []
+
+        rows = fetch_rows(table_name, key_column, changed) if changed else []
+        if at_end and max_key is not None and (previous_max is None or max_key > previous_max):
+            # New rows past the end of the view; the view slots them in by key.
+            # Cached pages predate them, so drop those before reading.
+            invalidate_cache(table_name)
+            after_key = keys[-1] if keys else None
+            tail = fetch_page(table_name, key_column, after_key=after_key, limit=TAIL_LIMIT)[1]
+            rows.extend(tail)
+            changed.extend(row[key_index] for row in tail)
+        return checksums, max_key, changed + gone, rows
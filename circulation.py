@@ -0,0 +1,334 @@
+import datetime
+import heapq
+import threading
+import time
+
+from crud_operations import KEY_CHUNK_SIZE, add_write_listener
+from db_connection import pooled_connection
+from instrumentation import timed
+from schema_catalog import get_table_schema
+
+# Where circulation data lives; change these if the database names them differently
+LOANS_TABLE = "Loans"
+LOAN_KEY_COLUMN = "LoanID"
+LOAN_BOOK_COLUMN = "BookID"
+LOAN_MEMBER_COLUMN = "MemberID"
+LOAN_DUE_COLUMN = "DueDate"
+LOAN_RETURN_COLUMN = "ReturnDate"     # NULL while the book is out
+
+FINES_TABLE = "Fines"
+FINE_KEY_COLUMN = "FineID"
+FINE_LOAN_COLUMN = "LoanID"
+FINE_MEMBER_COLUMN = "MemberID"
+FINE_AMOUNT_COLUMN = "Amount"
+FINE_DATE_COLUMN = "FineDate"         # When the fine was first assessed
+FINE_PAID_COLUMN = "PaidDate"         # NULL while the fine is outstanding
+
+# Rows shown in the dashboard's top-N lists
+TOP_N = 10
+
+# Most borrowed books tracked, more than shown so a few decrements do not force a reload
+_TOP_BOOKS_KEPT = 50
+
+# Seconds between reads of the loans and fines added at other desks since the last look, by key range
+REFRESH_INTERVAL = 60
+
+# Seconds before the summary is reloaded in full, to pick up returns, payments and edits made at other desks
+FULL_REFRESH_INTERVAL = 3600
+
+# Touched keys remembered per table before it is cheaper to reload the table's aggregates
+MAX_PENDING_KEYS = 5000
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime.datetime) else value
+
+def _rows_by_keys(cursor, table_name, key_column, columns, keys):
+    """{key: (key, columns...)} for the rows that still exist, read by primary key."""
+    keys = list(keys)
+    rows = {}
+    for start in range(0, len(keys), KEY_CHUNK_SIZE):
+        chunk = keys[start:start + KEY_CHUNK_SIZE]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(
+            f"SELECT {key_column}, {', '.join(columns)} FROM {table_name} WHERE {key_column} IN ({placeholders})",
+            chunk,
+        )
+        rows.update((row[0], row) for row in cursor.fetchall())
+    return rows
+
+def _rows_after(cursor, table_name, key_column, columns, after_key):
+    """{key: (key, columns...)} for the rows with keys past `after_key` (every row if None)."""
+    query = f"SELECT {key_column}, {', '.join(columns)} FROM {table_name}"
+    params = ()
+    if after_key is not None:
+        query += f" WHERE {key_column} > %s"
+        params = (after_key,)
+    cursor.execute(query, params)
+    return {row[0]: row for row in cursor.fetchall()}
+
+
+class CirculationSummary:
+    """Circulation aggregates held in memory and kept current from the writes crud_operations reports.
+
+    The first snapshot() reads the active loans, the unpaid fines and the most
+    borrowed books with one query each. After that a write only records the
+    keys it touched; the next snapshot() re-reads just those rows by primary
+    key and adjusts the totals, so reopening the dashboard costs a few indexed
+    lookups. Writes without known keys trigger a reload of that table's
+    aggregates. Writes made at other desks are not reported: every
+    REFRESH_INTERVAL the loans and fines past the highest key seen are read
+    by key range, and every FULL_REFRESH_INTERVAL everything is reloaded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()           # Held while the aggregates are read or changed
+        self._pending_lock = threading.Lock()   # Held by writers recording touched keys
+        self._pending = {LOANS_TABLE: set(), FINES_TABLE: set()}
+        self._reload = {LOANS_TABLE, FINES_TABLE}
+        self._loaded_at = None          # When the aggregates were last loaded in full
+        self._checked_at = None         # When rows added elsewhere were last read
+
+        self._active = {}               # LoanID -> (BookID, MemberID, due date) of loans not returned
+        self._max_loan = None           # Highest LoanID seen; touched keys above it are new loans
+        self._top_books = {}            # BookID -> loan count of the most borrowed books
+        self._unpaid = {}               # FineID -> (MemberID, amount) of fines not paid
+        self._max_fine = None           # Highest FineID seen
+        self._outstanding = {}          # MemberID -> total of their unpaid fines
+        self._fines_problem = None      # Why fines are not summarised, if they are not
+
+    def note_write(self, table_name, keys):
+        """Write listener: remembers what changed for the next snapshot()."""
+        if table_name not in self._pending:
+            return
+        with self._pending_lock:
+            pending = self._pending[table_name]
+            if keys is None or len(pending) + len(keys) > MAX_PENDING_KEYS:
+                self._reload.add(table_name)
+                pending.clear()
+            elif table_name not in self._reload:
+                pending.update(keys)
+
+    def snapshot(self, refresh=False):
+        """Brings the aggregates up to date and returns them as a dict. Runs on a worker thread."""
+        with self._lock:
+            with self._pending_lock:
+                reload = set(self._reload)
+                pending = self._pending
+                self._reload = set()
+                self._pending = {LOANS_TABLE: set(), FINES_TABLE: set()}
+            now = time.monotonic()
+            expired = self._loaded_at is None or now - self._loaded_at > FULL_REFRESH_INTERVAL
+            if refresh or expired:
+                reload = {LOANS_TABLE, FINES_TABLE}
+            pull = not (refresh or expired) and (self._checked_at is None or now - self._checked_at > REFRESH_INTERVAL)
+
+            try:
+                with pooled_connection() as conn:
+                    cursor = conn.cursor()
+                    if LOANS_TABLE in reload:
+                        self._load_loans(cursor)
+                    elif pending[LOANS_TABLE]:
+                        self._apply_loans(cursor, pending[LOANS_TABLE])
+                    if FINES_TABLE in reload:
+                        self._load_fines(cursor)
+                    elif pending[FINES_TABLE] and self._fines_problem is None:
+                        self._apply_fines(cursor, pending[FINES_TABLE])
+                    if pull:
+                        self._pull_new_rows(cursor)
+                    cursor.close()
+            except Exception:
+                # Half-applied changes leave the totals unknown; start over next time
+                with self._pending_lock:
+                    self._reload.update((LOANS_TABLE, FINES_TABLE))
+                self._loaded_at = None
+                raise
+            if refresh or expired:
+                self._loaded_at = now
+            if refresh or expired or pull:
+                self._checked_at = now
+            return self._summary()
+
+    @timed("circulation.load_loans")
+    def _load_loans(self, cursor):
+        cursor.execute(
+            f"SELECT {LOAN_KEY_COLUMN}, {LOAN_BOOK_COLUMN}, {LOAN_MEMBER_COLUMN}, {LOAN_DUE_COLUMN} "
+            f"FROM {LOANS_TABLE} WHERE {LOAN_RETURN_COLUMN} IS NULL"
+        )
+        self._active = {key: (book, member, _as_date(due)) for key, book, member, due in cursor.fetchall()}
+        cursor.execute(f"SELECT MAX({LOAN_KEY_COLUMN}) FROM {LOANS_TABLE}")
+        self._max_loan = cursor.fetchone()[0]
+        self._load_top_books(cursor)
+
+    def _apply_loans(self, cursor, keys, rows=None):
+        """Adjusts the loan aggregates for touched loans; `rows` are their current rows if already read."""
+        keys = set(keys)
+        if rows is None:
+            rows = _rows_by_keys(cursor, LOANS_TABLE, LOAN_KEY_COLUMN,
+                                 [LOAN_BOOK_COLUMN, LOAN_MEMBER_COLUMN, LOAN_DUE_COLUMN, LOAN_RETURN_COLUMN], keys)
+        new_books = []
+        recount = set()         # Books whose count changed by an amount not known here
+        for key in keys:
+            old = self._active.pop(key, None)
+            row = rows.get(key)
+            if row is not None and row[4] is None:
+                self._active[key] = (row[1], row[2], _as_date(row[3]))
+            if row is not None and old is None and (self._max_loan is None or key > self._max_loan):
+                new_books.append(row[1])
+            elif old is not None:
+                # An active loan: the book it counted for is known
+                if row is None or old[0] != row[1]:
+                    self._uncount_loan(old[0])
+                if row is not None and old[0] != row[1]:
+                    new_books.append(row[1])
+            else:
+                # A returned loan deleted or edited: the book it counted for is not known, but
+                # only tracked books can matter, and recounting those is a few index lookups
+                recount.update(self._top_books)
+                if row is not None:
+                    recount.add(row[1])
+        if rows:
+            self._max_loan = max(rows) if self._max_loan is None else max(self._max_loan, max(rows))
+        if recount:
+            self._recount_books(cursor, recount | set(new_books))
+        else:
+            self._count_new_loans(cursor, new_books)
+
+    def _uncount_loan(self, book):
+        if book in self._top_books:
+            self._top_books[book] -= 1
+            if self._top_books[book] <= 0:
+                del self._top_books[book]
+
+    def _count_new_loans(self, cursor, books):
+        """Adds new loans to the most borrowed books, looking up books not tracked yet by index."""
+        untracked = set()
+        for book in books:
+            if book in self._top_books:
+                self._top_books[book] += 1
+            else:
+                untracked.add(book)
+        if untracked:
+            self._recount_books(cursor, untracked)
+
+    def _recount_books(self, cursor, books):
+        """Sets the loan counts of the given books, read through the BookID index, and keeps the largest."""
+        books = list(books)
+        counts = {}
+        for start in range(0, len(books), KEY_CHUNK_SIZE):
+            chunk = books[start:start + KEY_CHUNK_SIZE]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f"SELECT {LOAN_BOOK_COLUMN}, COUNT(*) FROM {LOANS_TABLE} "
+                f"WHERE {LOAN_BOOK_COLUMN} IN ({placeholders}) GROUP BY {LOAN_BOOK_COLUMN}",
+                chunk,
+            )
+            counts.update(cursor.fetchall())
+        for book in books:
+            self._top_books.pop(book, None)
+            if counts.get(book):
+                self._top_books[book] = counts[book]
+        while len(self._top_books) > _TOP_BOOKS_KEPT:
+            del self._top_books[min(self._top_books, key=self._top_books.get)]
+
+    @timed("circulation.load_top_books")
+    def _load_top_books(self, cursor):
+        cursor.execute(
+            f"SELECT {LOAN_BOOK_COLUMN}, COUNT(*) AS loans FROM {LOANS_TABLE} "
+            f"GROUP BY {LOAN_BOOK_COLUMN} ORDER BY loans DESC LIMIT %s",
+            (_TOP_BOOKS_KEPT,),
+        )
+        self._top_books = dict(cursor.fetchall())
+
+    def _check_fines_table(self):
+        """None if the Fines table has the configured columns, else what is wrong."""
+        try:
+            schema = get_table_schema(FINES_TABLE)
+        except KeyError:
+            return f"There is no {FINES_TABLE} table."
+        missing = [column for column in (FINE_KEY_COLUMN, FINE_MEMBER_COLUMN, FINE_AMOUNT_COLUMN, FINE_PAID_COLUMN)
+                   if column not in schema.columns]
+        if missing:
+            return f"{FINES_TABLE} has no {', '.join(missing)} column; set the FINE_* names in circulation.py."
+        return None
+
+    @timed("circulation.load_fines")
+    def _load_fines(self, cursor):
+        self._unpaid = {}
+        self._outstanding = {}
+        self._fines_problem = self._check_fines_table()
+        if self._fines_problem is not None:
+            return
+        cursor.execute(
+            f"SELECT {FINE_KEY_COLUMN}, {FINE_MEMBER_COLUMN}, {FINE_AMOUNT_COLUMN} "
+            f"FROM {FINES_TABLE} WHERE {FINE_PAID_COLUMN} IS NULL"
+        )
+        for key, member, amount in cursor.fetchall():
+            self._add_fine(key, member, amount)
+        cursor.execute(f"SELECT MAX({FINE_KEY_COLUMN}) FROM {FINES_TABLE}")
+        self._max_fine = cursor.fetchone()[0]
+
+    def _apply_fines(self, cursor, keys, rows=None):
+        """Adjusts the fine totals for touched fines; `rows` are their current rows if already read."""
+        keys = set(keys)
+        if rows is None:
+            rows = _rows_by_keys(cursor, FINES_TABLE, FINE_KEY_COLUMN,
+                                 [FINE_MEMBER_COLUMN, FINE_AMOUNT_COLUMN, FINE_PAID_COLUMN], keys)
+        for key in keys:
+            old = self._unpaid.pop(key, None)
+            if old is not None:
+                member, amount = old
+                remaining = self._outstanding[member] - (amount or 0)
+                if remaining:
+                    self._outstanding[member] = remaining
+                else:
+                    del self._outstanding[member]
+            row = rows.get(key)
+            if row is not None and row[3] is None:
+                self._add_fine(key, row[1], row[2])
+        if rows:
+            self._max_fine = max(rows) if self._max_fine is None else max(self._max_fine, max(rows))
+
+    @timed("circulation.pull_new_rows")
+    def _pull_new_rows(self, cursor):
+        """Applies the loans and fines added since the highest keys seen, read by primary key range."""
+        loans = _rows_after(cursor, LOANS_TABLE, LOAN_KEY_COLUMN,
+                            [LOAN_BOOK_COLUMN, LOAN_MEMBER_COLUMN, LOAN_DUE_COLUMN, LOAN_RETURN_COLUMN], self._max_loan)
+        if loans:
+            self._apply_loans(cursor, loans, loans)
+        if self._fines_problem is None:
+            fines = _rows_after(cursor, FINES_TABLE, FINE_KEY_COLUMN,
+                                [FINE_MEMBER_COLUMN, FINE_AMOUNT_COLUMN, FINE_PAID_COLUMN], self._max_fine)
+            if fines:
+                self._apply_fines(cursor, fines, fines)
+
+    def _add_fine(self, key, member, amount):
+        self._unpaid[key] = (member, amount)
+        self._outstanding[member] = self._outstanding.get(member, 0) + (amount or 0)
+
+    def _summary(self):
+        today = datetime.date.today()
+        return {
+            'active_loans': len(self._active),
+            'overdue_loans': sum(1 for _, _, due in self._active.values() if due is not None and due < today),
+            'fines_outstanding': sum(self._outstanding.values()),
+            'members_owing': len(self._outstanding),
+            'top_debtors': heapq.nlargest(TOP_N, self._outstanding.items(), key=lambda item: item[1]),
+            'top_books': heapq.nlargest(TOP_N, self._top_books.items(), key=lambda item: item[1]),
+            'fines_problem': self._fines_problem,
+            'as_of': datetime.datetime.now(),
+        }
+
+
+_summary = CirculationSummary()
+add_write_listener(_summary.note_write)
+
+def snapshot(refresh=False):
+    """Current circulation aggregates; `refresh` reloads them in full. Runs on a worker thread.
+
+    Returns {'active_loans', 'overdue_loans', 'fines_outstanding',
+    'members_owing', 'top_debtors': [(MemberID, amount)], 'top_books':
+    [(BookID, loans)], 'fines_problem': None or why fines are missing,
+    'as_of'}.
+    """
+    return _summary.snapshot(refresh)
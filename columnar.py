@@ -0,0 +1,299 @@
+import datetime
+import sys
+import threading
+import weakref
+from array import array
+from collections import defaultdict
+
+# A text column stays dictionary-encoded while its distinct values are at most
+# this share of its rows; above that the dictionary costs more than it saves
+DICTIONARY_MAX_RATIO = 0.5
+
+# Rows seen before a text column's cardinality is judged, and how often it is judged again
+_DICTIONARY_MIN_ROWS = 64
+_DICTIONARY_CHECK_ROWS = 4096
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+class _ObjectColumn:
+    """Plain list of values; the fallback for types that have no compact form."""
+
+    kind = 'object'
+
+    def __init__(self, values=None):
+        self.values = values if values is not None else []
+
+    def accepts(self, value):
+        return True
+
+    def append(self, value):
+        self.values.append(value)
+
+    def get(self, position):
+        return self.values[position]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def nbytes(self):
+        return sys.getsizeof(self.values) + sum(sys.getsizeof(value) for value in self.values)
+
+
+class _ArrayColumn:
+    """Values packed into a typed array, with NULLs marked in a lazily created byte mask."""
+
+    def __init__(self, kind, typecode, types, encode, decode):
+        self.kind = kind
+        self.data = array(typecode)
+        self.nulls = None           # bytearray with 1 at NULL positions, once there is one
+        self._types = types
+        self._encode = encode
+        self._decode = decode
+
+    def accepts(self, value):
+        return value is None or type(value) in self._types
+
+    def append(self, value):
+        if value is None:
+            if self.nulls is None:
+                self.nulls = bytearray(len(self.data))
+            self.nulls.append(1)
+            self.data.append(0)
+            return
+        try:
+            self.data.append(self._encode(value))
+        except OverflowError:
+            raise TypeError(f"{value!r} does not fit a {self.kind} column") from None
+        if self.nulls is not None:
+            self.nulls.append(0)
+
+    def get(self, position):
+        if self.nulls is not None and self.nulls[position]:
+            return None
+        return self._decode(self.data[position])
+
+    def __iter__(self):
+        decode = self._decode
+        if self.nulls is None:
+            return (decode(value) for value in self.data)
+        return (None if null else decode(value) for value, null in zip(self.data, self.nulls))
+
+    def nbytes(self):
+        size = sys.getsizeof(self.data)
+        if self.nulls is not None:
+            size += sys.getsizeof(self.nulls)
+        return size
+
+
+class _DictionaryColumn:
+    """Text stored once per distinct value, with an array of small integer codes per row."""
+
+    kind = 'dictionary'
+
+    def __init__(self):
+        self.codes = array('I')
+        self.values = []            # Distinct values in first-seen order; may include None
+        self._lookup = {}
+
+    def accepts(self, value):
+        return value is None or type(value) is str
+
+    def append(self, value):
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def get(self, position):
+        return self.values[self.codes[position]]
+
+    def __iter__(self):
+        values = self.values
+        return (values[code] for code in self.codes)
+
+    def too_diverse(self):
+        rows = len(self.codes)
+        return rows >= _DICTIONARY_MIN_ROWS and len(self.values) > rows * DICTIONARY_MAX_RATIO
+
+    def nbytes(self):
+        return (sys.getsizeof(self.codes) + sys.getsizeof(self.values) + sys.getsizeof(self._lookup)
+                + sum(sys.getsizeof(value) for value in self.values))
+
+
+def _new_column(value):
+    """The most compact column able to hold values like the first non-NULL one seen."""
+    value_type = type(value)
+    if value_type is int:
+        return _ArrayColumn('int', 'q', (int,), int, int)
+    if value_type is float:
+        return _ArrayColumn('float', 'd', (float,), float, float)
+    if value_type is datetime.date:
+        return _ArrayColumn('date', 'i', (datetime.date,), datetime.date.toordinal, datetime.date.fromordinal)
+    if value_type is datetime.datetime and value.tzinfo is None:
+        return _ArrayColumn(
+            'datetime', 'q', (datetime.datetime,),
+            lambda dt: (dt - _EPOCH) // _MICROSECOND,
+            lambda micros: _EPOCH + datetime.timedelta(microseconds=micros),
+        )
+    if value_type is str:
+        return _DictionaryColumn()
+    return _ObjectColumn()
+
+
+class ColumnarResult:
+    """Read-only rows of a result, stored column by column instead of as row tuples.
+
+    Integer, float, date and datetime columns are packed into typed arrays and
+    text columns are dictionary-encoded while they have few distinct values
+    (genres, statuses), so a large table costs close to its raw size. It acts
+    as a sequence of rows: indexing or iterating builds each row tuple only
+    when it is asked for, and the column accessors never build rows at all.
+    """
+
+    def __init__(self, columns, table_name=None):
+        self.columns = list(columns)
+        self.table_name = table_name
+        self._data = [None] * len(self.columns)    # Column storage, chosen once a non-NULL value is seen
+        self._null_prefix = [0] * len(self.columns) # NULLs seen before the storage was chosen
+        self._length = 0
+        _register(self)
+
+    @classmethod
+    def from_rows(cls, columns, rows, table_name=None):
+        result = cls(columns, table_name)
+        result.extend(rows)
+        return result
+
+    @classmethod
+    def from_chunks(cls, columns, chunks, table_name=None):
+        """Builds a result from an iterable of row lists, e.g. stream_rows(), one chunk at a time."""
+        result = cls(columns, table_name)
+        for rows in chunks:
+            result.extend(rows)
+        return result
+
+    def extend(self, rows):
+        """Appends rows given in column order."""
+        for row in rows:
+            for index, value in enumerate(row):
+                self._append_value(index, value)
+            self._length += 1
+            if self._length % _DICTIONARY_CHECK_ROWS == 0:
+                self._drop_diverse_dictionaries()
+        self._drop_diverse_dictionaries()
+
+    def _drop_diverse_dictionaries(self):
+        for index, column in enumerate(self._data):
+            if isinstance(column, _DictionaryColumn) and column.too_diverse():
+                self._data[index] = _ObjectColumn(list(column))
+
+    def _append_value(self, index, value):
+        column = self._data[index]
+        if column is None:
+            if value is None:
+                self._null_prefix[index] += 1
+                return
+            column = self._data[index] = _new_column(value)
+            for _ in range(self._null_prefix[index]):
+                column.append(None)
+        if column.accepts(value):
+            try:
+                column.append(value)
+                return
+            except TypeError:
+                pass
+        # A value the compact form cannot hold, e.g. a huge integer; keep the column as plain objects
+        column = self._data[index] = _ObjectColumn(list(column))
+        column.append(value)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self.row(i) for i in range(*position.indices(self._length))]
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError("row index out of range")
+        return self.row(position)
+
+    def __iter__(self):
+        columns = [self.column(index) for index in range(len(self.columns))]
+        return zip(*columns) if columns else iter(())
+
+    def row(self, position):
+        """One row as a tuple."""
+        return tuple(None if column is None else column.get(position) for column in self._data)
+
+    def value(self, position, index):
+        """One cell, without building its row."""
+        column = self._data[index]
+        return None if column is None else column.get(position)
+
+    def column(self, index):
+        """Iterates the values of one column, given by position, in row order."""
+        column = self._data[index]
+        if column is None:
+            return iter([None] * self._length)
+        return iter(column)
+
+    def matching(self, term):
+        """Positions of rows with a cell whose text contains `term` (lower-case), in row order.
+
+        Dictionary-encoded columns test each distinct value once.
+        """
+        hits = bytearray(self._length)
+        for column in self._data:
+            if column is None:
+                continue
+            if isinstance(column, _DictionaryColumn):
+                codes = {code for code, value in enumerate(column.values) if term in str(value).lower()}
+                if codes:
+                    for position, code in enumerate(column.codes):
+                        if code in codes:
+                            hits[position] = 1
+            else:
+                for position, value in enumerate(column):
+                    if term in str(value).lower():
+                        hits[position] = 1
+        return [position for position, hit in enumerate(hits) if hit]
+
+    def storage(self):
+        """{column: storage kind}, e.g. 'int', 'date', 'dictionary' or 'object'."""
+        return {name: 'null' if column is None else column.kind for name, column in zip(self.columns, self._data)}
+
+    def nbytes(self):
+        """Approximate memory held by the result."""
+        return sys.getsizeof(self._data) + sum(column.nbytes() for column in self._data if column is not None)
+
+    def __sizeof__(self):
+        # Lets size estimates such as the result cache's see the column storage
+        return object.__sizeof__(self) + self.nbytes()
+
+    def __repr__(self):
+        return f"ColumnarResult({self.table_name!r}, rows={self._length}, columns={self.columns!r})"
+
+
+# Every result still in use, so memory can be reported per table
+_live = weakref.WeakSet()
+_lock = threading.Lock()
+
+def _register(result):
+    with _lock:
+        _live.add(result)
+
+def memory_by_table():
+    """{table: (live results, rows, approximate bytes)} over every ColumnarResult still referenced."""
+    with _lock:
+        results = list(_live)
+    totals = defaultdict(lambda: [0, 0, 0])
+    for result in results:
+        entry = totals[result.table_name or '(query)']
+        entry[0] += 1
+        entry[1] += len(result)
+        entry[2] += result.nbytes()
+    return {table: tuple(entry) for table, entry in sorted(totals.items())}
@@ -1,42 +1,709 @@
-from db_connection import create_connection
+import re
 
-def fetch_all_data(table_name):
-    """Fetches all data from a specified table."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    query = f"SELECT * FROM {table_name}"
-    cursor.execute(query)
-    result = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    conn.close()
+from columnar import ColumnarResult
+from db_connection import driver, get_pool, install_pool, pooled_connection
+from instrumentation import timed
+from prepared_statements import execute_prepared, executemany_prepared
+from result_cache import ResultCache, SingleFlight
+from schema_catalog import get_table_schema, set_schema_reader
+
+# Maximum number of rows a search returns
+SEARCH_LIMIT = 200
+
+# Maximum number of keys bound into one IN (...) list
+KEY_CHUNK_SIZE = 500
+
+# Rows packed into a ColumnarResult per fetch when reading a whole table
+FETCH_CHUNK_SIZE = 5000
+
+def _data_errors():
+    """Errors caused by the data or statement rather than a lost connection."""
+    errors = driver().errors
+    return (errors.IntegrityError, errors.DataError)
+
+# Seconds a cached read is served before it is re-queried; writes made at other
+# desks are not reported, so this bounds how stale they can look
+CACHE_TTL = 5
+
+# Results of reads, shared between callers until a write to the table invalidates them or they expire
+_cache = ResultCache(ttl=CACHE_TTL)
+
+def configure_cache(max_bytes=None, ttl=CACHE_TTL):
+    """Changes the result cache's byte budget (None keeps the current one) and TTL in seconds (None never expires)."""
+    if max_bytes is not None:
+        _cache.max_bytes = max_bytes
+    _cache.ttl = ttl
+    _cache.clear()
+
+def invalidate_cache(table_name=None):
+    """Drops cached results for one table, or for every table."""
+    if table_name is None:
+        _cache.clear()
+    else:
+        _cache.invalidate_table(table_name)
+
+def cache_stats():
+    """Returns the result cache's hit/miss counters and occupancy."""
+    return _cache.stats()
+
+# Reads that miss the cache while an identical read is running wait for it instead of querying again
+_flights = SingleFlight()
+
+def coalescing_stats():
+    """Returns how many reads ran a query and how many shared one already running (queries saved)."""
+    return _flights.stats()
+
+# Local SQLite mirror that serves reads of the tables it holds, or None to read from MySQL
+_mirror = None
+
+def use_mirror(path=None, offline=False):
+    """Serves reads from a local SQLite mirror at `path` (default MIRROR_PATH) and returns it.
+
+    Online, writes still go to MySQL and the mirror is refreshed after each
+    one; tables are only read locally once sync_mirror() has copied them.
+    Offline, the mirror also takes the writes and supplies the schema, so
+    nothing contacts the MySQL server.
+    """
+    global _mirror
+    # Imported here because the mirror pulls from MySQL through this module's helpers
+    from local_mirror import MIRROR_PATH, LocalMirror
+    mirror = LocalMirror(path or MIRROR_PATH, offline)
+    if offline:
+        install_pool(mirror.pool())
+        set_schema_reader(mirror.read_schemas)
+    _mirror = mirror
+    _cache.clear()
+    return mirror
+
+def get_mirror():
+    """The mirror installed by use_mirror(), or None."""
+    return _mirror
+
+def sync_mirror(table_name=None, full=False, reconcile=False):
+    """Pulls changes from MySQL into the mirror for one table, or every mirrored table.
+
+    A table not mirrored yet is copied in full. With `reconcile` rows edited or
+    deleted elsewhere are found too, by comparing range checksums with MySQL.
+    Returns {table: rows changed}.
+    """
+    if _mirror is None or _mirror.offline:
+        return {}
+    changed = {}
+    for name in ([table_name] if table_name else _mirror.tables()):
+        changed[name] = _mirror.sync_table(get_table_schema(name), full=full, reconcile=reconcile)
+        if changed[name]:
+            _cache.invalidate_table(name)
+    return changed
+
+def _local(table_name):
+    """The mirror if it can answer reads of this table, else None."""
+    if _mirror is not None and (_mirror.offline or _mirror.has_table(table_name)):
+        return _mirror
+    return None
+
+# Callables told about every write, as listener(table_name, keys)
+_write_listeners = []
+
+def add_write_listener(listener):
+    """Calls `listener(table_name, keys)` after every write noted by note_write, from the writing thread.
+
+    Listeners should only record what changed; a slow listener slows every write.
+    """
+    _write_listeners.append(listener)
+
+def note_write(table_name, keys=None):
+    """Drops cached results for a table that was written to and refreshes its mirrored copy.
+
+    `keys` are the values of the table's key column that the write touched,
+    when known; otherwise the mirror syncs the table incrementally. Keys
+    given as form text are typed here, once, for the mirror and every
+    listener. Writes that bypass crud_operations (such as LOAD DATA) must
+    call this too.
+    """
+    if keys is not None:
+        schema = get_table_schema(table_name)
+        keys = [schema.typed_value(schema.key_column, key) for key in keys]
+    _cache.invalidate_table(table_name)
+    _refresh_mirror(table_name, keys)
+    for listener in _write_listeners:
+        try:
+            listener(table_name, keys)
+        except Exception as e:
+            # The write itself went through; a listener must not turn it into a failure
+            print(f"Write listener failed for {table_name}: {e}")
+
+def _refresh_mirror(table_name, keys):
+    if _mirror is None or _mirror.offline or not _mirror.has_table(table_name):
+        return
+    schema = get_table_schema(table_name)
+    try:
+        if keys is not None and len(schema.key_columns) == 1:
+            _mirror.refresh_keys(schema, keys)
+        else:
+            _mirror.sync_table(schema)
+    except Exception:
+        # The write itself went through; read from MySQL until the next sync catches up
+        _mirror.mark_stale(table_name)
+
+def _touched_keys(table_name, where_columns, where_values, set_columns=(), set_values=()):
+    """Keys a write touched, if it matched on the table's single key column, else None."""
+    key_column = get_table_schema(table_name).key_column
+    if list(where_columns) != [key_column]:
+        return None
+    keys = list(where_values)
+    if key_column in set_columns:
+        # Renumbering a row moves it; refresh it under its new key as well
+        keys.append(set_values[list(set_columns).index(key_column)])
+    return keys
+
+def _select(query, params=None, statement_key=None):
+    """Runs a SELECT on a pooled connection and returns (columns, rows).
+
+    With a statement_key the query runs as a cached prepared statement.
+    """
+    with pooled_connection() as conn:
+        if statement_key is None:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            result = cursor.fetchall()
+            columns = [desc[0] for desc in cursor.description]
+            cursor.close()
+        else:
+            cursor = execute_prepared(conn, statement_key, query, params)
+            result = cursor.fetchall()
+            columns = [desc[0] for desc in cursor.description]
     return columns, result
 
+def _cached(table_name, key, load):
+    """Returns the cached result for `key`, else load()'s, shared with identical reads already running."""
+    hit, value = _cache.get(key)
+    if hit:
+        return value
+    version = _cache.version(table_name)
+
+    def run():
+        value = load()
+        _cache.put(table_name, key, value, version)
+        return value
+
+    # The version is part of the flight key: a read started before a write
+    # must not answer a caller that arrived after it
+    return _flights.do((key, version), run)
+
+def _cached_select(table_name, query, params=(), statement_key=None):
+    """Runs a SELECT through the result cache. Results are shared, so treat them as read-only."""
+    return _cached(table_name, (query, tuple(params)), lambda: _select(query, params, statement_key))
+
+@timed("crud.fetch_all_data")
+def fetch_all_data(table_name):
+    """Fetches all data from a specified table as (columns, ColumnarResult).
+
+    Rows are streamed and packed into column arrays a chunk at a time, so the
+    table is never held as a list of row tuples. The result behaves as a
+    read-only sequence of rows and is shared through the cache.
+    """
+    columns = get_table_schema(table_name).columns
+    key = (f"SELECT * FROM {table_name}", ())
+
+    def load():
+        rows = ColumnarResult.from_chunks(columns, stream_rows(table_name, columns, FETCH_CHUNK_SIZE), table_name)
+        return columns, rows
+
+    if _local(table_name) is not None:
+        # Local reads are not cached, but overlapping ones still share a scan
+        return _flights.do(('local', key, _cache.version(table_name)), load)
+    return _cached(table_name, key, load)
+
+def _where_clause(where):
+    """Turns a {column: value} predicate into a bound 'col = %s AND ...' clause and its values."""
+    if not where:
+        # Never let an empty predicate turn into an unconditional UPDATE or DELETE
+        raise ValueError("A WHERE predicate with at least one column is required.")
+    return ' AND '.join(f"{col} = %s" for col in where), list(where.values())
+
+@timed("crud.insert_data")
 def insert_data(table_name, values):
     """Inserts data into a specified table without needing columns explicitly."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    placeholders = ', '.join(['%s'] * len(values))
-    query = f"INSERT INTO {table_name} VALUES ({placeholders})"
-    cursor.execute(query, values)
-    conn.commit()
-    conn.close()
-
-
-def update_data(table_name, set_columns, values, condition):
-    """Updates data in a specified table based on a condition."""
-    conn = create_connection()
-    cursor = conn.cursor()
+    with pooled_connection() as conn:
+        placeholders = ', '.join(['%s'] * len(values))
+        query = f"INSERT INTO {table_name} VALUES ({placeholders})"
+        cursor = execute_prepared(conn, (table_name, 'insert', len(values)), query, list(values))
+        conn.commit()
+    schema = get_table_schema(table_name)
+    key = values[schema.columns.index(schema.key_column)] if len(values) == len(schema.columns) else None
+    if key is None and schema.key_column in schema.auto_increment:
+        key = cursor.lastrowid or None  # The key the server assigned
+    note_write(table_name, None if key is None else [key])
+
+
+@timed("crud.insert_many")
+def insert_many(table_name, columns, rows):
+    """Inserts many rows with one executemany inside a single transaction.
+
+    If the batch is rejected, the rows are retried one by one in the same
+    transaction so a few bad rows do not sink the rest. Returns a list of
+    (row position, error message) for the rows that could not be inserted.
+    """
+    placeholders = ', '.join(['%s'] * len(columns))
+    query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+    errors = []
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        conn.start_transaction()
+        try:
+            cursor.executemany(query, rows)
+        except _data_errors():
+            conn.rollback()
+            conn.start_transaction()
+            for position, row in enumerate(rows):
+                try:
+                    cursor.execute(query, row)
+                except _data_errors() as e:
+                    # MySQL only undoes the failed statement, the transaction carries on
+                    errors.append((position, str(e)))
+        conn.commit()
+        cursor.close()
+    note_write(table_name)
+    return errors
+
+
+@timed("crud.update_data")
+def update_data(table_name, set_columns, values, where):
+    """Updates the rows matching `where`, a {column: value} dict, binding every value."""
+    condition, where_values = _where_clause(where)
     set_string = ', '.join([f"{col} = %s" for col in set_columns])
     query = f"UPDATE {table_name} SET {set_string} WHERE {condition}"
-    cursor.execute(query, values)
-    conn.commit()
-    conn.close()
-
-def delete_data(table_name, condition):
-    """Deletes data from a specified table based on a condition."""
-    conn = create_connection()
-    cursor = conn.cursor()
+    statement_key = (table_name, 'update', tuple(set_columns), tuple(where))
+    with pooled_connection() as conn:
+        execute_prepared(conn, statement_key, query, list(values) + where_values)
+        conn.commit()
+    note_write(table_name, _touched_keys(table_name, list(where), where_values, set_columns, values))
+
+@timed("crud.delete_data")
+def delete_data(table_name, where):
+    """Deletes the rows matching `where`, a {column: value} dict, binding every value."""
+    condition, where_values = _where_clause(where)
     query = f"DELETE FROM {table_name} WHERE {condition}"
-    cursor.execute(query)
-    conn.commit()
-    conn.close()
+    with pooled_connection() as conn:
+        execute_prepared(conn, (table_name, 'delete', tuple(where)), query, where_values)
+        conn.commit()
+    note_write(table_name, _touched_keys(table_name, list(where), where_values))
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+@timed("crud.update_many")
+def update_many(table_name, set_columns, rows, where_columns):
+    """Runs one prepared UPDATE per row, all inside a single transaction.
+
+    Each row holds the SET values followed by the values of `where_columns`,
+    which are matched by equality. If any row fails, the whole batch is rolled back.
+    """
+    condition = ' AND '.join(f"{col} = %s" for col in where_columns)
+    set_string = ', '.join([f"{col} = %s" for col in set_columns])
+    query = f"UPDATE {table_name} SET {set_string} WHERE {condition}"
+    statement_key = (table_name, 'update', tuple(set_columns), tuple(where_columns))
+    with pooled_connection() as conn:
+        conn.start_transaction()
+        try:
+            updated = executemany_prepared(conn, statement_key, query, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    keys = None
+    if len(where_columns) == 1:
+        keys = []
+        for row in rows:
+            keys.extend(_touched_keys(table_name, where_columns, row[-1:], set_columns, row) or [])
+    note_write(table_name, keys or None)
+    return updated
+
+@timed("crud.update_by_keys")
+def update_by_keys(table_name, set_columns, values, key_column, keys, chunk_size=KEY_CHUNK_SIZE):
+    """Sets the same column values on every row whose key is in `keys`.
+
+    Keys are bound in chunks of UPDATE ... WHERE key IN (...), all within one
+    transaction, so a few hundred rows cost a single round-trip. If any chunk
+    fails, the whole batch is rolled back.
+    """
+    set_string = ', '.join([f"{col} = %s" for col in set_columns])
+    updated = 0
+    with pooled_connection() as conn:
+        conn.start_transaction()
+        try:
+            for chunk in _chunks(list(keys), chunk_size):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                query = f"UPDATE {table_name} SET {set_string} WHERE {key_column} IN ({placeholders})"
+                statement_key = (table_name, 'update_in', tuple(set_columns), key_column, len(chunk))
+                updated += execute_prepared(conn, statement_key, query, list(values) + chunk).rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    note_write(table_name, _touched_keys(table_name, [key_column], keys, set_columns, values))
+    return updated
+
+@timed("crud.delete_many")
+def delete_many(table_name, key_column, keys, chunk_size=KEY_CHUNK_SIZE):
+    """Deletes every row whose key is in `keys` with chunked DELETE ... WHERE key IN (...).
+
+    All chunks run in one transaction, which is rolled back if any of them fails.
+    """
+    deleted = 0
+    with pooled_connection() as conn:
+        conn.start_transaction()
+        try:
+            for chunk in _chunks(list(keys), chunk_size):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                query = f"DELETE FROM {table_name} WHERE {key_column} IN ({placeholders})"
+                statement_key = (table_name, 'delete_in', key_column, len(chunk))
+                deleted += execute_prepared(conn, statement_key, query, chunk).rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    note_write(table_name, _touched_keys(table_name, [key_column], keys))
+    return deleted
+
+# Filter operators fetch_page accepts; each compiles to a comparison a B-tree index can serve
+FILTER_OPERATORS = ('=', '<', '<=', '>', '>=', 'between', 'prefix')
+
+def _prefix_pattern(value):
+    """A LIKE pattern matching values that start with `value` literally, for use with ESCAPE '!'."""
+    return str(value).replace('!', '!!').replace('%', '!%').replace('_', '!_') + '%'
+
+def _filter_clause(schema, filters):
+    """Compiles [(column, operator, value)] filters into a bound 'a AND b' clause and its values.
+
+    'between' takes a (low, high) pair, inclusive at both ends; 'prefix' matches
+    the start of a value. Column names are checked against the schema, since
+    they cannot be bound.
+    """
+    clauses = []
+    params = []
+    for column, operator, value in filters:
+        if column not in schema.columns:
+            raise ValueError(f"{schema.name} has no column '{column}'.")
+        if operator == 'between':
+            clauses.append(f"{column} BETWEEN %s AND %s")
+            params.extend(value)
+        elif operator == 'prefix':
+            clauses.append(f"{column} LIKE %s ESCAPE '!'")
+            params.append(_prefix_pattern(value))
+        elif operator in FILTER_OPERATORS:
+            clauses.append(f"{column} {operator} %s")
+            params.append(value)
+        else:
+            raise ValueError(f"Unsupported filter operator '{operator}'.")
+    return ' AND '.join(clauses), params
+
+def _seek_clause(sort_column, key_column, cursor, forward):
+    """Keyset condition for rows after (forward) or before a (sort value, key) cursor.
+
+    Rows are ordered by sort value, then key, with NULL sort values first as
+    MySQL and SQLite both sort them. Written as ORs of plain comparisons so a
+    range scan on the sort column's index can serve it.
+    """
+    value, key = cursor
+    if forward:
+        if value is None:
+            return f"(({sort_column} IS NULL AND {key_column} > %s) OR {sort_column} IS NOT NULL)", [key]
+        return f"({sort_column} > %s OR ({sort_column} = %s AND {key_column} > %s))", [value, value, key]
+    if value is None:
+        return f"({sort_column} IS NULL AND {key_column} < %s)", [key]
+    return (f"({sort_column} < %s OR ({sort_column} = %s AND {key_column} < %s) OR {sort_column} IS NULL)",
+            [value, value, key])
+
+@timed("crud.fetch_page")
+def fetch_page(table_name, key_column, after_key=None, before_key=None, limit=200,
+               order_by=None, descending=False, filters=None):
+    """Fetches one page of rows ordered by key_column using keyset pagination.
+
+    Pass after_key to read the page following a key, or before_key to read the
+    page preceding it. Rows come back in ascending key order.
+
+    A view can instead be sorted by another column (order_by) and/or
+    descending, and narrowed by `filters`, a list of (column, operator, value)
+    with operators from FILTER_OPERATORS. When order_by is another column,
+    after_key and before_key are (sort value, key) cursors taken from the last
+    or first row shown, and rows come back in the view's order.
+    """
+    if order_by is not None or descending or filters:
+        return _fetch_view_page(table_name, key_column, after_key, before_key, limit,
+                                order_by or key_column, descending, filters or [])
+
+    mirror = _local(table_name)
+    if mirror is not None:
+        return mirror.page(table_name, key_column, after_key, before_key, limit)
+
+    params = []
+    if before_key is not None:
+        direction = 'before'
+        query = f"SELECT * FROM {table_name} WHERE {key_column} < %s ORDER BY {key_column} DESC LIMIT %s"
+        params = [before_key, limit]
+    elif after_key is not None:
+        direction = 'after'
+        query = f"SELECT * FROM {table_name} WHERE {key_column} > %s ORDER BY {key_column} LIMIT %s"
+        params = [after_key, limit]
+    else:
+        direction = 'first'
+        query = f"SELECT * FROM {table_name} ORDER BY {key_column} LIMIT %s"
+        params = [limit]
+
+    statement_key = (table_name, 'page', key_column, direction)
+    columns, result = _cached_select(table_name, query, params, statement_key)
+    if before_key is not None:
+        result = result[::-1]
+    return columns, result
+
+def _fetch_view_page(table_name, key_column, after_key, before_key, limit, sort_column, descending, filters):
+    schema = get_table_schema(table_name)
+    if sort_column not in schema.columns:
+        raise ValueError(f"{table_name} has no column '{sort_column}'.")
+
+    clauses = []
+    params = []
+    if filters:
+        clause, params = _filter_clause(schema, filters)
+        clauses.append(clause)
+
+    # Paging toward the end of a descending view walks the ascending order backwards
+    backwards = (before_key is not None) != descending
+    cursor = before_key if before_key is not None else after_key
+    if cursor is not None:
+        if sort_column == key_column:
+            clauses.append(f"{key_column} {'<' if backwards else '>'} %s")
+            params.append(cursor)
+        else:
+            clause, seek_params = _seek_clause(sort_column, key_column, cursor, forward=not backwards)
+            clauses.append(clause)
+            params.extend(seek_params)
+
+    direction = 'DESC' if backwards else 'ASC'
+    order = f"{sort_column} {direction}"
+    if sort_column != key_column:
+        order += f", {key_column} {direction}"
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = f"SELECT * FROM {table_name}{where} ORDER BY {order} LIMIT %s"
+    params.append(limit)
+
+    mirror = _local(table_name)
+    if mirror is not None:
+        columns, result = mirror.select(query, params)
+    else:
+        columns, result = _cached_select(table_name, query, params)
+    if before_key is not None:
+        result = result[::-1]
+    return columns, result
+
+def explain_filters(table_name, filters=(), order_by=None):
+    """Reports which filter and sort columns have no index to serve them.
+
+    Returns {'unindexed': columns not leading any B-tree index, 'full_scan':
+    True if MySQL's EXPLAIN shows a table scan, 'plan': the EXPLAIN rows as
+    dicts}. Against the local mirror only the index check is made.
+    """
+    schema = get_table_schema(table_name)
+    columns = [column for column, _, _ in filters] + ([order_by] if order_by else [])
+    indexed = set(schema.indexed_columns)
+    report = {
+        'unindexed': [column for column in dict.fromkeys(columns) if column not in indexed],
+        'full_scan': False,
+        'plan': [],
+    }
+    if _local(table_name) is not None:
+        return report
+
+    clause, params = _filter_clause(schema, filters) if filters else ('', [])
+    query = f"EXPLAIN SELECT * FROM {table_name}"
+    if clause:
+        query += f" WHERE {clause}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    plan_columns, plan_rows = _select(query + " LIMIT 200", params)
+    report['plan'] = [dict(zip(plan_columns, row)) for row in plan_rows]
+    report['full_scan'] = any(step.get('type') == 'ALL' for step in report['plan'])
+    return report
+
+def stream_rows(table_name, columns, chunk_size=1000, from_server=False):
+    """Yields the rows of a table in chunks without holding the whole table in memory.
+
+    The query runs on an unbuffered cursor, so rows stay on the server until
+    each fetchmany() asks for the next chunk. The connection is borrowed for as
+    long as the generator is alive. from_server=True reads MySQL even for a
+    mirrored table, as the mirror itself does to copy one.
+    """
+    mirror = None if from_server else _local(table_name)
+    if mirror is not None:
+        yield from mirror.stream(table_name, columns, chunk_size)
+        return
+    yield from _stream_query(f"SELECT {', '.join(columns)} FROM {table_name}", (), chunk_size)
+
+def _stream_query(query, params=(), chunk_size=1000):
+    """Yields the rows of a MySQL query in chunks from an unbuffered cursor."""
+    pool = get_pool()
+    conn = pool.acquire()
+    finished = False
+    try:
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+        cursor.close()
+        finished = True
+    finally:
+        # An abandoned unbuffered result would break the next query on this connection
+        pool.release(conn, discard=not finished)
+
+@timed("crud.estimate_row_count")
+def estimate_row_count(table_name):
+    """Returns the server's row estimate for a table without counting it."""
+    mirror = _local(table_name)
+    if mirror is not None:
+        return mirror.count(table_name)  # Counting locally is cheap and exact
+    query = """
+        SELECT TABLE_ROWS FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """
+    _, rows = _select(query, [table_name])
+    return rows[0][0] if rows and rows[0][0] is not None else None
+
+@timed("crud.fetch_rows")
+def fetch_rows(table_name, key_column, keys, chunk_size=KEY_CHUNK_SIZE):
+    """Fetches the rows with the given keys; keys that no longer exist are simply absent."""
+    mirror = _local(table_name)
+    if mirror is not None:
+        return mirror.rows_by_keys(table_name, key_column, keys)
+    rows = []
+    for chunk in _chunks(list(keys), chunk_size):
+        placeholders = ', '.join(['%s'] * len(chunk))
+        query = f"SELECT * FROM {table_name} WHERE {key_column} IN ({placeholders})"
+        rows.extend(_select(query, chunk, (table_name, 'rows', key_column, len(chunk)))[1])
+    return rows
+
+def row_checksum_sql(schema):
+    """SQL for a CRC32 of a whole row, as fetch_checksums computes it on the server."""
+    # CONCAT_WS skips NULLs, so each value is preceded by its NULL flag to tell NULL from ''
+    values = ', '.join(f"ISNULL({col}), {col}" for col in schema.columns)
+    return f"CRC32(CONCAT_WS(CHAR(31), {values}))"
+
+@timed("crud.fetch_checksums")
+def fetch_checksums(table_name, key_column, low_key, high_key, from_server=False):
+    """Returns {key: checksum of the row} for the rows with keys between low_key and high_key.
+
+    The range is read through the key index and only checksums cross the
+    wire, so comparing a window of rows with an earlier poll stays cheap.
+    from_server=True reads MySQL even for a mirrored table.
+    """
+    mirror = None if from_server else _local(table_name)
+    if mirror is not None:
+        return mirror.checksums(table_name, key_column, low_key, high_key)
+    schema = get_table_schema(table_name)
+    query = (f"SELECT {key_column}, {row_checksum_sql(schema)} FROM {table_name} "
+             f"WHERE {key_column} BETWEEN %s AND %s")
+    _, rows = _select(query, [low_key, high_key], (table_name, 'checksums', key_column))
+    return dict(rows)
+
+@timed("crud.fetch_max_key")
+def fetch_max_key(table_name, key_column):
+    """Returns the highest key in a table, or None if it is empty; a single index lookup."""
+    mirror = _local(table_name)
+    if mirror is not None:
+        return mirror.max_key(table_name, key_column)
+    query = f"SELECT MAX({key_column}) FROM {table_name}"
+    _, rows = _select(query, (), (table_name, 'max_key', key_column))
+    return rows[0][0]
+
+def data_version(table_name):
+    """A counter that changes with every write to the table made through this module."""
+    return _cache.version(table_name)
+
+@timed("crud.count_rows")
+def count_rows(table_name):
+    """Counts a table's rows exactly; unlike estimate_row_count this scans, so keep it to small tables."""
+    mirror = _local(table_name)
+    if mirror is not None:
+        return mirror.count(table_name)
+    _, rows = _select(f"SELECT COUNT(*) FROM {table_name}", (), (table_name, 'count'))
+    return rows[0][0]
+
+@timed("crud.fetch_key_labels")
+def fetch_key_labels(table_name, key_column, label_columns, after_key=None):
+    """Returns (key, *label values) rows in key order, only those past after_key if given.
+
+    Reads just the columns a lookup list needs instead of whole rows.
+    """
+    mirror = _local(table_name)
+    if mirror is not None:
+        return mirror.key_labels(table_name, key_column, label_columns, after_key)
+    columns = ', '.join([key_column] + list(label_columns))
+    if after_key is None:
+        query = f"SELECT {columns} FROM {table_name} ORDER BY {key_column}"
+        params = []
+    else:
+        query = f"SELECT {columns} FROM {table_name} WHERE {key_column} > %s ORDER BY {key_column}"
+        params = [after_key]
+    statement_key = (table_name, 'key_labels', key_column, tuple(label_columns), after_key is None)
+    return _select(query, params, statement_key)[1]
+
+def _escape_like(term):
+    """Escapes LIKE wildcards so the term is matched literally."""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+@timed("crud.search_data")
+def search_data(table_name, search_term, limit=SEARCH_LIMIT):
+    """Searches a table on the server and returns at most `limit` matching rows.
+
+    FULLTEXT indexes are matched word by word as prefixes, indexed text columns
+    with a LIKE prefix and indexed integer columns (such as IDs) by equality.
+    Each of these runs as its own limited SELECT, combined with UNION, because
+    MySQL cannot use an index for a condition inside an OR with a MATCH.
+    """
+    schema = get_table_schema(table_name)
+    term = search_term.strip()
+    mirror = _local(table_name)
+    if mirror is not None:
+        return mirror.search(schema, term, limit)
+
+    branches = []       # (condition, params), each served by one index
+
+    words = [word for word in re.split(r'\W+', term) if word]
+    for columns in schema.fulltext_indexes:
+        if words:
+            branches.append((f"MATCH({', '.join(columns)}) AGAINST (%s IN BOOLEAN MODE)",
+                             [' '.join(f"+{word}*" for word in words)]))
+
+    fulltext_columns = {col for columns in schema.fulltext_indexes for col in columns}
+    prefix_columns = [col for col in schema.indexed_columns if schema.is_text(col) and col not in fulltext_columns]
+    pattern = _escape_like(term) + '%'
+    if not branches and not prefix_columns:
+        # Nothing indexed to search on; one scan prefix matching every text column is the best we can do
+        text_columns = [col for col in schema.columns if schema.is_text(col)]
+        if text_columns:
+            branches.append((' OR '.join(f"{col} LIKE %s" for col in text_columns), [pattern] * len(text_columns)))
+    for column in dict.fromkeys(prefix_columns):
+        branches.append((f"{column} LIKE %s", [pattern]))
+
+    if term.isdigit():
+        for column in dict.fromkeys(schema.indexed_columns):
+            if schema.is_integer(column):
+                branches.append((f"{column} = %s", [int(term)]))
+
+    if not branches:
+        return list(schema.columns), []
+
+    if len(branches) == 1:
+        condition, params = branches[0]
+        return _cached_select(table_name, f"SELECT * FROM {table_name} WHERE {condition} LIMIT %s", params + [limit])
+
+    # UNION also drops rows found by more than one branch
+    query = ' UNION '.join(f"(SELECT * FROM {table_name} WHERE {condition} LIMIT %s)" for condition, _ in branches)
+    query += " LIMIT %s"
+    params = [value for _, branch_params in branches for value in branch_params + [limit]]
+    params.append(limit)
+    return _cached_select(table_name, query, params)
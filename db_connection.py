@@ -1,11 +1,214 @@
-import mysql.connector
+import threading
+import time
+from contextlib import contextmanager
+
+from prepared_statements import forget_connection
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',  # Replace with your DB username
+    'password': 'MySQLpassword4321',  # Replace with your DB password
+    'database': 'LibraryDB',
+}
+
+# Pool tuning
+POOL_SIZE = 5                  # Maximum number of open connections
+POOL_TIMEOUT = 10              # Seconds to wait for a free connection
+POOL_IDLE_TIMEOUT = 300        # Close connections idle for longer than this
+POOL_HEALTH_CHECK_AFTER = 30   # Ping connections idle for longer than this before reuse
+
+def driver():
+    """Returns the mysql.connector module, importing it on first use.
+
+    The driver takes most of the app's import time, so it is only loaded when
+    the first connection is opened, on a worker thread after the window is up.
+    """
+    import mysql.connector
+    return mysql.connector
+
+def _connection_errors():
+    """Errors that mean the connection itself is broken and must not go back to the pool."""
+    errors = driver().errors
+    return (errors.InterfaceError, errors.OperationalError)
 
 def create_connection():
     """Establishes a connection to the MySQL database."""
-    connection = mysql.connector.connect(
-        host='localhost',
-        user='root',  # Replace with your DB username
-        password='MySQLpassword4321',  # Replace with your DB password
-        database='LibraryDB'
-    )
+    connection = driver().connect(**DB_CONFIG)
     return connection
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class ConnectionPool:
+    """A small thread-safe pool of reusable MySQL connections."""
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 idle_timeout=POOL_IDLE_TIMEOUT, health_check_after=POOL_HEALTH_CHECK_AFTER):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self._idle = []          # (connection, last_used) pairs, most recently used last
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Borrows a connection, opening or reviving one if needed."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed.")
+                self._evict_idle()
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._in_use < self.size:
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"No database connection available after {self.timeout}s.")
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        # Connect and health-check outside the lock so other threads are not blocked
+        try:
+            if conn is None:
+                conn = create_connection()
+            elif time.monotonic() - last_used > self.health_check_after and not self._is_alive(conn):
+                # Reconnect with a fresh connection object so nothing tied to the dead session survives
+                self._close_quietly(conn)
+                conn = None
+                conn = create_connection()
+        except Exception:
+            self._discard(conn)
+            raise
+        return conn
+
+    def release(self, conn, discard=False):
+        """Returns a borrowed connection to the pool, or closes it if it is broken."""
+        if not discard:
+            try:
+                # Never hand the next borrower a half-finished transaction
+                if conn.in_transaction:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        if discard:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._in_use -= 1
+            if self._closed:
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close(self):
+        """Closes every idle connection and refuses further borrowing."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Returns a snapshot of the pool's occupancy."""
+        with self._cond:
+            return {'size': self.size, 'in_use': self._in_use, 'idle': len(self._idle)}
+
+    def _discard(self, conn):
+        if conn is not None:
+            self._close_quietly(conn)
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify()
+
+    def _evict_idle(self):
+        """Closes connections that have sat idle past the idle timeout. Caller holds the lock."""
+        cutoff = time.monotonic() - self.idle_timeout
+        stale = [conn for conn, last_used in self._idle if last_used < cutoff]
+        if stale:
+            self._idle = [(conn, last_used) for conn, last_used in self._idle if last_used >= cutoff]
+            for conn in stale:
+                self._close_quietly(conn)
+
+    @staticmethod
+    def _is_alive(conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        forget_connection(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Returns the shared connection pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
+
+def configure_pool(**options):
+    """Replaces the shared pool with one built from the given options (size, timeout, ...)."""
+    global _pool
+    with _pool_lock:
+        old_pool, _pool = _pool, ConnectionPool(**options)
+    if old_pool is not None:
+        old_pool.close()
+    return _pool
+
+def install_pool(pool):
+    """Replaces the shared pool with a ready-made one, such as the local mirror's offline pool."""
+    global _pool
+    with _pool_lock:
+        old_pool, _pool = _pool, pool
+    if old_pool is not None:
+        old_pool.close()
+    return pool
+
+def close_pool():
+    """Closes the shared pool; a new one is created on the next borrow."""
+    global _pool
+    with _pool_lock:
+        old_pool, _pool = _pool, None
+    if old_pool is not None:
+        old_pool.close()
+
+@contextmanager
+def pooled_connection():
+    """Borrows a connection from the shared pool for the duration of a with-block."""
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    except _connection_errors():
+        # The connection is likely dead; drop it so the next borrow reconnects
+        pool.release(conn, discard=True)
+        raise
+    except BaseException:
+        pool.release(conn)
+        raise
+    else:
+        pool.release(conn)
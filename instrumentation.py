@@ -0,0 +1,202 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+from columnar import ColumnarResult
+from result_cache import estimate_size
+
+# Latency histogram bucket upper bounds, in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf'))
+
+# Rows sampled when estimating the size of a large result
+_SIZE_SAMPLE = 100
+
+_enabled = os.environ.get('LIBMAN_METRICS', '') not in ('', '0')
+_slow_ms = float(os.environ.get('LIBMAN_SLOW_MS', 250))
+_log_path = os.environ.get('LIBMAN_METRICS_LOG', 'libman_metrics.log')
+_log_file = None
+_metrics = {}
+_lock = threading.Lock()
+_NO_SPAN = nullcontext()
+
+
+class OperationStats:
+    """Aggregated timings for one named operation."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow = 0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def add(self, elapsed_ms, rows, size, failed):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.slow += elapsed_ms >= _slow_ms
+        self.errors += failed
+        self.rows += rows or 0
+        self.bytes += size or 0
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                break
+
+    def percentile(self, fraction):
+        """Upper bound, in ms, of the histogram bucket holding the given percentile."""
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if count and seen >= target:
+                return bound if bound != float('inf') else self.max_ms
+        return 0.0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': round(self.max_ms, 3),
+            'slow': self.slow,
+            'errors': self.errors,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'histogram_ms': {str(bound): count for bound, count in zip(BUCKETS_MS, self.buckets) if count},
+        }
+
+
+def configure(enabled=None, slow_ms=None, log_path=None):
+    """Turns metrics on or off and sets the slow-operation threshold and log file."""
+    global _enabled, _slow_ms, _log_path, _log_file
+    with _lock:
+        if slow_ms is not None:
+            _slow_ms = float(slow_ms)
+        if log_path is not None and log_path != _log_path:
+            if _log_file is not None:
+                _log_file.close()
+                _log_file = None
+            _log_path = log_path
+        if enabled is not None:
+            _enabled = enabled
+
+def is_enabled():
+    return _enabled
+
+def _result_shape(result):
+    """Guesses (rows, bytes) for a (columns, rows) result; (None, None) for anything else."""
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], ColumnarResult):
+        return len(result[1]), result[1].nbytes()
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], list):
+        rows = result[1]
+        if len(rows) <= _SIZE_SAMPLE:
+            return len(rows), estimate_size(rows)
+        # Sizing every row of a big result would cost more than the query; extrapolate a sample
+        sample = estimate_size(rows[:_SIZE_SAMPLE])
+        return len(rows), sample * len(rows) // _SIZE_SAMPLE
+    if isinstance(result, list):
+        return len(result), None
+    return None, None
+
+def record(name, elapsed_ms, rows=None, size=None, failed=False, **details):
+    """Adds one timing to the metrics and logs it as a JSON line."""
+    global _log_file
+    with _lock:
+        stats = _metrics.get(name)
+        if stats is None:
+            stats = _metrics[name] = OperationStats()
+        stats.add(elapsed_ms, rows, size, failed)
+
+        entry = {'ts': round(time.time(), 3), 'op': name, 'ms': round(elapsed_ms, 3)}
+        if rows is not None:
+            entry['rows'] = rows
+        if size is not None:
+            entry['bytes'] = size
+        if failed:
+            entry['failed'] = True
+        if elapsed_ms >= _slow_ms:
+            entry['slow'] = True
+        entry.update(details)
+        try:
+            if _log_file is None:
+                _log_file = open(_log_path, 'a', encoding='utf-8')
+            _log_file.write(json.dumps(entry, default=str) + '\n')
+            _log_file.flush()
+        except OSError:
+            pass  # Metrics must never break the operation being measured
+
+def timed(name):
+    """Decorator that records the latency, row count and size of each call.
+
+    When metrics are disabled the wrapper costs one flag check per call.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                record(name, (time.perf_counter() - start) * 1000, failed=True)
+                raise
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            rows, size = _result_shape(result)
+            table = args[0] if args and isinstance(args[0], str) else None
+            if table is not None:
+                record(name, elapsed_ms, rows, size, table=table)
+            else:
+                record(name, elapsed_ms, rows, size)
+            return result
+        return wrapper
+    return decorator
+
+
+class _Span:
+    def __init__(self, name, rows, details):
+        self.name = name
+        self.rows = rows
+        self.details = details
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, (time.perf_counter() - self.start) * 1000, self.rows,
+               failed=exc_type is not None, **self.details)
+        return False
+
+def span(name, rows=None, **details):
+    """Context manager timing a block, e.g. a UI build; a shared no-op when disabled."""
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(name, rows, details)
+
+def get_metrics():
+    """Returns a snapshot of every operation's aggregated stats."""
+    with _lock:
+        return {name: stats.as_dict() for name, stats in sorted(_metrics.items())}
+
+def dump_metrics(path=None):
+    """Returns the metrics as a JSON string, also writing them to `path` if given."""
+    payload = {'generated': time.strftime('%Y-%m-%dT%H:%M:%S'), 'slow_ms': _slow_ms, 'operations': get_metrics()}
+    text = json.dumps(payload, indent=2)
+    if path is not None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return text
+
+def reset_metrics():
+    """Clears every recorded timing."""
+    with _lock:
+        _metrics.clear()
@@ -0,0 +1,641 @@
+import datetime
+import decimal
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+
+from crud_operations import (KEY_CHUNK_SIZE, _chunks, _escape_like, _select as _remote_select, _stream_query,
+                             fetch_checksums, row_checksum_sql, stream_rows)
+from db_connection import driver
+from schema_catalog import TableSchema
+
+MIRROR_PATH = os.environ.get('LIBMAN_MIRROR_PATH', 'libman_mirror.sqlite3')
+
+# Rows pulled from MySQL and written locally per transaction while syncing
+SYNC_CHUNK_SIZE = 2000
+
+# Keys per range when reconcile syncs compare a table with MySQL by range checksums
+RECONCILE_RANGE_SIZE = 1000
+
+# Column names (compared case-insensitively) that hold a last-modified timestamp
+UPDATED_AT_COLUMNS = ('updatedat', 'updated_at', 'lastupdated', 'last_updated', 'modifiedat', 'modified_at')
+
+_TIMESTAMP_TYPES = ('datetime', 'timestamp')
+
+# MySQL data type -> declared SQLite type; the declared type picks the converter on the way out
+_SQLITE_TYPES = {
+    'tinyint': 'INTEGER', 'smallint': 'INTEGER', 'mediumint': 'INTEGER', 'int': 'INTEGER', 'bigint': 'INTEGER',
+    'year': 'INTEGER', 'bit': 'INTEGER',
+    'float': 'REAL', 'double': 'REAL',
+    'decimal': 'DECIMAL',
+    'date': 'DATE', 'datetime': 'DATETIME', 'timestamp': 'DATETIME',
+    'blob': 'BLOB', 'tinyblob': 'BLOB', 'mediumblob': 'BLOB', 'longblob': 'BLOB',
+    'binary': 'BLOB', 'varbinary': 'BLOB',
+}
+
+sqlite3.register_adapter(decimal.Decimal, str)
+sqlite3.register_adapter(datetime.date, datetime.date.isoformat)
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(datetime.timedelta, str)
+sqlite3.register_converter('DECIMAL', lambda raw: decimal.Decimal(raw.decode()))
+sqlite3.register_converter('DATE', lambda raw: datetime.date.fromisoformat(raw.decode()))
+sqlite3.register_converter('DATETIME', lambda raw: datetime.datetime.fromisoformat(raw.decode()))
+
+_STATE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS _mirror_tables (
+        table_name TEXT PRIMARY KEY,
+        schema_json TEXT NOT NULL,
+        watermark_column TEXT,
+        watermark TEXT,
+        synced_at REAL
+    )
+"""
+
+# Server-side checksum of every mirrored row (row_checksum_sql), for tables with a single-column key
+_CHECKSUM_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS _mirror_checksums (
+        table_name TEXT NOT NULL,
+        key_value NOT NULL,
+        checksum INTEGER NOT NULL,
+        PRIMARY KEY (table_name, key_value)
+    ) WITHOUT ROWID
+"""
+
+
+class OfflineError(Exception):
+    """Raised when an operation needs the MySQL server but the mirror is offline."""
+
+
+def _schema_to_json(schema):
+    return json.dumps({
+        'name': schema.name,
+        'columns': schema.columns,
+        'types': schema.types,
+        'nullable': schema.nullable,
+        'auto_increment': sorted(schema.auto_increment),
+        'primary_key': schema.primary_key,
+        'foreign_keys': schema.foreign_keys,
+        'indexes': schema.indexes,
+    })
+
+def _schema_from_json(text):
+    data = json.loads(text)
+    schema = TableSchema(data['name'])
+    schema.columns = data['columns']
+    schema.types = data['types']
+    schema.nullable = data['nullable']
+    schema.auto_increment = set(data['auto_increment'])
+    schema.primary_key = data['primary_key']
+    schema.foreign_keys = {col: tuple(ref) for col, ref in data['foreign_keys'].items()}
+    schema.indexes = {name: (index_type, columns) for name, (index_type, columns) in data['indexes'].items()}
+    return schema
+
+def _watermark_column(schema):
+    """An updated-at column if the table has one, else an integer primary key, else None."""
+    for column in schema.columns:
+        if column.lower() in UPDATED_AT_COLUMNS and schema.types.get(column) in _TIMESTAMP_TYPES:
+            return column
+    if len(schema.primary_key) == 1 and schema.is_integer(schema.primary_key[0]):
+        return schema.primary_key[0]
+    return None
+
+
+class LocalMirror:
+    """A local SQLite copy of LibraryDB tables that serves reads without a round-trip.
+
+    Each table is pulled from MySQL once and then kept current by incremental
+    syncs: rows past the table's watermark (its updated-at column, or else its
+    integer primary key) are fetched and upserted. Edits and deletions made
+    elsewhere are found by reconcile syncs, which compare per-range checksums
+    of the key space with those of the rows last pulled and re-read only the
+    ranges that differ. Writes made through crud_operations go to MySQL and
+    refresh the affected rows here; while a sync is running they are queued
+    for it instead of waiting, and reads of the table go to MySQL meanwhile.
+
+    With offline=True the mirror never contacts MySQL: it serves reads and
+    takes writes itself, using the schema stored by earlier syncs. This makes
+    it usable as a self-contained backend for testing.
+    """
+
+    def __init__(self, path=MIRROR_PATH, offline=False):
+        self.path = path
+        self.offline = offline
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+        self._stale = set()
+        self._queue_lock = threading.Lock()
+        self._queued = {}               # table -> (schema, keys) written while a sync held _sync_lock
+        conn = self._connection()
+        conn.execute(_STATE_SCHEMA)
+        conn.execute(_CHECKSUM_SCHEMA)
+
+    def _connection(self):
+        """This thread's SQLite connection; SQLite connections must not be shared across threads."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES, isolation_level=None)
+            # WAL lets readers carry on while a sync is writing
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -- metadata ---------------------------------------------------------
+
+    def read_schemas(self, table_name=None):
+        """Schemas stored by earlier syncs, as schema_catalog would read them from the server."""
+        query = "SELECT schema_json FROM _mirror_tables"
+        params = ()
+        if table_name is not None:
+            query += " WHERE table_name = ?"
+            params = (table_name,)
+        schemas = [_schema_from_json(text) for (text,) in self._connection().execute(query, params)]
+        return {schema.name: schema for schema in schemas}
+
+    def has_table(self, table_name):
+        """True if reads of the table can be served locally."""
+        if table_name in self._stale or table_name in self._queued:
+            return False
+        row = self._connection().execute(
+            "SELECT synced_at FROM _mirror_tables WHERE table_name = ?", (table_name,)
+        ).fetchone()
+        return row is not None and row[0] is not None
+
+    def tables(self):
+        return [name for (name,) in self._connection().execute(
+            "SELECT table_name FROM _mirror_tables WHERE synced_at IS NOT NULL ORDER BY table_name"
+        )]
+
+    def mark_stale(self, table_name):
+        """Sends reads of a table back to MySQL until its next successful sync."""
+        self._stale.add(table_name)
+
+    def _state(self, table_name):
+        return self._connection().execute(
+            "SELECT schema_json, watermark_column, watermark FROM _mirror_tables WHERE table_name = ?",
+            (table_name,),
+        ).fetchone()
+
+    def _create_table(self, conn, schema):
+        columns = ', '.join(f"{col} {_SQLITE_TYPES.get(schema.types.get(col), 'TEXT')}" for col in schema.columns)
+        key = f", PRIMARY KEY ({', '.join(schema.primary_key)})" if schema.primary_key else ''
+        conn.execute(f"DROP TABLE IF EXISTS {schema.name}")
+        conn.execute(f"CREATE TABLE {schema.name} ({columns}{key})")
+        conn.execute("DELETE FROM _mirror_checksums WHERE table_name = ?", (schema.name,))
+        # Mirror the server's B-tree indexes so local searches and filters can seek too
+        for index_name, (index_type, index_columns) in schema.indexes.items():
+            if index_type != 'FULLTEXT' and index_name != 'PRIMARY':
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {schema.name}_{index_name} ON {schema.name} ({', '.join(index_columns)})"
+                )
+
+    # -- syncing ----------------------------------------------------------
+
+    @staticmethod
+    def _remote_select_sql(schema):
+        """SELECT of a table's columns followed by the row checksum, as _upsert() expects them."""
+        return f"SELECT {', '.join(schema.columns)}, {row_checksum_sql(schema)} FROM {schema.name}"
+
+    def _remote_rows(self, query, params=()):
+        """Yields row chunks of a MySQL query, read from an unbuffered cursor."""
+        if self.offline:
+            raise OfflineError("The local mirror is offline.")
+        return _stream_query(query, params, SYNC_CHUNK_SIZE)
+
+    def _upsert(self, conn, schema, rows):
+        """Writes rows read with _remote_columns(), i.e. followed by their checksum."""
+        width = len(schema.columns)
+        placeholders = ', '.join(['?'] * width)
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {schema.name} ({', '.join(schema.columns)}) VALUES ({placeholders})",
+            [row[:width] for row in rows],
+        )
+        if len(schema.key_columns) == 1:
+            position = schema.columns.index(schema.key_column)
+            conn.executemany(
+                "INSERT OR REPLACE INTO _mirror_checksums (table_name, key_value, checksum) VALUES (?, ?, ?)",
+                [(schema.name, row[position], row[width]) for row in rows],
+            )
+
+    def sync_table(self, schema, full=False, reconcile=False):
+        """Brings the local copy of a table up to date and returns the number of rows changed.
+
+        `schema` is the table's current TableSchema from the server. A table
+        seen for the first time, one whose columns changed, or full=True gets a
+        complete copy; otherwise only rows past the watermark are pulled.
+        reconcile=True also finds rows edited or deleted elsewhere, by range
+        checksums where the key is an integer and by key sets otherwise.
+        """
+        table_name = schema.name
+        schema_json = _schema_to_json(schema)
+        with self._sync_lock:
+            conn = self._connection()
+            state = self._state(table_name)
+            watermark_column = _watermark_column(schema)
+            if full or state is None or state[0] != schema_json or state[1] != watermark_column:
+                changed = self._copy_table(conn, schema, schema_json, watermark_column)
+            else:
+                changed = self._pull_changes(conn, schema, watermark_column, json.loads(state[2] or 'null'))
+                if reconcile and len(schema.key_columns) == 1 and schema.is_integer(schema.key_column):
+                    changed += self._reconcile_ranges(conn, schema, schema_json, watermark_column)
+                elif reconcile:
+                    changed += self._reconcile_keys(conn, schema)
+            conn.execute("UPDATE _mirror_tables SET synced_at = ? WHERE table_name = ?", (time.time(), table_name))
+            self._stale.discard(table_name)
+        # Writes made while the lock was held queued their keys for whoever holds it next
+        self._apply_queued()
+        return changed
+
+    def _copy_table(self, conn, schema, schema_json, watermark_column):
+        """Replaces the local table with a complete copy, in one transaction so readers never see half of it."""
+        if self.offline:
+            raise OfflineError("The local mirror is offline.")
+        position = schema.columns.index(watermark_column) if watermark_column is not None else None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._create_table(conn, schema)
+            copied = 0
+            watermark = None
+            columns = schema.columns + [row_checksum_sql(schema)]
+            for rows in stream_rows(schema.name, columns, SYNC_CHUNK_SIZE, from_server=True):
+                self._upsert(conn, schema, rows)
+                copied += len(rows)
+                if position is not None:
+                    highest = max((row[position] for row in rows if row[position] is not None), default=None)
+                    if highest is not None and (watermark is None or highest > watermark):
+                        watermark = highest
+            conn.execute(
+                "INSERT OR REPLACE INTO _mirror_tables (table_name, schema_json, watermark_column, watermark, synced_at) "
+                "VALUES (?, ?, ?, ?, NULL)",
+                (schema.name, schema_json, watermark_column, json.dumps(watermark, default=str)),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return copied
+
+    def _pull_changes(self, conn, schema, watermark_column, watermark):
+        """Upserts rows past the watermark, advancing it after every committed chunk."""
+        if watermark_column is None:
+            return 0
+        # Updated-at values can repeat, so re-read the watermark itself; upserts make that harmless
+        operator = '>' if watermark_column in schema.primary_key else '>='
+        query = self._remote_select_sql(schema)
+        params = ()
+        if watermark is not None:
+            query += f" WHERE {watermark_column} {operator} %s"
+            params = (watermark,)
+        query += f" ORDER BY {watermark_column}"
+
+        position = schema.columns.index(watermark_column)
+        pulled = 0
+        for rows in self._remote_rows(query, params):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._upsert(conn, schema, rows)
+                conn.execute(
+                    "UPDATE _mirror_tables SET watermark = ? WHERE table_name = ?",
+                    (json.dumps(rows[-1][position], default=str), schema.name),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            pulled += len(rows)
+        return pulled
+
+    def _reconcile_ranges(self, conn, schema, schema_json, watermark_column):
+        """Re-reads the rows of key ranges whose checksums differ from MySQL's; returns the rows changed.
+
+        One grouped query returns a row count and checksum sum per range of
+        RECONCILE_RANGE_SIZE keys. Only ranges that differ from the checksums
+        stored with the rows are compared row by row with fetch_checksums,
+        and only rows that differ there are read again.
+        """
+        key_column = schema.key_column
+        _, rows = _remote_select(
+            f"SELECT FLOOR({key_column} / %s), COUNT(*), SUM({row_checksum_sql(schema)}) "
+            f"FROM {schema.name} GROUP BY 1",
+            [RECONCILE_RANGE_SIZE],
+        )
+        remote = {int(bucket): (count, int(total or 0)) for bucket, count, total in rows}
+        local = defaultdict(lambda: (0, 0))
+        for key, checksum in conn.execute(
+                "SELECT key_value, checksum FROM _mirror_checksums WHERE table_name = ?", (schema.name,)):
+            count, total = local[key // RECONCILE_RANGE_SIZE]
+            local[key // RECONCILE_RANGE_SIZE] = (count + 1, total + checksum)
+        if remote and not local:
+            # Copied before checksums were kept; one fresh copy stores them
+            return self._copy_table(conn, schema, schema_json, watermark_column)
+
+        changed = []
+        for bucket in sorted(set(remote) | set(local)):
+            if remote.get(bucket, (0, 0)) == local.get(bucket, (0, 0)):
+                continue
+            low = bucket * RECONCILE_RANGE_SIZE
+            high = low + RECONCILE_RANGE_SIZE - 1
+            theirs = fetch_checksums(schema.name, key_column, low, high, from_server=True)
+            ours = dict(conn.execute(
+                "SELECT key_value, checksum FROM _mirror_checksums WHERE table_name = ? AND key_value BETWEEN ? AND ?",
+                (schema.name, low, high),
+            ))
+            changed.extend(key for key in theirs.keys() | ours.keys() if theirs.get(key) != ours.get(key))
+        if changed:
+            self._refresh(conn, schema, changed)
+        return len(changed)
+
+    def _reconcile_keys(self, conn, schema):
+        """Deletes rows that are gone from MySQL and fetches rows missing here, comparing key sets."""
+        key_columns = schema.key_columns
+        keys = ', '.join(key_columns)
+        conn.execute("DROP TABLE IF EXISTS temp._remote_keys")
+        conn.execute(f"CREATE TEMP TABLE _remote_keys ({keys}, PRIMARY KEY ({keys}))")
+        try:
+            for rows in self._remote_rows(f"SELECT {keys} FROM {schema.name}"):
+                conn.executemany(
+                    f"INSERT INTO _remote_keys VALUES ({', '.join(['?'] * len(key_columns))})", rows
+                )
+            match = ' AND '.join(f"r.{col} = {schema.name}.{col}" for col in key_columns)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                deleted = conn.execute(
+                    f"DELETE FROM {schema.name} WHERE NOT EXISTS (SELECT 1 FROM _remote_keys r WHERE {match})"
+                ).rowcount
+                if deleted and len(key_columns) == 1:
+                    conn.execute(
+                        f"DELETE FROM _mirror_checksums WHERE table_name = ? AND key_value NOT IN "
+                        f"(SELECT {key_columns[0]} FROM {schema.name})",
+                        (schema.name,),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            missing = conn.execute(
+                f"SELECT {', '.join('r.' + col for col in key_columns)} FROM _remote_keys r "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {schema.name} WHERE {match})"
+            ).fetchall()
+        finally:
+            conn.execute("DROP TABLE IF EXISTS temp._remote_keys")
+
+        if missing and len(key_columns) == 1:
+            self._refresh(conn, schema, [key for (key,) in missing])
+        elif missing:
+            # Rare, and only for composite-key tables: take a fresh copy instead
+            self._copy_table(conn, schema, _schema_to_json(schema), _watermark_column(schema))
+        return deleted + len(missing)
+
+    def _refresh(self, conn, schema, keys):
+        """Re-reads the given keys from MySQL: found rows are upserted, missing ones deleted locally."""
+        key_column = schema.key_column
+        position = schema.columns.index(key_column)
+        keys = list(dict.fromkeys(keys))
+        for chunk in _chunks(keys, KEY_CHUNK_SIZE):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            found = []
+            query = f"{self._remote_select_sql(schema)} WHERE {key_column} IN ({placeholders})"
+            for rows in self._remote_rows(query, chunk):
+                found.extend(rows)
+            gone = set(chunk) - {row[position] for row in found}
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._upsert(conn, schema, found)
+                if gone:
+                    placeholders = ', '.join(['?'] * len(gone))
+                    conn.execute(f"DELETE FROM {schema.name} WHERE {key_column} IN ({placeholders})", list(gone))
+                    conn.execute(
+                        f"DELETE FROM _mirror_checksums WHERE table_name = ? AND key_value IN ({placeholders})",
+                        [schema.name] + list(gone),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def refresh_keys(self, schema, keys):
+        """Pulls the current state of specific rows after they were written through MySQL.
+
+        If a sync holds the lock the keys are queued for it rather than waited
+        on, and reads of the table go to MySQL until they are applied.
+        """
+        if self._state(schema.name) is None:
+            return
+        with self._queue_lock:
+            self._queued.setdefault(schema.name, (schema, set()))[1].update(keys)
+        self._apply_queued()
+
+    def _apply_queued(self):
+        """Refreshes queued keys unless another thread holds the sync lock; it applies them when done."""
+        while self._queued:
+            if not self._sync_lock.acquire(blocking=False):
+                return
+            try:
+                with self._queue_lock:
+                    queued, self._queued = self._queued, {}
+                conn = self._connection()
+                while queued:
+                    table_name, (schema, keys) = next(iter(queued.items()))
+                    try:
+                        self._refresh(conn, schema, keys)
+                    except BaseException:
+                        # Keep what is left, and those tables' reads on MySQL, for the next attempt
+                        with self._queue_lock:
+                            for name, (schema, keys) in queued.items():
+                                self._queued.setdefault(name, (schema, set()))[1].update(keys)
+                        raise
+                    del queued[table_name]
+            finally:
+                self._sync_lock.release()
+
+    # -- reads ------------------------------------------------------------
+
+    def _select(self, query, params=()):
+        cursor = self._connection().execute(query, params)
+        rows = cursor.fetchall()
+        return [desc[0] for desc in cursor.description], rows
+
+    def select(self, query, params=()):
+        """Runs a SELECT written with MySQL's %s placeholders and returns (columns, rows)."""
+        return self._select(query.replace('%s', '?'), params)
+
+    def page(self, table_name, key_column, after_key=None, before_key=None, limit=200):
+        """Keyset page in ascending key order, as crud_operations.fetch_page returns it."""
+        if before_key is not None:
+            columns, rows = self._select(
+                f"SELECT * FROM {table_name} WHERE {key_column} < ? ORDER BY {key_column} DESC LIMIT ?",
+                (before_key, limit),
+            )
+            return columns, rows[::-1]
+        if after_key is not None:
+            return self._select(
+                f"SELECT * FROM {table_name} WHERE {key_column} > ? ORDER BY {key_column} LIMIT ?", (after_key, limit)
+            )
+        return self._select(f"SELECT * FROM {table_name} ORDER BY {key_column} LIMIT ?", (limit,))
+
+    def rows_by_keys(self, table_name, key_column, keys):
+        rows = []
+        for chunk in _chunks(list(keys), KEY_CHUNK_SIZE):
+            placeholders = ', '.join(['?'] * len(chunk))
+            rows.extend(self._select(f"SELECT * FROM {table_name} WHERE {key_column} IN ({placeholders})", chunk)[1])
+        return rows
+
+    def search(self, schema, term, limit):
+        """Matches the term anywhere in text columns, and integer columns by equality.
+
+        Scanning is cheap locally, so unlike the server search this needs no
+        index and also finds words in the middle of a value.
+        """
+        clauses = []
+        params = []
+        for column in schema.columns:
+            if schema.is_text(column):
+                clauses.append(f"{column} LIKE ? ESCAPE '\\'")
+                params.append('%' + _escape_like(term) + '%')
+            elif term.isdigit() and schema.is_integer(column):
+                clauses.append(f"{column} = ?")
+                params.append(int(term))
+        if not clauses:
+            return list(schema.columns), []
+        params.append(limit)
+        return self._select(f"SELECT * FROM {schema.name} WHERE {' OR '.join(clauses)} LIMIT ?", params)
+
+    def stream(self, table_name, columns, chunk_size):
+        cursor = self._connection().execute(f"SELECT {', '.join(columns)} FROM {table_name}")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+    def key_labels(self, table_name, key_column, label_columns, after_key=None):
+        columns = ', '.join([key_column] + list(label_columns))
+        if after_key is None:
+            return self._select(f"SELECT {columns} FROM {table_name} ORDER BY {key_column}")[1]
+        return self._select(
+            f"SELECT {columns} FROM {table_name} WHERE {key_column} > ? ORDER BY {key_column}", (after_key,)
+        )[1]
+
+    def checksums(self, table_name, key_column, low_key, high_key):
+        """{key: CRC32 of the row} for a key range, comparable only with other mirror checksums."""
+        cursor = self._connection().execute(
+            f"SELECT * FROM {table_name} WHERE {key_column} BETWEEN ? AND ?", (low_key, high_key)
+        )
+        position = [desc[0] for desc in cursor.description].index(key_column)
+        return {row[position]: zlib.crc32(repr(row).encode()) for row in cursor}
+
+    def max_key(self, table_name, key_column):
+        return self._connection().execute(f"SELECT MAX({key_column}) FROM {table_name}").fetchone()[0]
+
+    def count(self, table_name):
+        return self._connection().execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+
+    # -- offline writes ---------------------------------------------------
+
+    def pool(self):
+        """A pool handing out local connections, to stand in for MySQL when offline."""
+        return OfflinePool(self)
+
+
+class _OfflineCursor:
+    """Runs the MySQL-flavoured statements crud_operations builds against SQLite."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._cursor = conn.cursor()
+
+    @staticmethod
+    def _translate(query):
+        return query.replace('%s', '?')
+
+    def _run(self, method, query, params):
+        try:
+            return method(self._translate(query), params)
+        except sqlite3.IntegrityError as e:
+            raise driver().errors.IntegrityError(msg=str(e)) from e
+        except sqlite3.DatabaseError as e:
+            raise driver().errors.DatabaseError(msg=str(e)) from e
+
+    def execute(self, query, params=()):
+        self._run(self._cursor.execute, query, params or ())
+
+    def executemany(self, query, rows):
+        self._run(self._cursor.executemany, query, rows)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+class _OfflineConnection:
+    """The subset of a mysql.connector connection that crud_operations uses for writes."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, prepared=False, buffered=None):
+        return _OfflineCursor(self._conn)
+
+    def start_transaction(self):
+        self._conn.execute("BEGIN")
+
+    def commit(self):
+        if self._conn.in_transaction:
+            self._conn.execute("COMMIT")
+
+    def rollback(self):
+        if self._conn.in_transaction:
+            self._conn.execute("ROLLBACK")
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass  # The SQLite connection belongs to its thread and outlives this wrapper
+
+
+class OfflinePool:
+    """Drop-in for db_connection.ConnectionPool that hands out the mirror's SQLite connections."""
+
+    def __init__(self, mirror):
+        self.mirror = mirror
+
+    def acquire(self):
+        return _OfflineConnection(self.mirror._connection())
+
+    def release(self, conn, discard=False):
+        conn.rollback()
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {'size': 0, 'in_use': 0, 'idle': 0, 'offline': True}
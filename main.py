@@ -1,5 +1,13 @@
+import sys
+import time
+
+# Taken before the app is imported, so startup timings include import time
+STARTED = time.perf_counter()
+
 from app import LibraryApp
 
 if __name__ == "__main__":
-    app = LibraryApp()
+    # --startup-timing prints the time to first paint and to first data as JSON, then exits
+    measure_startup = "--startup-timing" in sys.argv[1:]
+    app = LibraryApp(started=STARTED, exit_after_first_data=measure_startup)
     app.mainloop()
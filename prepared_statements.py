@@ -0,0 +1,78 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+# Prepared statements kept open per connection; the server caps the total
+# (max_prepared_stmt_count), so the least recently used are closed beyond this
+MAX_STATEMENTS_PER_CONNECTION = 64
+
+# connection -> OrderedDict of statement key -> (cursor, query)
+_caches = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+_stats = {'prepared': 0, 'reused': 0}
+
+
+def _cache_for(conn):
+    with _lock:
+        cache = _caches.get(conn)
+        if cache is None:
+            cache = _caches[conn] = OrderedDict()
+        return cache
+
+def execute_prepared(conn, key, query, params=()):
+    """Executes `query` as a server-side prepared statement cached on this connection.
+
+    `key` identifies the statement shape, e.g. (table, operation, columns). The
+    first call for a key prepares the statement; later calls on the same
+    connection send only the bound values, so the server skips parsing and
+    planning. Returns the cursor so callers can read results or rowcount.
+    A connection is only ever used by one thread at a time, so the per-connection
+    cache needs no locking of its own.
+    """
+    cache = _cache_for(conn)
+    entry = cache.get(key)
+    if entry is None or entry[1] != query:
+        if entry is not None:
+            _close_quietly(entry[0])
+        cursor = conn.cursor(prepared=True)
+        entry = cache[key] = (cursor, query)
+        with _lock:
+            _stats['prepared'] += 1
+        while len(cache) > MAX_STATEMENTS_PER_CONNECTION:
+            _, (old_cursor, _) = cache.popitem(last=False)
+            _close_quietly(old_cursor)
+    else:
+        cache.move_to_end(key)
+        with _lock:
+            _stats['reused'] += 1
+
+    cursor, query = entry
+    # The cursor only skips re-preparing when it sees the very same statement again
+    cursor.execute(query, params)
+    return cursor
+
+def executemany_prepared(conn, key, query, rows):
+    """Runs a prepared statement once per row of parameters and returns the total rowcount."""
+    rowcount = 0
+    for params in rows:
+        rowcount += execute_prepared(conn, key, query, params).rowcount
+    return rowcount
+
+def forget_connection(conn):
+    """Drops the statements cached for a connection that is being closed."""
+    with _lock:
+        cache = _caches.pop(conn, None)
+    if cache:
+        for cursor, _ in cache.values():
+            _close_quietly(cursor)
+
+def statement_stats():
+    """Returns how many statements were prepared and how many executions reused one."""
+    with _lock:
+        return dict(_stats, connections=len(_caches))
+
+def _close_quietly(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
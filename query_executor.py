@@ -0,0 +1,103 @@
+import itertools
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueryExecutor:
+    """Runs database calls on worker threads and hands results back to the Tk thread.
+
+    Tk widgets may only be touched from the main loop, so workers never call back
+    directly: finished jobs are queued and drained by an after() poll. Jobs can be
+    grouped into named channels, where submitting a new job supersedes any older
+    job on the same channel and its result is dropped.
+    """
+
+    def __init__(self, root, max_workers=4, poll_interval=16, frame_budget=0.008):
+        self.root = root
+        self.poll_interval = poll_interval  # ms between polls, ~60 fps
+        self.frame_budget = frame_budget    # seconds of callback work allowed per poll
+        self._workers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self._done = queue.SimpleQueue()
+        self._tickets = itertools.count(1)
+        self._latest = {}       # channel -> ticket of the newest job
+        self._futures = {}      # channel -> future of the newest job
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, func, *args, on_success=None, on_error=None, channel=None, **kwargs):
+        """Runs func(*args, **kwargs) in the background and returns its ticket.
+
+        on_success(result) or on_error(exception) is called on the Tk thread,
+        unless a newer job has been submitted on the same channel in the meantime.
+        """
+        ticket = next(self._tickets)
+        if channel is not None:
+            self.cancel(channel)
+            self._latest[channel] = ticket
+
+        future = self._workers.submit(func, *args, **kwargs)
+        if channel is not None:
+            self._futures[channel] = future
+        self._pending += 1
+        future.add_done_callback(lambda f: self._done.put((ticket, channel, f, on_success, on_error)))
+        self._ensure_polling()
+        return ticket
+
+    def cancel(self, channel):
+        """Drops the result of the current job on a channel and cancels it if not yet started."""
+        self._latest[channel] = next(self._tickets)
+        future = self._futures.pop(channel, None)
+        if future is not None:
+            future.cancel()
+
+    def is_busy(self, channel=None):
+        """Returns True while jobs (optionally on one channel) are still running."""
+        if channel is None:
+            return self._pending > 0
+        future = self._futures.get(channel)
+        return future is not None and not future.done()
+
+    def shutdown(self):
+        """Stops accepting work; running queries are left to finish on their own."""
+        self._workers.shutdown(wait=False, cancel_futures=True)
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        deadline = time.perf_counter() + self.frame_budget
+        while time.perf_counter() < deadline:
+            try:
+                ticket, channel, future, on_success, on_error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if channel is not None:
+                if self._latest.get(channel) != ticket:
+                    continue  # Superseded by a newer request on this channel
+                self._futures.pop(channel, None)
+            if future.cancelled():
+                continue
+            self._deliver(future, on_success, on_error)
+
+        if self._pending > 0:
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    @staticmethod
+    def _deliver(future, on_success, on_error):
+        error = future.exception()
+        try:
+            if error is None:
+                if on_success is not None:
+                    on_success(future.result())
+            elif on_error is not None:
+                on_error(error)
+            else:
+                print(f"Background query failed: {error}")
+        except Exception as e:
+            print(f"Error handling query result: {e}")
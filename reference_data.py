@@ -0,0 +1,263 @@
+import bisect
+import threading
+import time
+from array import array
+
+from crud_operations import add_write_listener, count_rows, estimate_row_count, fetch_key_labels, fetch_rows
+from schema_catalog import get_table_schema
+
+# Dimension tables that forms reference and that are kept as key -> label lookups
+REFERENCE_TABLES = ("Authors", "Genres", "Publishers", "Members", "Books")
+
+# Tables with more rows than this are not cached; lookups go to the database instead
+MAX_REFERENCE_ROWS = 200000
+
+# Seconds between incremental checks for rows added by other clients
+REFRESH_INTERVAL = 60
+
+# Seconds before a table is reloaded in full, to pick up rows deleted or relabelled by other clients
+FULL_RELOAD_INTERVAL = 3600
+
+# Written keys remembered per table before it is cheaper to reload the table
+MAX_PENDING_KEYS = 5000
+
+
+class InvalidReferenceError(ValueError):
+    """Raised before a write whose foreign key values do not exist in the referenced table."""
+
+    def __init__(self, problems):
+        super().__init__("\n".join(problems))
+        self.problems = problems
+
+
+def _label_columns(schema):
+    """Columns that name a row: text columns called *name* or *title*, else the first text column."""
+    text_columns = [col for col in schema.columns if schema.is_text(col) and col not in schema.key_columns]
+    named = [col for col in text_columns if 'name' in col.lower() or 'title' in col.lower()]
+    return (named or text_columns)[:2]
+
+
+class ReferenceTable:
+    """Key -> label lookup for one dimension table, held as two parallel key-ordered arrays.
+
+    Only the key and one or two label columns are loaded. Integer keys are
+    packed into an array of machine integers, so even a large table costs
+    little more than its label strings.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.name = schema.name
+        self.key_column = schema.key_column
+        self.label_columns = _label_columns(schema)
+        self.integer_keys = schema.is_integer(self.key_column)
+        self.keys = array('q') if self.integer_keys else []
+        self.labels = []
+        self.loaded_at = 0.0
+        self.checked_at = 0.0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _position(self, key):
+        """Index of a typed key, or None if absent; text that cannot be an integer key is absent."""
+        if self.integer_keys != isinstance(key, int):
+            return None
+        position = bisect.bisect_left(self.keys, key)
+        return position if position < len(self.keys) and self.keys[position] == key else None
+
+    def __contains__(self, value):
+        return self._position(value) is not None
+
+    def label(self, value):
+        """The label of a key, or None if there is no such row."""
+        position = self._position(value)
+        return None if position is None else self.labels[position]
+
+    def suggest(self, text, limit=20):
+        """(key, label) pairs whose key equals the text or whose label contains it."""
+        text = text.strip()
+        if not text:
+            return [(key, label) for key, label in zip(self.keys[:limit], self.labels[:limit])]
+        results = []
+        position = self._position(self.schema.typed_value(self.key_column, text))
+        if position is not None:
+            results.append((self.keys[position], self.labels[position]))
+        needle = text.casefold()
+        for key, label in zip(self.keys, self.labels):
+            if len(results) >= limit:
+                break
+            if needle in label.casefold() and (position is None or key != self.keys[position]):
+                results.append((key, label))
+        return results
+
+    def load(self, rows):
+        """Replaces the contents with (key, label columns...) rows in key order."""
+        self.keys = array('q') if self.integer_keys else []
+        self.labels = []
+        self.extend(rows)
+
+    def extend(self, rows):
+        """Adds rows whose keys are all past the current last key."""
+        for row in rows:
+            self.keys.append(row[0])
+            self.labels.append(' '.join(str(value) for value in row[1:] if value is not None))
+
+    def patched(self, keys, rows):
+        """A copy in which `keys` are replaced by their current (key, label columns...) `rows`.
+
+        Keys without a row were deleted and are left out. The copy is built in
+        one merge pass, so readers of this lookup never see it half changed.
+        """
+        keys = set(keys)
+        rows = sorted(rows, key=lambda row: row[0])
+        table = ReferenceTable(self.schema)
+        table.loaded_at = self.loaded_at
+        table.checked_at = self.checked_at
+        position = 0
+        for key, label in zip(self.keys, self.labels):
+            while position < len(rows) and rows[position][0] < key:
+                table.extend([rows[position]])
+                position += 1
+            if key not in keys:
+                table.keys.append(key)
+                table.labels.append(label)
+        table.extend(rows[position:])
+        return table
+
+
+_tables = {}
+_too_large = set()
+_lock = threading.Lock()          # Guards _table_locks
+_table_locks = {}                 # table -> lock held while that table loads, so other tables are not held up
+_pending_lock = threading.Lock()  # Held by writers recording written keys
+_pending = {}                     # table -> keys written since its last refresh, or None if it needs a reload
+
+def _table_lock(table_name):
+    with _lock:
+        lock = _table_locks.get(table_name)
+        if lock is None:
+            lock = _table_locks[table_name] = threading.Lock()
+        return lock
+
+def get_reference(table_name):
+    """Returns the up-to-date lookup for a reference table, or None if it is not cached.
+
+    Loads the table on first use. Rows written through crud_operations since
+    then are re-read by key and patched in; rows added elsewhere are picked up
+    every REFRESH_INTERVAL seconds, and the table is reloaded in full every
+    FULL_RELOAD_INTERVAL. Changes fill a new lookup and swap it in, so readers
+    never see one half loaded. Blocks on the database, so call it from a
+    worker thread.
+    """
+    if table_name not in REFERENCE_TABLES or table_name in _too_large:
+        return None
+    with _table_lock(table_name):
+        table = _tables.get(table_name)
+        now = time.monotonic()
+        with _pending_lock:
+            written = table_name in _pending
+        if table is not None and not written and now - table.checked_at < REFRESH_INTERVAL:
+            return table
+
+        with _pending_lock:
+            keys = _pending.pop(table_name, ())
+        if table is None or keys is None or now - table.loaded_at > FULL_RELOAD_INTERVAL:
+            if _row_count(table_name) > MAX_REFERENCE_ROWS:
+                _too_large.add(table_name)
+                _tables.pop(table_name, None)
+                return None
+            table = _load(table_name)
+        else:
+            if keys:
+                table = table.patched(keys, _key_labels(table, fetch_rows(table_name, table.key_column, keys)))
+            if now - table.checked_at >= REFRESH_INTERVAL:
+                after_key = table.keys[-1] if len(table) else None
+                table.extend(fetch_key_labels(table_name, table.key_column, table.label_columns, after_key))
+        table.checked_at = now
+        _tables[table_name] = table
+        return table
+
+def _row_count(table_name):
+    """The server's row estimate, counted exactly only if the server has none."""
+    estimate = estimate_row_count(table_name)
+    return count_rows(table_name) if estimate is None else estimate
+
+def _key_labels(table, rows):
+    """(key, label columns...) rows projected from full rows."""
+    columns = table.schema.columns
+    indexes = [columns.index(column) for column in [table.key_column] + table.label_columns]
+    return [tuple(row[index] for index in indexes) for row in rows]
+
+def _load(table_name):
+    table = ReferenceTable(get_table_schema(table_name))
+    table.load(fetch_key_labels(table_name, table.key_column, table.label_columns))
+    table.loaded_at = time.monotonic()
+    return table
+
+def _note_write(table_name, keys):
+    """Remembers the keys written to a cached table, or that it needs a reload if they are unknown."""
+    if table_name not in REFERENCE_TABLES or table_name in _too_large:
+        return
+    with _pending_lock:
+        pending = _pending.setdefault(table_name, set())
+        if pending is None:
+            return
+        if keys is None or len(pending) + len(keys) > MAX_PENDING_KEYS:
+            _pending[table_name] = None
+        else:
+            pending.update(keys)
+
+add_write_listener(_note_write)
+
+def preload():
+    """Loads every reference table, so the first picker or validation does not wait."""
+    for table_name in REFERENCE_TABLES:
+        try:
+            get_reference(table_name)
+        except KeyError:
+            pass  # Not every database has every dimension table
+
+def suggest(table_name, text, limit=20):
+    """Picker suggestions (key, label) for a reference table; runs on a worker thread."""
+    table = get_reference(table_name)
+    if table is not None:
+        return table.suggest(text, limit)
+    # Too large to cache: look the key up directly
+    schema = get_table_schema(table_name)
+    text = text.strip()
+    if not text:
+        return []
+    rows = fetch_rows(table_name, schema.key_column, [text])
+    label_columns = _label_columns(schema)
+    return [
+        (row[schema.columns.index(schema.key_column)],
+         ' '.join(str(row[schema.columns.index(col)]) for col in label_columns))
+        for row in rows
+    ]
+
+def validate_foreign_keys(schema, values):
+    """Checks the foreign key values of a row about to be written, given as {column: value}.
+
+    Raises InvalidReferenceError listing every value that does not exist in
+    its referenced table. Empty values are left to the database's NULL rules.
+    Runs on a worker thread.
+    """
+    problems = []
+    for column, (ref_table, ref_column) in schema.foreign_keys.items():
+        value = values.get(column)
+        if value is None or str(value).strip() == "":
+            continue
+        table = get_reference(ref_table)
+        # The cache can lag rows added at other desks, so a miss is confirmed with the database
+        found = (table is not None and table.key_column == ref_column and value in table
+                 or bool(fetch_rows(ref_table, ref_column, [value])))
+        if not found:
+            problems.append(f"{column}: no {ref_table} row has {ref_column} {value}.")
+    if problems:
+        raise InvalidReferenceError(problems)
+
+def describe(table_name, value):
+    """The label of a referenced row if its table is already cached, without touching the database."""
+    table = _tables.get(table_name)
+    return None if table is None else table.label(value)
@@ -0,0 +1,164 @@
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+
+def estimate_size(value):
+    """Approximate memory footprint of a (columns, rows) result, in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            if isinstance(item, (list, tuple)):
+                size += estimate_size(item)
+            else:
+                size += sys.getsizeof(item)
+    return size
+
+
+class ResultCache:
+    """LRU cache of query results grouped by table, bounded by an estimated byte budget.
+
+    Entries can also expire after a TTL. Every write to a table bumps that
+    table's version; a read that started before the write cannot store its
+    (now stale) result afterwards.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl                          # Seconds, or None to keep entries until evicted
+        self._entries = OrderedDict()           # key -> (table, value, size, stored_at)
+        self._keys_by_table = defaultdict(set)
+        self._versions = defaultdict(int)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def version(self, table_name):
+        """The table's current version, to hand back to put()."""
+        with self._lock:
+            return self._versions[table_name]
+
+    def get(self, key):
+        """Returns (True, value) on a hit, or (False, None) if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[3] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, table_name, key, value, version):
+        """Stores a result unless the table was written to since `version` was taken."""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if self._versions[table_name] != version:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (table_name, value, size, time.monotonic())
+            self._keys_by_table[table_name].add(key)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_table(self, table_name):
+        """Drops every cached result for a table after it has been written to."""
+        with self._lock:
+            self._versions[table_name] += 1
+            for key in list(self._keys_by_table.pop(table_name, ())):
+                self._remove(key)
+
+    def clear(self):
+        """Drops every cached result."""
+        with self._lock:
+            for table_name in list(self._keys_by_table):
+                self._versions[table_name] += 1
+            self._entries.clear()
+            self._keys_by_table.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Returns hit/miss counters and current occupancy."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _remove(self, key):
+        """Removes one entry. Caller holds the lock."""
+        table_name, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        keys = self._keys_by_table.get(table_name)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_table[table_name]
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Lets identical calls that overlap in time share one execution.
+
+    The first caller for a key runs the function; callers arriving with the
+    same key while it runs wait and receive its result, or its exception,
+    instead of running their own. Nothing is kept once the call finishes;
+    that is the result cache's job.
+    """
+
+    def __init__(self):
+        self._flights = {}          # key -> _Flight still running
+        self.executed = 0           # Calls that ran the function
+        self.shared = 0             # Calls answered by another caller's run, i.e. queries saved
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Returns func(), or the result of an identical call already in flight."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def stats(self):
+        """Returns how many calls ran, how many shared a run, and how many are running now."""
+        with self._lock:
+            return {'executed': self.executed, 'shared': self.shared, 'in_flight': len(self._flights)}
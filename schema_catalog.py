@@ -0,0 +1,187 @@
+import threading
+
+from db_connection import pooled_connection
+
+INTEGER_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'bigint')
+
+
+class TableSchema:
+    """Column, key and reference metadata for one table."""
+
+    def __init__(self, name):
+        self.name = name
+        self.columns = []           # Column names in table order
+        self.types = {}             # Column -> MySQL data type, e.g. 'int', 'varchar', 'date'
+        self.nullable = {}          # Column -> True if the column accepts NULL
+        self.auto_increment = set() # Columns filled in by the server
+        self.primary_key = []       # Primary key columns in key order
+        self.foreign_keys = {}      # Column -> (referenced table, referenced column)
+        self.indexes = {}           # Index name -> (index type, [columns in index order])
+
+    @property
+    def key_column(self):
+        """The column used to identify and page through rows."""
+        return self.primary_key[0] if self.primary_key else self.columns[0]
+
+    @property
+    def key_columns(self):
+        """All columns that together identify a row."""
+        return self.primary_key or self.columns[:1]
+
+    @property
+    def fulltext_indexes(self):
+        """Column lists of the table's FULLTEXT indexes."""
+        return [columns for index_type, columns in self.indexes.values() if index_type == 'FULLTEXT']
+
+    @property
+    def indexed_columns(self):
+        """Columns that lead a B-tree index, so equality and prefix matches can seek on them."""
+        return [columns[0] for index_type, columns in self.indexes.values() if index_type != 'FULLTEXT']
+
+    def is_text(self, column):
+        """True for character columns that can be matched with LIKE."""
+        return self.types.get(column) in ('char', 'varchar', 'text', 'tinytext', 'mediumtext', 'longtext')
+
+    def is_integer(self, column):
+        """True for integer columns, such as most keys."""
+        return self.types.get(column) in INTEGER_TYPES
+
+    def typed_value(self, column, value):
+        """A value as the database returns it, given as text from a form or the table view.
+
+        Only integer columns are converted; text that is not a number is left
+        as it is for the database to reject.
+        """
+        if isinstance(value, str) and self.is_integer(column):
+            try:
+                return int(value.strip())
+            except ValueError:
+                return value
+        return value
+
+    def typed_row(self, record):
+        """A full row given in column order, with typed_value() applied to every cell."""
+        return [self.typed_value(column, value) for column, value in zip(self.columns, record)]
+
+    def key_predicate(self, record):
+        """A {column: value} predicate matching a row, given in column order, by its key."""
+        return dict(zip(self.key_columns, self.key_values(record)))
+
+    def key_values(self, record):
+        """Picks the key values out of a full row given in column order."""
+        return [record[self.columns.index(col)] for col in self.key_columns]
+
+    def __repr__(self):
+        return f"TableSchema({self.name!r}, columns={self.columns!r}, primary_key={self.primary_key!r})"
+
+
+_COLUMNS_QUERY = """
+    SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE, EXTRA
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() {table_filter}
+    ORDER BY TABLE_NAME, ORDINAL_POSITION
+"""
+
+_KEYS_QUERY = """
+    SELECT TABLE_NAME, COLUMN_NAME, CONSTRAINT_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+    FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+    WHERE TABLE_SCHEMA = DATABASE() {table_filter}
+      AND (CONSTRAINT_NAME = 'PRIMARY' OR REFERENCED_TABLE_NAME IS NOT NULL)
+    ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
+"""
+
+_INDEXES_QUERY = """
+    SELECT TABLE_NAME, INDEX_NAME, INDEX_TYPE, COLUMN_NAME
+    FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() {table_filter}
+    ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+"""
+
+_cache = {}
+_loaded_all = False
+_lock = threading.Lock()
+
+# Replacement for _read_schemas, e.g. the local mirror's stored schemas when offline
+_reader = None
+
+def _read_schemas(table_name=None):
+    """Reads metadata for one table, or every table in the database."""
+    table_filter = "AND TABLE_NAME = %s" if table_name else ""
+    params = (table_name,) if table_name else ()
+    schemas = {}
+
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_COLUMNS_QUERY.format(table_filter=table_filter), params)
+        for table, column, data_type, is_nullable, extra in cursor.fetchall():
+            schema = schemas.setdefault(table, TableSchema(table))
+            schema.columns.append(column)
+            schema.types[column] = data_type.lower()
+            schema.nullable[column] = is_nullable == 'YES'
+            if 'auto_increment' in (extra or '').lower():
+                schema.auto_increment.add(column)
+
+        cursor.execute(_KEYS_QUERY.format(table_filter=table_filter), params)
+        for table, column, constraint, ref_table, ref_column in cursor.fetchall():
+            schema = schemas.get(table)
+            if schema is None:
+                continue
+            if constraint == 'PRIMARY':
+                schema.primary_key.append(column)
+            else:
+                schema.foreign_keys[column] = (ref_table, ref_column)
+
+        cursor.execute(_INDEXES_QUERY.format(table_filter=table_filter), params)
+        for table, index_name, index_type, column in cursor.fetchall():
+            schema = schemas.get(table)
+            if schema is None:
+                continue
+            schema.indexes.setdefault(index_name, (index_type.upper(), []))[1].append(column)
+        cursor.close()
+
+    return schemas
+
+def get_table_schema(table_name):
+    """Returns the cached schema of a table, reading INFORMATION_SCHEMA on first use."""
+    global _loaded_all
+    with _lock:
+        schema = _cache.get(table_name)
+        if schema is not None:
+            return schema
+        load_everything = not _loaded_all
+
+    # The first miss loads every table at once; later misses only reload what was invalidated
+    schemas = (_reader or _read_schemas)(None if load_everything else table_name)
+    with _lock:
+        _cache.update(schemas)
+        if load_everything:
+            _loaded_all = True
+        schema = _cache.get(table_name)
+        if schema is None:
+            # Table names may differ in case from what the UI uses
+            schema = next((s for name, s in _cache.items() if name.lower() == table_name.lower()), None)
+            if schema is not None:
+                # Remember it under the name asked for, so the next call does not read the catalog again
+                _cache[table_name] = schema
+
+    if schema is None:
+        raise KeyError(f"Table '{table_name}' was not found in the database.")
+    return schema
+
+def invalidate(table_name=None):
+    """Forgets cached metadata for one table, or for every table if none is given."""
+    global _loaded_all
+    with _lock:
+        if table_name is None:
+            _cache.clear()
+            _loaded_all = False
+        else:
+            # Drop any entry kept under a differently cased name as well
+            for name in [name for name in _cache if name.lower() == table_name.lower()]:
+                del _cache[name]
+
+def set_schema_reader(reader):
+    """Reads schemas through `reader(table_name=None)` instead of INFORMATION_SCHEMA; None restores it."""
+    global _reader
+    _reader = reader
+    invalidate()
@@ -0,0 +1,241 @@
+import time
+from collections import defaultdict
+
+from columnar import ColumnarResult
+from crud_operations import CACHE_TTL
+
+# Small lookup tables worth answering searches from memory
+INDEXED_TABLES = ("Genres", "Publishers", "Authors", "Admins")
+
+# Seconds an index answers searches before it is rebuilt, so rows other desks
+# changed show up as soon as they would in cached SQL results
+MAX_INDEX_AGE = CACHE_TTL
+
+# Rough ceiling on the memory one table's index may use before we fall back to SQL
+DEFAULT_MEMORY_BUDGET = 16 * 1024 * 1024
+
+# Approximate CPython costs used to estimate index size without walking every object
+_BYTES_PER_POSTING = 70     # one key held in a trigram's set
+_BYTES_PER_TRIGRAM = 240    # the trigram string, its set and the dict slot
+_BYTES_PER_KEY = 100        # key string and its position's dict slot
+_BYTES_PER_ROW = 200        # row tuple of a row written after the build
+
+
+class IndexBudgetExceeded(Exception):
+    """Raised when a table is too large to index within the memory budget."""
+
+
+class TrigramIndex:
+    """In-memory substring index over one table snapshot.
+
+    Each row's cells are lower-cased and joined into one searchable text, and
+    every three-character slice of it maps to the keys of rows containing it.
+    A query intersects the key sets of its own trigrams and then confirms each
+    candidate with a plain substring test. Rows stay in the snapshot's
+    columnar storage; the texts are rebuilt only for the candidates a query
+    has to confirm.
+    """
+
+    def __init__(self, columns, key_index=0, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.columns = list(columns)
+        self.key_index = key_index
+        self.memory_budget = memory_budget
+        self._snapshot = None               # ColumnarResult the index was built from
+        self._snapshot_bytes = 0
+        self._positions = {}                # key -> position of its row in the snapshot
+        self._added = {}                    # key -> row written since the build
+        self._postings = defaultdict(set)   # trigram -> keys of rows containing it
+        self._posting_count = 0
+
+    def __len__(self):
+        return len(self._positions) + len(self._added)
+
+    @staticmethod
+    def _text(row):
+        # Cells are separated by a character no search term can contain,
+        # so a match never spans two columns
+        return '\x00'.join(str(value).lower() for value in row)
+
+    @staticmethod
+    def _trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def estimated_bytes(self):
+        """Approximate memory held by the index, its snapshot included."""
+        return (self._snapshot_bytes
+                + len(self._positions) * _BYTES_PER_KEY
+                + len(self._added) * (_BYTES_PER_KEY + _BYTES_PER_ROW)
+                + len(self._postings) * _BYTES_PER_TRIGRAM
+                + self._posting_count * _BYTES_PER_POSTING)
+
+    def _row(self, key):
+        row = self._added.get(key)
+        if row is None:
+            position = self._positions.get(key)
+            if position is not None:
+                row = self._snapshot.row(position)
+        return row
+
+    def _key_value(self, key):
+        row = self._added.get(key)
+        if row is not None:
+            return row[self.key_index]
+        return self._snapshot.value(self._positions[key], self.key_index)
+
+    def _post(self, key, row):
+        for trigram in self._trigrams(self._text(row)):
+            self._postings[trigram].add(key)
+            self._posting_count += 1
+
+    def load(self, snapshot):
+        """Indexes every row of a ColumnarResult, replacing the current contents.
+
+        Raises IndexBudgetExceeded as soon as the estimate passes the budget.
+        """
+        self._snapshot = snapshot
+        self._snapshot_bytes = snapshot.nbytes()
+        self._positions = {}
+        self._added = {}
+        self._postings = defaultdict(set)
+        self._posting_count = 0
+        for position, row in enumerate(snapshot):
+            key = str(row[self.key_index])
+            self._positions[key] = position
+            self._post(key, row)
+            # Checking the estimate every row would dominate the build; every 500 is plenty
+            if (position + 1) % 500 == 0 and self.estimated_bytes() > self.memory_budget:
+                raise IndexBudgetExceeded(f"Index exceeded {self.memory_budget} bytes after {position + 1} rows.")
+        if self.estimated_bytes() > self.memory_budget:
+            raise IndexBudgetExceeded(f"Index exceeded {self.memory_budget} bytes.")
+
+    def add(self, row):
+        """Indexes a row, replacing any earlier row with the same key.
+
+        Values must be typed as the database returns them (TableSchema.typed_row),
+        or the row's key will not sort with the snapshot's.
+        """
+        row = tuple(row)
+        key = str(row[self.key_index])
+        self.remove(key)
+        self._added[key] = row
+        self._post(key, row)
+
+    def remove(self, key):
+        """Drops the row with the given key, if it is indexed."""
+        key = str(key)
+        row = self._row(key)
+        if row is None:
+            return
+        self._positions.pop(key, None)
+        self._added.pop(key, None)
+        for trigram in self._trigrams(self._text(row)):
+            keys = self._postings.get(trigram)
+            if keys is not None:
+                keys.discard(key)
+                self._posting_count -= 1
+                if not keys:
+                    del self._postings[trigram]
+
+    def search(self, term, limit=None):
+        """Returns rows whose cells contain the term (case-insensitive), in key order."""
+        term = term.lower()
+        if len(term) < 3:
+            # Too short for trigrams; scan the snapshot column by column, which tests
+            # each distinct value of a dictionary-encoded column only once
+            matches = [key for key, row in self._added.items() if term in self._text(row)]
+            if self._snapshot is not None:
+                for position in self._snapshot.matching(term):
+                    key = str(self._snapshot.value(position, self.key_index))
+                    if self._positions.get(key) == position:
+                        matches.append(key)
+        else:
+            posting_sets = sorted((self._postings.get(t, ()) for t in self._trigrams(term)), key=len)
+            if not posting_sets[0]:
+                return []
+            candidates = set(posting_sets[0]).intersection(*posting_sets[1:])
+            matches = [key for key in candidates if term in self._text(self._row(key))]
+
+        matches.sort(key=self._key_value)
+        if limit is not None:
+            matches = matches[:limit]
+        return [self._row(key) for key in matches]
+
+
+def build_index(columns, rows, key_index=0, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Builds an index over a table snapshot, or raises IndexBudgetExceeded.
+
+    `rows` is best a ColumnarResult, as fetch_all_data returns; the index then
+    shares its storage instead of keeping a copy of every row.
+    """
+    if not isinstance(rows, ColumnarResult):
+        rows = ColumnarResult.from_rows(columns, rows)
+    index = TrigramIndex(columns, key_index, memory_budget)
+    index.load(rows)
+    return index
+
+
+# Registry of built indexes. Only the Tk thread reads or mutates it; builds run
+# elsewhere and are installed with the table version they were started at, so a
+# build that raced with a write is thrown away instead of hiding that write.
+_indexes = {}
+_built_at = {}                  # table -> when its index was installed
+_too_large = set()
+_versions = defaultdict(int)
+
+def should_index(table_name):
+    """True if a table is configured for in-memory search and has no current index."""
+    return table_name in INDEXED_TABLES and table_name not in _too_large and get_index(table_name) is None
+
+def table_version(table_name):
+    """The write counter to pass to install_index for a build started now."""
+    return _versions[table_name]
+
+def install_index(table_name, index, version):
+    """Registers a finished build unless the table was written to while it ran."""
+    if version == _versions[table_name]:
+        _indexes[table_name] = index
+        _built_at[table_name] = time.monotonic()
+        return True
+    return False
+
+def mark_too_large(table_name):
+    """Records that a table exceeds the budget so searches keep using SQL."""
+    _too_large.add(table_name)
+
+def get_index(table_name):
+    """Returns the table's index, or None when searches should go to SQL.
+
+    An index older than MAX_INDEX_AGE is dropped, as it may be missing rows
+    written at other desks; should_index() then asks for a rebuild.
+    """
+    index = _indexes.get(table_name)
+    if index is not None and time.monotonic() - _built_at[table_name] > MAX_INDEX_AGE:
+        del _indexes[table_name]
+        return None
+    return index
+
+def drop_index(table_name=None):
+    """Discards the index of one table, or of every table."""
+    if table_name is None:
+        _indexes.clear()
+        _too_large.clear()
+    else:
+        _indexes.pop(table_name, None)
+        _too_large.discard(table_name)
+
+def index_row(table_name, row):
+    """Adds or replaces a written row in the table's index."""
+    _versions[table_name] += 1
+    index = _indexes.get(table_name)
+    if index is not None:
+        index.add(row)
+        if index.estimated_bytes() > index.memory_budget:
+            del _indexes[table_name]
+            _too_large.add(table_name)
+
+def unindex_row(table_name, key):
+    """Removes a deleted row from the table's index."""
+    _versions[table_name] += 1
+    index = _indexes.get(table_name)
+    if index is not None:
+        index.remove(key)
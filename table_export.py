@@ -0,0 +1,106 @@
+import csv
+import datetime
+import decimal
+import json
+import os
+import time
+
+from crud_operations import estimate_row_count, stream_rows
+from schema_catalog import get_table_schema
+
+EXPORT_CHUNK_SIZE = 1000
+
+# File extension -> export format
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is stopped through its cancel event."""
+
+
+class ExportReport:
+    """Running totals for one export, passed to the progress callback after every chunk."""
+
+    def __init__(self, table_name, path, estimated_rows=None):
+        self.table_name = table_name
+        self.path = path
+        self.estimated_rows = estimated_rows  # Server estimate, may be off or None
+        self.rows_written = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def fraction_done(self):
+        """Rough progress between 0 and 1, or None if the size is unknown."""
+        if not self.estimated_rows:
+            return None
+        return min(self.rows_written / self.estimated_rows, 1.0)
+
+    def summary(self):
+        return f"{self.table_name}: {self.rows_written} rows exported to {self.path} in {self.elapsed:.1f}s"
+
+
+def _json_value(value):
+    """Makes a database value JSON-serializable."""
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return str(value)
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return value
+
+def _csv_value(value):
+    return "" if value is None else value
+
+def export_table(table_name, path, fmt=None, chunk_size=EXPORT_CHUNK_SIZE, progress=None, cancel_event=None):
+    """Streams a table into a CSV or JSON Lines file and returns an ExportReport.
+
+    Rows are pulled in fixed-size chunks from an unbuffered cursor and written
+    straight out, so memory use stays flat however large the table is. The
+    format is taken from the file extension unless fmt ('csv' or 'jsonl') is
+    given. `progress(report)` is called after every chunk from the exporting
+    thread; setting `cancel_event` stops the export and removes the partial file.
+    """
+    fmt = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in ('csv', 'jsonl'):
+        raise ValueError(f"Unsupported export format for {path}; use .csv or .jsonl")
+
+    columns = get_table_schema(table_name).columns
+    report = ExportReport(table_name, path, estimate_row_count(table_name))
+
+    try:
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            if fmt == 'csv':
+                writer = csv.writer(f)
+                writer.writerow(columns)
+
+            for rows in stream_rows(table_name, columns, chunk_size):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ExportCancelled(f"Export of {table_name} was cancelled.")
+                if fmt == 'csv':
+                    writer.writerows([_csv_value(value) for value in row] for row in rows)
+                else:
+                    f.writelines(
+                        json.dumps(dict(zip(columns, row)), default=_json_value, ensure_ascii=False) + '\n'
+                        for row in rows
+                    )
+                report.rows_written += len(rows)
+                if progress is not None:
+                    progress(report)
+    except BaseException:
+        # Never leave a truncated file that looks like a complete export
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    report.finished = time.perf_counter()
+    if progress is not None:
+        progress(report)
+    return report
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crud_operations
+from db_connection import close_pool
+from local_mirror import _schema_to_json
+from schema_catalog import TableSchema, set_schema_reader
+
+
+def make_schema(name, columns, key, nullable=(), auto_increment=(), indexes=None):
+    """A TableSchema from [(column, MySQL type)], as schema_catalog would read it."""
+    schema = TableSchema(name)
+    schema.columns = [column for column, _ in columns]
+    schema.types = dict(columns)
+    schema.nullable = {column: column in nullable for column in schema.columns}
+    schema.auto_increment = set(auto_increment)
+    schema.primary_key = [key]
+    schema.indexes = indexes or {}
+    return schema
+
+
+BOOKS = make_schema(
+    'Books',
+    [('BookID', 'int'), ('Title', 'varchar'), ('Genre', 'varchar'), ('Year', 'int')],
+    key='BookID', nullable=('Genre', 'Year'), auto_increment=('BookID',),
+    indexes={'idx_year': ('BTREE', ['Year'])},
+)
+
+
+@pytest.fixture
+def offline_db(tmp_path, monkeypatch):
+    """An offline mirror that serves every crud_operations read and write."""
+    monkeypatch.setattr(crud_operations, '_mirror', None)
+    mirror = crud_operations.use_mirror(str(tmp_path / 'mirror.db'), offline=True)
+    yield mirror
+    set_schema_reader(None)
+    close_pool()
+    crud_operations.invalidate_cache()
+
+
+@pytest.fixture
+def seed_table(offline_db):
+    """Creates a table in the offline mirror, as a sync would have left it, and fills it with rows."""
+    conn = offline_db._connection()
+
+    def seed(schema, rows=()):
+        offline_db._create_table(conn, schema)
+        conn.execute(
+            "INSERT OR REPLACE INTO _mirror_tables (table_name, schema_json, synced_at) VALUES (?, ?, ?)",
+            (schema.name, _schema_to_json(schema), time.time()),
+        )
+        placeholders = ', '.join(['?'] * len(schema.columns))
+        conn.executemany(f"INSERT INTO {schema.name} VALUES ({placeholders})", rows)
+        set_schema_reader(offline_db.read_schemas)  # Forgets schemas cached before the table existed
+        return schema
+
+    return seed
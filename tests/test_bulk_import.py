@@ -0,0 +1,85 @@
+import datetime
+import decimal
+
+import pytest
+
+from bulk_import import _validate_header, _validate_row, import_csv
+from conftest import make_schema
+from crud_operations import fetch_all_data
+
+LOANS = make_schema(
+    'Loans',
+    [('LoanID', 'int'), ('BookID', 'int'), ('Due', 'date'), ('Fine', 'decimal'), ('Note', 'varchar')],
+    key='LoanID', nullable=('Fine', 'Note'), auto_increment=('LoanID',),
+)
+COLUMNS = ['BookID', 'Due', 'Fine', 'Note']
+
+
+def test_cells_are_typed_from_the_schema():
+    row = _validate_row(LOANS, COLUMNS, [' 7 ', '2024-03-01', '0.25', 'late'])
+    assert row == [7, datetime.date(2024, 3, 1), decimal.Decimal('0.25'), 'late']
+
+
+def test_empty_cells_are_null_where_allowed():
+    assert _validate_row(LOANS, COLUMNS, ['7', '2024-03-01', '', '']) == [7, datetime.date(2024, 3, 1), None, None]
+    assert _validate_row(LOANS, ['LoanID', 'BookID', 'Due'], ['', '7', '2024-03-01'])[0] is None
+    with pytest.raises(ValueError, match="BookID is required"):
+        _validate_row(LOANS, COLUMNS, ['', '2024-03-01', '', ''])
+
+
+@pytest.mark.parametrize('cells, message', [
+    (['seven', '2024-03-01', '', ''], "BookID"),
+    (['7', '03/01/2024', '', ''], "Due"),
+    (['7', '2024-03-01', 'a lot', ''], "Fine: 'a lot' is not a number"),
+    (['7', '2024-03-01', ''], "expected 4 fields, found 3"),
+])
+def test_invalid_cells_are_reported(cells, message):
+    with pytest.raises(ValueError, match=message):
+        _validate_row(LOANS, COLUMNS, cells)
+
+
+def test_header_checks():
+    assert _validate_header(LOANS, [' BookID', 'Due ']) == ['BookID', 'Due']
+    with pytest.raises(ValueError, match="Unknown columns for Loans: Title"):
+        _validate_header(LOANS, ['BookID', 'Due', 'Title'])
+    with pytest.raises(ValueError, match="Required columns missing from the CSV: Due"):
+        _validate_header(LOANS, ['BookID'])
+    with pytest.raises(ValueError, match="empty"):
+        _validate_header(LOANS, None)
+
+
+def test_import_keeps_good_rows_and_reports_bad_lines(seed_table, tmp_path):
+    seed_table(LOANS)
+    path = tmp_path / 'loans.csv'
+    path.write_text(
+        "BookID,Due,Fine,Note\n"
+        "1,2024-03-01,,\n"
+        "x,2024-03-02,,\n"
+        "\n"
+        "3,2024-03-03,1.50,damaged\n"
+        "4,not a date,,\n"
+        "5,2024-03-05,,\n",
+        encoding='utf-8',
+    )
+    progress = []
+    report = import_csv('Loans', str(path), batch_size=2, progress=lambda r: progress.append(r.rows_inserted))
+
+    assert (report.rows_read, report.rows_inserted) == (5, 3)
+    assert [line for line, _ in report.errors] == [3, 6]
+    assert progress[-1] == 3
+    _, rows = fetch_all_data('Loans')
+    assert [tuple(row) for row in rows] == [
+        (1, 1, datetime.date(2024, 3, 1), None, None),
+        (2, 3, datetime.date(2024, 3, 3), decimal.Decimal('1.50'), 'damaged'),
+        (3, 5, datetime.date(2024, 3, 5), None, None),
+    ]
+
+
+def test_rows_the_database_rejects_are_reported_by_line(seed_table, tmp_path):
+    seed_table(LOANS, [(1, 1, datetime.date(2024, 1, 1), None, None)])
+    path = tmp_path / 'loans.csv'
+    path.write_text("LoanID,BookID,Due\n2,2,2024-03-01\n1,9,2024-03-02\n3,3,2024-03-03\n", encoding='utf-8')
+    report = import_csv('Loans', str(path))
+
+    assert report.rows_inserted == 2
+    assert [line for line, _ in report.errors] == [3]
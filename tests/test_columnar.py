@@ -0,0 +1,69 @@
+import datetime
+import decimal
+
+import pytest
+
+from columnar import ColumnarResult
+
+COLUMNS = ['LoanID', 'Title', 'Due', 'Fine', 'Note']
+ROWS = [
+    (1, 'Dune', datetime.date(2024, 1, 5), decimal.Decimal('0.25'), None),
+    (2, 'Emma', datetime.date(2024, 1, 6), None, None),
+    (3, 'Dune', None, decimal.Decimal('1.00'), 'lost'),
+    (4, 'Ubik', datetime.date(2024, 2, 1), None, None),
+    (5, 'Dune', datetime.date(2024, 2, 3), decimal.Decimal('0.50'), None),
+]
+
+
+@pytest.fixture
+def result():
+    return ColumnarResult.from_rows(COLUMNS, ROWS, table_name='Loans')
+
+
+@pytest.mark.parametrize('window', [
+    slice(None), slice(1, 3), slice(-2, None), slice(None, -3), slice(None, None, 2),
+    slice(None, None, -1), slice(4, 0, -2), slice(3, 100), slice(10, 20), slice(3, 1),
+])
+def test_slices_match_a_list(result, window):
+    assert result[window] == ROWS[window]
+
+
+def test_indexing(result):
+    assert result[0] == ROWS[0]
+    assert result[-1] == ROWS[-1]
+    with pytest.raises(IndexError):
+        result[5]
+    with pytest.raises(IndexError):
+        result[-6]
+
+
+def test_rows_round_trip_through_compact_storage(result):
+    assert list(result) == ROWS
+    assert len(result) == 5
+    assert result.storage() == {'LoanID': 'int', 'Title': 'dictionary', 'Due': 'date',
+                                'Fine': 'object', 'Note': 'dictionary'}
+    assert result.value(2, 4) == 'lost'
+
+
+def test_leading_nulls_and_all_null_columns():
+    result = ColumnarResult.from_rows(['a', 'b'], [(None, None), (None, None), (7, None)])
+    assert list(result) == [(None, None), (None, None), (7, None)]
+    assert result[1:] == [(None, None), (7, None)]
+    assert result.storage() == {'a': 'int', 'b': 'null'}
+
+
+def test_values_the_array_cannot_hold_fall_back_to_objects():
+    result = ColumnarResult.from_rows(['n'], [(1,), (2 ** 70,), ('text',)])
+    assert list(result) == [(1,), (2 ** 70,), ('text',)]
+    assert result.storage() == {'n': 'object'}
+
+
+def test_chunks_build_the_same_result():
+    chunked = ColumnarResult.from_chunks(COLUMNS, [ROWS[:2], ROWS[2:]])
+    assert chunked[:] == ROWS
+
+
+def test_matching_finds_text_in_any_column(result):
+    assert result.matching('dune') == [0, 2, 4]
+    assert result.matching('lost') == [2]
+    assert result.matching('2024-02') == [3, 4]
@@ -0,0 +1,104 @@
+import pytest
+
+from conftest import BOOKS
+from crud_operations import _filter_clause, _seek_clause, fetch_page
+
+# Repeated and NULL years, so paging has to break ties on the key
+ROWS = [
+    (1, 'Dune', 'SF', 1965), (2, 'Emma', 'Classic', 1815), (3, 'Ubik', 'SF', 1969),
+    (4, 'Beloved', None, 1987), (5, 'Solaris', 'SF', 1961), (6, 'Untitled', None, None),
+    (7, 'Persuasion', 'Classic', 1817), (8, 'Hyperion', 'SF', 1989), (9, 'Draft', None, None),
+    (10, 'Neuromancer', 'SF', 1984), (11, 'Ubik (reissue)', 'SF', 1969), (12, 'Kindred', None, 1979),
+]
+
+
+@pytest.fixture
+def books(seed_table):
+    return seed_table(BOOKS, ROWS)
+
+
+def _view_order(rows, descending=False):
+    # NULL years first, then by year, then by key; reversed for a descending view
+    ordered = sorted(rows, key=lambda row: (row[3] is not None, row[3] or 0, row[0]))
+    return ordered[::-1] if descending else ordered
+
+
+def _walk_forward(descending, limit=5, filters=None):
+    rows, after = [], None
+    while True:
+        _, page = fetch_page('Books', 'BookID', after_key=after, limit=limit,
+                             order_by='Year', descending=descending, filters=filters)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        after = (page[-1][3], page[-1][0])
+
+
+@pytest.mark.parametrize('descending', [False, True])
+def test_seek_pages_forward_through_nulls_and_ties(books, descending):
+    assert _walk_forward(descending) == _view_order(ROWS, descending)
+
+
+@pytest.mark.parametrize('descending', [False, True])
+def test_seek_pages_backward_from_the_end(books, descending):
+    expected = _view_order(ROWS, descending)
+    last = expected[-1]
+    rows, before = [last], (last[3], last[0])
+    while True:
+        _, page = fetch_page('Books', 'BookID', before_key=before, limit=4, order_by='Year', descending=descending)
+        rows[:0] = page
+        if len(page) < 4:
+            break
+        before = (page[0][3], page[0][0])
+    assert rows == expected
+
+
+def test_key_pages_both_ways(books):
+    _, first = fetch_page('Books', 'BookID', limit=5)
+    _, second = fetch_page('Books', 'BookID', after_key=first[-1][0], limit=5)
+    _, back = fetch_page('Books', 'BookID', before_key=second[0][0], limit=5)
+    assert [row[0] for row in first] == [1, 2, 3, 4, 5]
+    assert [row[0] for row in second] == [6, 7, 8, 9, 10]
+    assert back == first
+
+
+def test_seek_clause_after_null_cursor_moves_on_to_values():
+    clause, params = _seek_clause('Year', 'BookID', (None, 6), forward=True)
+    assert params == [6]
+    assert 'Year IS NOT NULL' in clause
+    clause, params = _seek_clause('Year', 'BookID', (None, 9), forward=False)
+    assert params == [9]
+    assert clause == "(Year IS NULL AND BookID < %s)"
+
+
+def test_seek_clause_before_value_cursor_includes_nulls():
+    clause, params = _seek_clause('Year', 'BookID', (1969, 11), forward=False)
+    assert params == [1969, 1969, 11]
+    assert clause.endswith("OR Year IS NULL)")
+
+
+def test_filtered_pages(books):
+    filters = [('Genre', '=', 'SF'), ('Year', 'between', (1965, 1985))]
+    expected = _view_order([row for row in ROWS if row[2] == 'SF' and row[3] and 1965 <= row[3] <= 1985])
+    assert _walk_forward(False, limit=2, filters=filters) == expected
+
+
+def test_prefix_filter_matches_wildcards_literally(books):
+    _, rows = fetch_page('Books', 'BookID', filters=[('Title', 'prefix', 'Ubik (')])
+    assert [row[0] for row in rows] == [11]
+    _, rows = fetch_page('Books', 'BookID', filters=[('Title', 'prefix', 'U%')])
+    assert rows == []
+
+
+def test_filter_clause_compiles_bound_parameters():
+    clause, params = _filter_clause(BOOKS, [('Year', '>=', 1900), ('Title', 'prefix', 'A_b')])
+    assert clause == "Year >= %s AND Title LIKE %s ESCAPE '!'"
+    assert params[0] == 1900
+    assert params[1] == 'A!_b%'
+
+
+def test_filter_clause_rejects_unknown_columns_and_operators():
+    with pytest.raises(ValueError, match="no column"):
+        _filter_clause(BOOKS, [('Title; DROP TABLE Books', '=', 'x')])
+    with pytest.raises(ValueError, match="Unsupported"):
+        _filter_clause(BOOKS, [('Title', 'regexp', 'x')])
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, SingleFlight
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(result_cache.time, 'monotonic', clock)
+    return clock
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ResultCache(ttl=5)
+    cache.put('Books', 'page', (['BookID'], [(1,)]), cache.version('Books'))
+    clock.now += 5
+    assert cache.get('page') == (True, (['BookID'], [(1,)]))
+    clock.now += 0.1
+    assert cache.get('page') == (False, None)
+    assert cache.stats()['entries'] == 0
+
+
+def test_without_a_ttl_entries_stay(clock):
+    cache = ResultCache()
+    cache.put('Books', 'page', 'rows', cache.version('Books'))
+    clock.now += 86400
+    assert cache.get('page') == (True, 'rows')
+
+
+def test_a_write_drops_only_that_tables_entries():
+    cache = ResultCache()
+    cache.put('Books', 'books', 'b', cache.version('Books'))
+    cache.put('Genres', 'genres', 'g', cache.version('Genres'))
+    cache.invalidate_table('Books')
+    assert cache.get('books') == (False, None)
+    assert cache.get('genres') == (True, 'g')
+
+
+def test_a_read_that_raced_a_write_is_not_stored():
+    cache = ResultCache()
+    version = cache.version('Books')
+    cache.invalidate_table('Books')     # The write lands while the read is running
+    cache.put('Books', 'page', 'stale', version)
+    assert cache.get('page') == (False, None)
+    cache.put('Books', 'page', 'fresh', cache.version('Books'))
+    assert cache.get('page') == (True, 'fresh')
+
+
+def test_clear_also_rejects_reads_started_before_it():
+    cache = ResultCache()
+    version = cache.version('Books')
+    cache.put('Books', 'page', 'rows', version)
+    cache.clear()
+    cache.put('Books', 'page', 'rows', version)
+    assert cache.get('page') == (False, None)
+
+
+def test_least_recently_used_entries_go_first_over_the_budget():
+    value = 'x' * 1000
+    cache = ResultCache(max_bytes=2 * result_cache.estimate_size(value) + 10)
+    for key in ('a', 'b'):
+        cache.put('Books', key, value, cache.version('Books'))
+    cache.get('a')
+    cache.put('Books', 'c', value, cache.version('Books'))
+    assert cache.get('b') == (False, None)
+    assert cache.get('a')[0] and cache.get('c')[0]
+
+
+def test_overlapping_calls_share_one_run():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def query():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return 'rows'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('page', query)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do('page', query))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    _wait_for(lambda: flight.stats()['shared'] == 3)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert results == ['rows'] * 4
+    assert len(runs) == 1
+    assert flight.stats() == {'executed': 1, 'shared': 3, 'in_flight': 0}
+
+
+def test_followers_get_the_leaders_error_and_later_calls_run_again():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('server gone')
+
+    errors = []
+
+    def call():
+        try:
+            flight.do('page', failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    _wait_for(lambda: flight.stats()['shared'] == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert errors == ['server gone', 'server gone']
+    assert flight.do('page', lambda: 'rows') == 'rows'
+    assert flight.stats()['executed'] == 2
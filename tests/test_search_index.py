@@ -0,0 +1,64 @@
+import pytest
+
+from search_index import IndexBudgetExceeded, build_index
+
+COLUMNS = ['GenreID', 'Name']
+ROWS = [(1, 'Fantasy'), (2, 'Fairy tales'), (3, 'History'), (10, 'Science fiction')]
+
+
+@pytest.fixture
+def index():
+    return build_index(COLUMNS, ROWS)
+
+
+def test_search_matches_substrings_in_key_order(index):
+    assert index.search('fa') == [(1, 'Fantasy'), (2, 'Fairy tales')]
+    assert index.search('TALES') == [(2, 'Fairy tales')]
+    assert index.search('ion') == [(10, 'Science fiction')]
+    assert index.search('xyz') == []
+
+
+def test_matches_do_not_span_columns(index):
+    assert index.search('1fan') == []
+
+
+def test_added_rows_are_found_and_sort_with_the_snapshot(index):
+    index.add((4, 'Fables'))
+    assert index.search('fa') == [(1, 'Fantasy'), (2, 'Fairy tales'), (4, 'Fables')]
+    assert index.search('fab') == [(4, 'Fables')]
+    assert len(index) == 5
+
+
+def test_adding_an_existing_key_replaces_its_row(index):
+    index.add((3, 'World history'))
+    assert index.search('world') == [(3, 'World history')]
+    assert index.search('history') == [(3, 'World history')]
+    assert len(index) == 4
+
+
+def test_removed_rows_are_no_longer_found(index):
+    index.remove(2)
+    index.add((4, 'Fables'))
+    index.remove('4')
+    assert index.search('fa') == [(1, 'Fantasy')]
+    assert index.search('tales') == []
+    assert len(index) == 3
+    index.remove(99)    # Unknown keys are ignored
+    assert len(index) == 3
+
+
+def test_removing_a_row_drops_its_postings(index):
+    before = index.estimated_bytes()
+    index.add((4, 'Quantum mechanics'))
+    index.remove(4)
+    assert index.estimated_bytes() == before
+
+
+def test_limit(index):
+    assert index.search('a', limit=2) == [(1, 'Fantasy'), (2, 'Fairy tales')]
+
+
+def test_build_over_budget_raises():
+    rows = [(key, f'Genre number {key}') for key in range(2000)]
+    with pytest.raises(IndexBudgetExceeded):
+        build_index(COLUMNS, rows, memory_budget=10000)
@@ -1,8 +1,45 @@
+import bisect
+
 import customtkinter
+import tkinter as tk
 from tkinter import ttk
 
-def create_table_display(master, data, columns):
-    """Creates a table display using Treeview with selection capability."""
+from instrumentation import span
+
+def _heading_text(column, sort):
+    """A column heading, marked with the direction when the view is sorted by it."""
+    if sort is None or sort[0] != column:
+        return column
+    return f"{column} {'▼' if sort[1] else '▲'}"
+
+def _sort_value(value):
+    """Sort key that orders numbers numerically, text case-insensitively and blanks first."""
+    if value in (None, '', 'None'):
+        return (0, 0, '')
+    try:
+        return (1, float(value), '')
+    except (TypeError, ValueError):
+        return (2, 0, str(value).casefold())
+
+def _sort_tree(tree, columns, column, sort_state):
+    """Re-orders the rows already in a Treeview by one column, toggling direction on repeat clicks."""
+    descending = sort_state.get('column') == column and not sort_state.get('descending')
+    sort_state.update(column=column, descending=descending)
+    index = columns.index(column)
+    items = sorted(tree.get_children(), key=lambda iid: _sort_value(tree.item(iid, 'values')[index]),
+                   reverse=descending)
+    for position, iid in enumerate(items):
+        tree.move(iid, '', position)
+    for col in columns:
+        tree.heading(col, text=_heading_text(col, (column, descending)))
+
+def create_table_display(master, data, columns, key_index=None):
+    """Creates a table display using Treeview with selection capability.
+
+    When key_index is given, each row's item id is its primary key so the row
+    can later be patched in place. Clicking a heading sorts the rows already
+    shown by that column.
+    """
     # Create a frame to hold the table
     frame = customtkinter.CTkFrame(master)
     frame.pack(fill="both", expand=True)
@@ -15,15 +52,18 @@ def create_table_display(master, data, columns):
     x_scrollbar = ttk.Scrollbar(frame, orient='horizontal', command=tree.xview)
     tree.configure(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
 
-    # Set column headings
+    # Set column headings; the whole result is loaded, so sorting happens here
+    sort_state = {}
     for col in columns:
-        tree.heading(col, text=col)
+        tree.heading(col, text=col, command=lambda c=col: _sort_tree(tree, list(columns), c, sort_state))
         tree.column(col, minwidth=100, width=150)  # Adjust width as needed
 
     # Insert data
     if data:
-        for row in data:
-            tree.insert('', 'end', values=row)
+        with span("ui.table_insert_rows", rows=len(data)):
+            for row in data:
+                iid = str(row[key_index]) if key_index is not None else None
+                tree.insert('', 'end', iid=iid, values=row)
     else:
         tree.insert('', 'end', values=['No data available'] * len(columns))
 
@@ -36,4 +76,350 @@ def create_table_display(master, data, columns):
     frame.grid_rowconfigure(0, weight=1)
     frame.grid_columnconfigure(0, weight=1)
 
+    frame.tree = tree
     return frame
+
+
+class PagedTable:
+    """Keeps a Treeview filled with a sliding window of rows loaded page by page.
+
+    Only about `window_pages` pages are held at once; scrolling near either end
+    fetches the neighbouring page and trims the opposite end of the window.
+    When the view is sorted by another column (sort_index), pages are asked for
+    by (sort value, key) cursors instead of keys.
+    """
+
+    def __init__(self, tree, load_page, key_index=0, page_size=200, window_pages=3, prefetch=0.15,
+                 run_async=None, sort_index=None, insert_new=True):
+        self.tree = tree
+        self.load_page = load_page      # load_page(after_key=None, before_key=None) -> rows
+        self.run_async = run_async      # run_async(func, on_success, on_error), or None to load inline
+        self.key_index = key_index
+        self.sort_index = sort_index    # Column the view is ordered by, if not the key
+        self.insert_new = insert_new    # False when the view's order or filters say nothing of new rows
+        self.page_size = page_size
+        self.max_rows = page_size * window_pages
+        self.prefetch = prefetch        # Fraction of the window that triggers a fetch
+        self.keys = []                  # Paging cursor of every row in the window, in order
+        self.at_start = True
+        self.at_end = False
+        self._loading = False
+
+    def load_initial(self, rows=None):
+        """Fills the window with the first page of the table."""
+        if rows is None:
+            rows = self.load_page()
+        self.tree.delete(*self.tree.get_children())
+        self.keys = []
+        self.at_start = True
+        self._append(rows)
+        self.at_end = len(rows) < self.page_size
+
+    def on_scroll(self, first, last):
+        """Treeview yscrollcommand hook that schedules page loads near the edges."""
+        first, last = float(first), float(last)
+        if self._loading:
+            return
+        if last >= 1 - self.prefetch and not self.at_end:
+            self._loading = True
+            self.tree.after_idle(self._load_next)
+        elif first <= self.prefetch and not self.at_start:
+            self._loading = True
+            self.tree.after_idle(self._load_previous)
+
+    def upsert(self, row):
+        """Updates a row in place, or slots a new one into the window in key order."""
+        key = row[self.key_index]
+        iid = str(key)
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=row)
+            return
+        if not self.insert_new or self.sort_index is not None:
+            return
+
+        # Rows outside the loaded window will show up when that part is scrolled to
+        if self.keys and ((key < self.keys[0] and not self.at_start) or (key > self.keys[-1] and not self.at_end)):
+            return
+        position = bisect.bisect_left(self.keys, key)
+        self.tree.insert('', position, iid=iid, values=row)
+        self.keys.insert(position, key)
+
+    def remove(self, key):
+        """Removes a row from the window if it is loaded."""
+        iid = str(key)
+        if self.tree.exists(iid):
+            del self.keys[self.tree.index(iid)]
+            self.tree.delete(iid)
+
+    def _load_next(self):
+        if self.keys:
+            self._fetch(self._apply_next, after_key=self.keys[-1])
+        else:
+            self._loading = False
+
+    def _load_previous(self):
+        if self.keys:
+            self._fetch(self._apply_previous, before_key=self.keys[0])
+        else:
+            self._loading = False
+
+    def _fetch(self, apply, **keys):
+        """Loads a page directly, or through run_async when one was supplied."""
+        def on_success(rows):
+            self._loading = False
+            if self.tree.winfo_exists():
+                apply(rows)
+
+        def on_error(error):
+            self._loading = False
+            print(f"Failed to load page: {error}")
+
+        if self.run_async is None:
+            try:
+                rows = self.load_page(**keys)
+            except Exception as e:
+                on_error(e)
+            else:
+                on_success(rows)
+        else:
+            self.run_async(lambda: self.load_page(**keys), on_success, on_error)
+
+    def _apply_next(self, rows):
+        with span("ui.page_append", rows=len(rows)):
+            self._append_page(rows)
+
+    def _apply_previous(self, rows):
+        with span("ui.page_prepend", rows=len(rows)):
+            self._prepend_page(rows)
+
+    def _append_page(self, rows):
+        self.at_end = len(rows) < self.page_size
+        if rows:
+            first_visible = self._first_visible_index()
+            self._append(rows)
+            overflow = len(self.keys) - self.max_rows
+            if overflow > 0:
+                self._trim_head(overflow)
+                self._scroll_to_index(first_visible - overflow)
+
+    def _prepend_page(self, rows):
+        self.at_start = len(rows) < self.page_size
+        if rows:
+            first_visible = self._first_visible_index()
+            self._prepend(rows)
+            overflow = len(self.keys) - self.max_rows
+            if overflow > 0:
+                self._trim_tail(overflow)
+            self._scroll_to_index(first_visible + len(rows))
+
+    def _cursor(self, row):
+        if self.sort_index is None:
+            return row[self.key_index]
+        return (row[self.sort_index], row[self.key_index])
+
+    def _append(self, rows):
+        for row in rows:
+            self.tree.insert('', 'end', iid=str(row[self.key_index]), values=row)
+            self.keys.append(self._cursor(row))
+
+    def _prepend(self, rows):
+        for row in reversed(rows):
+            self.tree.insert('', 0, iid=str(row[self.key_index]), values=row)
+        self.keys[:0] = [self._cursor(row) for row in rows]
+
+    def _trim_head(self, count):
+        self.tree.delete(*self.tree.get_children()[:count])
+        del self.keys[:count]
+        self.at_start = False
+
+    def _trim_tail(self, count):
+        self.tree.delete(*self.tree.get_children()[-count:])
+        del self.keys[-count:]
+        self.at_end = False
+
+    def _first_visible_index(self):
+        first, _ = self.tree.yview()
+        return int(round(first * len(self.keys)))
+
+    def _scroll_to_index(self, index):
+        if self.keys:
+            self.tree.yview_moveto(max(index, 0) / len(self.keys))
+
+
+def create_paged_table_display(master, columns, load_page, first_page, key_index=0, page_size=200,
+                               run_async=None, sort=None, on_heading_click=None, insert_new=True):
+    """Creates a table display that loads rows on demand as the user scrolls.
+
+    `load_page(after_key=None, before_key=None)` must return the rows of the
+    page adjacent to the given primary key, in ascending key order. When
+    `run_async` is given, page loads are handed to it instead of blocking Tk.
+
+    For a view sorted by `sort=(column, descending)`, load_page must return
+    rows in that order, taking (sort value, key) cursors when the column is
+    not the key. Only the database can sort rows that are not loaded, so
+    heading clicks go to `on_heading_click(column)` to reload the view.
+    """
+    frame = customtkinter.CTkFrame(master)
+    frame.pack(fill="both", expand=True)
+
+    columns = list(columns)
+    sort_index = None
+    if sort is not None and columns.index(sort[0]) != key_index:
+        sort_index = columns.index(sort[0])
+
+    tree = ttk.Treeview(frame, columns=columns, show='headings')
+    paged = PagedTable(tree, load_page, key_index=key_index, page_size=page_size, run_async=run_async,
+                       sort_index=sort_index, insert_new=insert_new)
+
+    y_scrollbar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
+    x_scrollbar = ttk.Scrollbar(frame, orient='horizontal', command=tree.xview)
+
+    def on_yscroll(first, last):
+        y_scrollbar.set(first, last)
+        paged.on_scroll(first, last)
+
+    tree.configure(yscrollcommand=on_yscroll, xscrollcommand=x_scrollbar.set)
+
+    for col in columns:
+        command = (lambda c=col: on_heading_click(c)) if on_heading_click is not None else ''
+        tree.heading(col, text=_heading_text(col, sort), command=command)
+        tree.column(col, minwidth=100, width=150)
+
+    if first_page:
+        with span("ui.table_insert_rows", rows=len(first_page)):
+            paged.load_initial(first_page)
+    else:
+        tree.insert('', 'end', values=['No data available'] * len(columns))
+
+    tree.grid(row=0, column=0, sticky='nsew')
+    y_scrollbar.grid(row=0, column=1, sticky='ns')
+    x_scrollbar.grid(row=1, column=0, sticky='ew')
+
+    frame.grid_rowconfigure(0, weight=1)
+    frame.grid_columnconfigure(0, weight=1)
+
+    # Keep the loader reachable from the frame for callers that need to refresh it
+    frame.tree = tree
+    frame.paged_table = paged
+    return frame
+
+
+def upsert_table_row(table_frame, row, key_index, insert_missing=False):
+    """Patches one row of a table display by primary key, keeping scroll and selection.
+
+    Paged tables place new rows in key order within their window; plain tables
+    only add rows that are not shown yet when insert_missing is set.
+    """
+    paged = getattr(table_frame, 'paged_table', None)
+    if paged is not None:
+        paged.upsert(row)
+        return
+
+    tree = table_frame.tree
+    iid = str(row[key_index])
+    if tree.exists(iid):
+        tree.item(iid, values=row)
+    elif insert_missing:
+        tree.insert('', 'end', iid=iid, values=row)
+
+def remove_table_row(table_frame, key):
+    """Removes one row of a table display by primary key."""
+    paged = getattr(table_frame, 'paged_table', None)
+    if paged is not None:
+        paged.remove(key)
+    elif table_frame.tree.exists(str(key)):
+        table_frame.tree.delete(str(key))
+
+def create_progress_window(master, title):
+    """Opens a small window for reporting the progress of a long-running job.
+
+    Returns the window, a status label and a textbox for detailed messages.
+    """
+    window = customtkinter.CTkToplevel(master)
+    window.title(title)
+    window.geometry("500x400")
+
+    status_label = customtkinter.CTkLabel(window, text="Starting...", wraplength=450)
+    status_label.pack(padx=20, pady=(20, 10))
+
+    progress_bar = customtkinter.CTkProgressBar(window, width=460)
+    progress_bar.set(0)
+    progress_bar.pack(padx=20, pady=5)
+    window.progress_bar = progress_bar
+
+    details_box = customtkinter.CTkTextbox(window, width=460, height=240)
+    details_box.pack(padx=20, pady=10, fill="both", expand=True)
+
+    return window, status_label, details_box
+
+
+def attach_autocomplete(entry, suggest, run_async=None, delay_ms=200, max_rows=8):
+    """Adds a suggestion list below a form entry, for picking a referenced row.
+
+    `suggest(text)` returns (value, label) pairs; picking one puts its value in
+    the entry. Lookups wait for a pause in typing and, when `run_async` is
+    given, run through it so the form never blocks. Returns the hint label
+    that shows the label of the chosen value.
+    """
+    listbox = tk.Listbox(entry.master, height=max_rows, activestyle='dotbox', exportselection=False)
+    hint = customtkinter.CTkLabel(entry.master, text="", text_color="#7f8c8d", anchor="w")
+    hint.pack(side="top", fill="x", padx=5)
+    state = {'after': None, 'suggestions': [], 'query': 0}
+
+    def hide():
+        listbox.pack_forget()
+
+    def show(query, suggestions):
+        if query != state['query'] or not entry.winfo_exists():
+            return  # A newer keystroke is already being looked up
+        state['suggestions'] = suggestions
+        listbox.delete(0, 'end')
+        for value, label in suggestions:
+            listbox.insert('end', f"{value} \u2014 {label}")
+        if suggestions:
+            listbox.configure(height=min(len(suggestions), max_rows))
+            listbox.pack(side="top", fill="x", padx=5, after=entry)
+        else:
+            hide()
+
+    def lookup():
+        state['after'] = None
+        state['query'] += 1
+        query, text = state['query'], entry.get()
+        if run_async is None:
+            show(query, suggest(text))
+        else:
+            run_async(lambda: suggest(text), lambda suggestions: show(query, suggestions),
+                      lambda e: print(f"Failed to load suggestions: {e}"))
+
+    def pick(index):
+        value, label = state['suggestions'][index]
+        entry.delete(0, 'end')
+        entry.insert(0, str(value))
+        hint.configure(text=label)
+        hide()
+
+    def on_key(event):
+        if event.keysym == 'Down' and state['suggestions']:
+            listbox.focus_set()
+            listbox.selection_set(0)
+            return
+        if event.keysym == 'Escape':
+            hide()
+            return
+        hint.configure(text="")
+        if state['after'] is not None:
+            entry.after_cancel(state['after'])
+        state['after'] = entry.after(delay_ms, lookup)
+
+    def on_pick(event):
+        selection = listbox.curselection()
+        if selection:
+            pick(selection[0])
+            entry.focus_set()
+
+    entry.bind('<KeyRelease>', on_key, add='+')
+    listbox.bind('<ButtonRelease-1>', on_pick)
+    listbox.bind('<Return>', on_pick)
+    listbox.bind('<Escape>', lambda event: (hide(), entry.focus_set()))
+    return hint